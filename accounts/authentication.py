@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from redis.exceptions import RedisError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# JWT authentication without a User query per request.
+#
+# simplejwt's JWTAuthentication loads the User row for every authenticated
+# request. Here each process keeps recently seen users' rows for a short
+# TTL and builds a fresh instance from them per request, so a busy client
+# costs one query per TTL instead of one per request. Deactivating or
+# deleting a user has to take effect at once everywhere: deactivated users
+# go into a Redis set, and a deleted user gets a key that only has to
+# outlive the TTL (nothing can have their row cached after that, and the
+# set doesn't fill up with ids that may be reused). Every request checks
+# both in one round trip; any other change to a user reaches other
+# processes within the TTL. Both are written when the transaction commits.
+REVOKED_USERS_KEY = 'auth:revoked_users'
+DELETED_USER_KEY = 'auth:deleted_user:{}'
+
+_rows = {}
+_lock = threading.Lock()
+
+
+def cache_ttl():
+    return getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+
+
+def _field_names():
+    return [field.attname for field in get_user_model()._meta.concrete_fields]
+
+
+def cached_user(user_id):
+    """A fresh User instance from this process's cache, or None."""
+    with _lock:
+        entry = _rows.get(user_id)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return get_user_model().from_db('default', _field_names(), entry[1])
+
+
+def cache_user(user):
+    values = [getattr(user, name) for name in _field_names()]
+    limit = getattr(settings, 'AUTH_USER_CACHE_SIZE', 10_000)
+    with _lock:
+        if len(_rows) >= limit:
+            now = time.monotonic()
+            for key in [key for key, (expires, _) in _rows.items() if expires < now]:
+                del _rows[key]
+            while len(_rows) >= limit:
+                del _rows[next(iter(_rows))]
+        _rows[user.pk] = (time.monotonic() + cache_ttl(), values)
+
+
+def forget_user(user_id):
+    with _lock:
+        _rows.pop(user_id, None)
+
+
+def clear_cache():
+    with _lock:
+        _rows.clear()
+
+
+def is_revoked(user_id):
+    """Whether ``user_id`` is deactivated or deleted; None if Redis can't say."""
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.sismember(REVOKED_USERS_KEY, user_id)
+        pipe.exists(DELETED_USER_KEY.format(user_id))
+        inactive, deleted = pipe.execute()
+        return bool(inactive or deleted)
+    except RedisError:
+        logger.warning('Revoked-user check unavailable; falling back to the database')
+        return None
+
+
+def set_revoked(user_id, revoked):
+    try:
+        client = get_redis()
+        if revoked:
+            client.sadd(REVOKED_USERS_KEY, user_id)
+        else:
+            client.srem(REVOKED_USERS_KEY, user_id)
+    except RedisError:
+        logger.exception(f'Could not update revoked users for {user_id}')
+    forget_user(user_id)
+
+
+def set_deleted(user_id):
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.srem(REVOKED_USERS_KEY, user_id)
+        pipe.set(DELETED_USER_KEY.format(user_id), 1, ex=int(cache_ttl()) + 1)
+        pipe.execute()
+    except RedisError:
+        logger.exception(f'Could not record deleted user {user_id}')
+    forget_user(user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with the per-process user cache described above."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = get_user_model()._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        except Exception:
+            raise InvalidToken('Token contained an invalid user identification')
+
+        revoked = is_revoked(user_id)
+        if revoked:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        user = cached_user(user_id) if revoked is False else None
+        if user is None:
+            user = super().get_user(validated_token)
+            if revoked is False:
+                cache_user(user)
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
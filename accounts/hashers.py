@@ -0,0 +1,122 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.utils.translation import gettext_lazy as _
+from redis.exceptions import RedisError
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Password hashing under load.
+#
+# Hashing is slow on purpose, and registration and login do it inside the
+# request, so a signup campaign turns into workers pinned on CPU. Two knobs:
+#
+# - TunedArgon2PasswordHasher takes its cost from settings (ARGON2_*). The
+#   defaults are OWASP's memory-hard minimum, which is far cheaper in CPU
+#   per login than Django's 1M-iteration PBKDF2 for comparable resistance to
+#   GPU cracking. Older hashes still verify and are upgraded on next login.
+# - PASSWORD_HASHING_CONCURRENCY caps how many requests hash at once across
+#   every worker sharing REDIS_URL. gunicorn's default sync workers serve
+#   one request per process, so the cap has to live outside the process: a
+#   Redis sorted set of slot holders, taken and given back by a Lua script.
+#   Holders expire after PASSWORD_HASHING_LEASE seconds, so a killed worker
+#   can't keep its slot. A request that can't get a slot within
+#   PASSWORD_HASHING_WAIT seconds gets a 503 with Retry-After instead of
+#   queueing behind the burst; if Redis is down, hashing isn't limited.
+#   Unset (the default), hashing isn't limited either.
+#
+# `manage.py benchmark_login` measures logins per second per core.
+SLOTS_KEY = 'auth:hashing_slots'
+ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+POLL_INTERVAL = 0.05  # seconds
+
+_acquire = None
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    algorithm = 'argon2'  # same hash format; only the cost differs
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'ARGON2_TIME_COST', 2)
+
+    @property
+    def memory_cost(self):
+        """KiB."""
+        return getattr(settings, 'ARGON2_MEMORY_COST', 19456)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'ARGON2_PARALLELISM', 1)
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many sign-ins at once, try again shortly.')
+    default_code = 'hashing_busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait  # DRF's exception handler sends it as Retry-After
+
+
+def acquire_script():
+    global _acquire
+    if _acquire is None:
+        _acquire = get_redis().register_script(ACQUIRE_SCRIPT)
+    return _acquire
+
+
+def _wait_for_slot(holder, limit, lease, wait):
+    deadline = time.monotonic() + wait
+    while True:
+        now = time.time()
+        if acquire_script()(keys=[SLOTS_KEY], args=[now - lease, limit, now, holder, int(lease) + 1]):
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HashingBusy(max(int(wait), 1))
+        time.sleep(min(POLL_INTERVAL, remaining))
+
+
+@contextmanager
+def hashing_slot():
+    """Hold one of the shared password hashing slots; HashingBusy if none frees up in time."""
+    limit = getattr(settings, 'PASSWORD_HASHING_CONCURRENCY', None)
+    if not limit:
+        yield
+        return
+    holder = uuid.uuid4().hex
+    try:
+        _wait_for_slot(
+            holder, limit,
+            getattr(settings, 'PASSWORD_HASHING_LEASE', 10),
+            getattr(settings, 'PASSWORD_HASHING_WAIT', 2),
+        )
+    except RedisError:
+        # the cap protects CPU; it isn't worth failing sign-ins over
+        logger.warning('Password hashing slots unavailable; hashing without a cap')
+        holder = None
+    try:
+        yield
+    finally:
+        if holder:
+            try:
+                get_redis().zrem(SLOTS_KEY, holder)
+            except RedisError:
+                logger.warning('Could not release a password hashing slot; it expires with its lease')
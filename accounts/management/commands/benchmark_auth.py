@@ -0,0 +1,56 @@
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from accounts.authentication import CachedJWTAuthentication, clear_cache
+from accounts.serializers import ClaimsTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark authentication overhead per request: simplejwt's "
+        "JWTAuthentication against CachedJWTAuthentication, and an anonymous "
+        "request through the configured authenticators. Uses a throwaway user "
+        "that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user('benchmark-auth', password=None, is_agent=True)
+            token = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+            factory = APIRequestFactory()
+            authenticated = factory.get('/api/accounts/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            anonymous = factory.get('/api/bookings/container/capacity/')
+
+            clear_cache()
+            self.report('JWTAuthentication', lambda: JWTAuthentication().authenticate(Request(authenticated)), options)
+            self.report('CachedJWTAuthentication', lambda: CachedJWTAuthentication().authenticate(Request(authenticated)), options)
+            authenticators = [cls() for cls in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+            self.report('Anonymous, all authenticators', lambda: Request(anonymous, authenticators=authenticators).user, options)
+            transaction.set_rollback(True)
+        clear_cache()
+
+    def report(self, label, authenticate, options):
+        count = max(options['requests'], 1)
+        timings = []
+        for _ in range(max(options['repeat'], 1)):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(count):
+                    authenticate()
+                timings.append(time.perf_counter() - start)
+        self.stdout.write(
+            f"{label}: median {statistics.median(timings) / count * 1e6:.1f} µs/request, "
+            f"{len(queries) / count:.3f} queries/request"
+        )
@@ -0,0 +1,61 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the password check that dominates a login's CPU time, for "
+        "each hasher: latency on one thread, then throughput on --workers "
+        "threads (both hashers release the GIL), reported per core."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=100, help='Password checks per hasher and run.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            '--hasher', action='append', dest='hashers',
+            help='Hasher to compare, by dotted path or by algorithm name from PASSWORD_HASHERS; '
+                 "repeatable. Defaults to PASSWORD_HASHERS[0] and Django's PBKDF2PasswordHasher.",
+        )
+
+    def handle(self, *args, **options):
+        paths = options['hashers'] or list(dict.fromkeys([
+            settings.PASSWORD_HASHERS[0], 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        ]))
+        logins = max(options['logins'], 1)
+        workers = max(options['workers'], 1)
+        cores = min(workers, os.cpu_count() or 1)
+        self.stdout.write(f"{logins} password checks per run, {workers} workers on {cores} cores")
+
+        for path in paths:
+            try:
+                hasher = import_string(path)() if '.' in path else get_hasher(path)
+                encoded = hasher.encode('benchmark-password', hasher.salt())
+            except (ImportError, ValueError) as exc:
+                raise CommandError(f"{path}: {exc}")
+
+            def verify(_):
+                return hasher.verify('benchmark-password', encoded)
+
+            start = time.perf_counter()
+            for i in range(logins):
+                verify(i)
+            latency = (time.perf_counter() - start) / logins
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                start = time.perf_counter()
+                verified = sum(pool.map(verify, range(logins)))
+                elapsed = time.perf_counter() - start
+            if verified != logins:
+                raise CommandError(f"{path}: {logins - verified} password checks failed")
+
+            self.stdout.write(
+                f"{hasher.algorithm} ({path}): {latency * 1000:.1f} ms/login on one thread, "
+                f"{logins / elapsed:.1f} logins/s on {workers} workers, "
+                f"{logins / elapsed / cores:.1f} logins/s per core"
+            )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from accounts.tokens import MIGRATED_KEY, blacklist_key
+from core.redis_client import get_redis
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy still-valid blacklisted refresh tokens from the token_blacklist "
+        "tables into Redis, then delete the tables' rows. Until this has run, "
+        "blacklist lookups fall back to the tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--keep-rows', action='store_true', help='Copy to Redis but leave the table rows.')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = max(options['batch_size'], 1)
+        live = (
+            BlacklistedToken.objects.filter(token__expires_at__gt=now)
+            .values_list('token__jti', 'token__expires_at')
+        )
+        copied = 0
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        for jti, expires_at in live.iterator(chunk_size=batch_size):
+            ttl = int((expires_at - now).total_seconds()) + 1
+            if not options['dry_run']:
+                pipe.set(blacklist_key(jti), 1, ex=ttl, nx=True)
+            copied += 1
+            if copied % batch_size == 0:
+                pipe.execute()
+        if not options['dry_run']:
+            # from here on lookups stop falling back to the table
+            pipe.set(MIGRATED_KEY, 1)
+        pipe.execute()
+        self.stdout.write(f"{'Would copy' if options['dry_run'] else 'Copied'} {copied} blacklisted tokens to Redis.")
+
+        if options['keep_rows']:
+            return
+        if options['dry_run']:
+            self.stdout.write(f"Would delete {OutstandingToken.objects.count()} outstanding token rows.")
+            return
+        deleted = 0
+        while ids := list(OutstandingToken.objects.order_by('id').values_list('id', flat=True)[:batch_size]):
+            # cascades to their BlacklistedToken rows
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} outstanding token rows."))
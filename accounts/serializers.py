@@ -1,5 +1,13 @@
+from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenBlacklistSerializer,
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from .hashers import hashing_slot
 from .models import User
+from .tokens import RefreshToken
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,12 +22,41 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ['username','email','password','first_name','last_name','is_agent']
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data.get('email'),
-            password=validated_data['password'],
+        # hash first, so the slot isn't held through the insert
+        with hashing_slot():
+            password = make_password(validated_data['password'])
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data.get('email')),
+            password=password,
             first_name=validated_data.get('first_name',''),
             last_name=validated_data.get('last_name',''),
             is_agent=validated_data.get('is_agent', False)
         )
+        user.save()
         return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login tokens that carry the user's role flags (copied into refreshed access tokens too)."""
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        # authenticate() hashes the password, even for unknown usernames
+        with hashing_slot():
+            return super().validate(attrs)
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['is_staff'] = user.is_staff
+        token['is_agent'] = user.is_agent
+        return token
+
+
+class RedisTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+class RedisTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = RefreshToken
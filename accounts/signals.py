@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import set_deleted, set_revoked
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # on commit: a rolled-back deactivation mustn't lock the user out
+        transaction.on_commit(lambda pk=instance.pk, revoked=not instance.is_active: set_revoked(pk, revoked))
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda pk=instance.pk: set_deleted(pk))
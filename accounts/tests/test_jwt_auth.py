@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
+from redis.exceptions import RedisError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import DELETED_USER_KEY, REVOKED_USERS_KEY, cache_ttl, clear_cache, is_revoked
+from core.redis_client import get_redis
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def user_cache():
+    def clear():
+        clear_cache()
+        r = get_redis()
+        # ids come round again in the next test's rolled-back database
+        keys = r.keys(DELETED_USER_KEY.format('*')) + [REVOKED_USERS_KEY]
+        r.delete(*keys)
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture
+def agent():
+    return User.objects.create_user('agent', 'agent@example.com', 'secret123', is_agent=True)
+
+
+def bearer(agent):
+    client = APIClient()
+    response = client.post(reverse('users-login'), {'username': 'agent', 'password': 'secret123'}, format='json')
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+    return client, response.json()
+
+
+def test_tokens_carry_role_claims(agent):
+    _, tokens = bearer(agent)
+    access = AccessToken(tokens['access'])
+    assert (access['is_agent'], access['is_staff']) == (True, False)
+
+    refreshed = APIClient().post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json')
+    assert AccessToken(refreshed.json()['access'])['is_agent'] is True
+
+
+def test_user_is_loaded_once_per_ttl(agent, django_assert_num_queries):
+    client, _ = bearer(agent)
+    with django_assert_num_queries(1):
+        assert client.get(reverse('users-me')).json()['username'] == 'agent'
+    with django_assert_num_queries(0):
+        assert client.get(reverse('users-me')).json()['is_agent'] is True
+
+
+def test_deactivation_applies_immediately(agent, django_capture_on_commit_callbacks):
+    client, _ = bearer(agent)
+    assert client.get(reverse('users-me')).status_code == 200
+
+    agent.is_active = False
+    with django_capture_on_commit_callbacks(execute=True):
+        agent.save()
+    assert client.get(reverse('users-me')).status_code == 403
+
+    agent.is_active = True
+    with django_capture_on_commit_callbacks(execute=True):
+        agent.save()
+    assert client.get(reverse('users-me')).status_code == 200
+
+
+def test_rolled_back_deactivation_is_not_revoked(agent, django_capture_on_commit_callbacks):
+    client, _ = bearer(agent)
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            agent.is_active = False
+            agent.save()
+            raise RuntimeError
+    assert not is_revoked(agent.pk)
+    assert client.get(reverse('users-me')).status_code == 200
+
+
+def test_deleted_users_are_revoked_only_while_cached(agent, django_capture_on_commit_callbacks):
+    client, _ = bearer(agent)
+    assert client.get(reverse('users-me')).status_code == 200
+    pk = agent.pk
+    with django_capture_on_commit_callbacks(execute=True):
+        agent.delete()
+    assert is_revoked(pk)
+    assert client.get(reverse('users-me')).status_code == 403
+    assert not get_redis().sismember(REVOKED_USERS_KEY, pk)
+    assert 0 < get_redis().ttl(DELETED_USER_KEY.format(pk)) <= cache_ttl() + 1
+
+
+def test_falls_back_to_the_database_without_redis(agent, django_assert_num_queries):
+    client, _ = bearer(agent)
+    with patch('accounts.authentication.get_redis', side_effect=RedisError):
+        for _ in range(2):
+            with django_assert_num_queries(1):
+                assert client.get(reverse('users-me')).status_code == 200
@@ -0,0 +1,97 @@
+import io
+import time
+import pytest
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.urls import reverse
+from redis.exceptions import RedisError
+from rest_framework.test import APIClient
+
+from accounts.hashers import SLOTS_KEY, hashing_slot
+from core.redis_client import get_redis
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+CREDENTIALS = {'username': 'esi', 'password': 'secret123'}
+
+
+@pytest.fixture(autouse=True)
+def slots():
+    get_redis().delete(SLOTS_KEY)
+    yield
+    get_redis().delete(SLOTS_KEY)
+
+
+def login(client=None):
+    return (client or APIClient()).post(reverse('users-login'), CREDENTIALS, format='json')
+
+
+def test_new_passwords_use_tuned_argon2(settings):
+    settings.ARGON2_MEMORY_COST = 8192
+    response = APIClient().post(reverse('users-register'), {**CREDENTIALS, 'email': 'esi@example.com'}, format='json')
+    assert response.status_code == 201
+    assert User.objects.get(username='esi').password.startswith('argon2$argon2id$v=19$m=8192,t=2,p=1$')
+
+
+def test_pbkdf2_hashes_are_upgraded_on_login():
+    user = User.objects.create_user('esi')
+    user.password = make_password('secret123', hasher='pbkdf2_sha256')
+    user.save()
+
+    assert login().status_code == 200
+    user.refresh_from_db()
+    assert user.password.startswith('argon2$')
+    assert login().status_code == 200
+
+
+def test_busy_hashing_slots_turn_requests_away(settings):
+    settings.PASSWORD_HASHING_CONCURRENCY = 1
+    settings.PASSWORD_HASHING_WAIT = 0.01
+    User.objects.create_user(CREDENTIALS['username'], password=CREDENTIALS['password'])
+
+    with hashing_slot():
+        response = login()
+        assert response.status_code == 503
+        assert response.json()['detail'].startswith('Too many sign-ins')
+        assert response['Retry-After'] == '1'
+        busy = APIClient().post(reverse('users-register'), {'username': 'kwame', 'password': 'secret123'}, format='json')
+        assert busy.status_code == 503
+    assert not User.objects.filter(username='kwame').exists()
+
+    # the slot is released after each request
+    assert login().status_code == 200
+    assert login().status_code == 200
+    assert get_redis().zcard(SLOTS_KEY) == 0
+
+
+def test_slots_are_shared_between_workers(settings):
+    settings.PASSWORD_HASHING_CONCURRENCY = 2
+    settings.PASSWORD_HASHING_WAIT = 0.01
+    User.objects.create_user(CREDENTIALS['username'], password=CREDENTIALS['password'])
+    # two other gunicorn workers hashing right now
+    get_redis().zadd(SLOTS_KEY, {'worker-1': time.time(), 'worker-2': time.time()})
+    assert login().status_code == 503
+
+    # a worker killed mid-hash loses its slot once the lease runs out
+    get_redis().zadd(SLOTS_KEY, {'worker-1': time.time() - settings.PASSWORD_HASHING_LEASE - 1})
+    assert login().status_code == 200
+    assert set(get_redis().zrange(SLOTS_KEY, 0, -1)) == {b'worker-2'}
+
+
+def test_hashing_is_not_capped_without_redis(settings):
+    settings.PASSWORD_HASHING_CONCURRENCY = 1
+    User.objects.create_user(CREDENTIALS['username'], password=CREDENTIALS['password'])
+    with patch('accounts.hashers.acquire_script', side_effect=RedisError):
+        assert login().status_code == 200
+
+
+def test_benchmark_login():
+    out = io.StringIO()
+    hashers = ['argon2', 'django.contrib.auth.hashers.MD5PasswordHasher']
+    call_command('benchmark_login', logins=2, workers=2, hasher=hashers, stdout=out)
+    lines = out.getvalue().splitlines()
+    assert lines[1].startswith('argon2 (argon2): ')
+    assert 'logins/s per core' in lines[2]
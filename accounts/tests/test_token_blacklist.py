@@ -0,0 +1,114 @@
+import io
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from rest_framework_simplejwt.exceptions import TokenError
+
+from accounts.tokens import MIGRATED_KEY, RefreshToken, blacklist_key, is_blacklisted
+from core.redis_client import get_redis
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def blacklist():
+    def clear():
+        r = get_redis()
+        keys = r.keys(blacklist_key('*'))
+        if keys:
+            r.delete(*keys)
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user('ama', 'ama@example.com', 'secret123')
+
+
+def login(client):
+    response = client.post(reverse('token_obtain_pair'), {'username': 'ama', 'password': 'secret123'}, format='json')
+    return response.json()
+
+
+def test_rotation_blacklists_in_redis(user):
+    client = APIClient()
+    tokens = login(client)
+
+    response = client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json')
+    assert response.status_code == 200
+    rotated = response.json()['refresh']
+    assert client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json').status_code == 401
+    assert client.post(reverse('token_refresh'), {'refresh': rotated}, format='json').status_code == 200
+
+    # nothing written to the token_blacklist tables
+    assert not OutstandingToken.objects.exists()
+    # kept only until the token would have expired anyway
+    old_jti = RefreshToken(tokens['refresh'], verify=False)['jti']
+    assert 0 < get_redis().ttl(blacklist_key(old_jti)) <= timedelta(days=7).total_seconds() + 1
+
+
+def test_token_is_swapped_only_once(user):
+    refresh = login(APIClient())['refresh']
+    # two concurrent refreshes, both past the blacklist check
+    first, second = RefreshToken(refresh), RefreshToken(refresh)
+    assert first.blacklist()
+    with pytest.raises(TokenError):
+        second.blacklist()
+
+
+def test_table_blacklist_applies_until_migrated(user):
+    refresh = login(APIClient())['refresh']
+    token = RefreshToken(refresh, verify=False)
+    outstanding = OutstandingToken.objects.create(
+        user=user, jti=token['jti'], token=refresh, expires_at=timezone.now() + timedelta(days=1),
+    )
+    BlacklistedToken.objects.create(token=outstanding)
+
+    assert is_blacklisted(token['jti'])
+    assert APIClient().post(reverse('token_refresh'), {'refresh': refresh}, format='json').status_code == 401
+
+    call_command('migrate_token_blacklist', stdout=io.StringIO())
+    assert get_redis().exists(MIGRATED_KEY)
+    assert not BlacklistedToken.objects.exists()
+    assert APIClient().post(reverse('token_refresh'), {'refresh': refresh}, format='json').status_code == 401
+
+
+def test_logout(user):
+    client = APIClient()
+    tokens = login(client)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+    assert client.post(reverse('users-logout'), {'refresh': tokens['refresh']}, format='json').status_code == 204
+    assert is_blacklisted(RefreshToken(tokens['refresh'], verify=False)['jti'])
+    assert client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json').status_code == 401
+    assert client.post(reverse('users-logout'), {'refresh': 'garbage'}, format='json').status_code == 400
+
+
+def test_migrate_token_blacklist(user):
+    now = timezone.now()
+    live, expired = (
+        OutstandingToken.objects.create(
+            user=user, jti=jti, token='x', created_at=now - timedelta(days=1), expires_at=now + offset,
+        )
+        for jti, offset in (('live', timedelta(days=2)), ('expired', -timedelta(hours=1)))
+    )
+    for token in (live, expired):
+        BlacklistedToken.objects.create(token=token)
+    OutstandingToken.objects.create(user=user, jti='unused', token='x', expires_at=now + timedelta(days=1))
+
+    call_command('migrate_token_blacklist', batch_size=2, stdout=io.StringIO())
+
+    assert is_blacklisted('live')
+    assert not is_blacklisted('expired')
+    assert 0 < get_redis().ttl(blacklist_key('live')) <= timedelta(days=2).total_seconds() + 1
+    assert not OutstandingToken.objects.exists()
+    assert not BlacklistedToken.objects.exists()
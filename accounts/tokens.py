@@ -0,0 +1,81 @@
+import time
+from django.utils.translation import gettext_lazy as _
+from redis.exceptions import RedisError
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from core.redis_client import get_redis
+
+# Refresh-token blacklist in Redis.
+#
+# simplejwt's token_blacklist app records every issued refresh token in
+# OutstandingToken and every revoked one in BlacklistedToken; the tables
+# only ever grow and each refresh queries them. A revoked token only needs
+# remembering until it would have expired anyway, so here it is one Redis
+# key per jti with a TTL of the token's remaining lifetime, and issued
+# tokens aren't recorded at all. `manage.py migrate_token_blacklist` moves
+# the existing rows over; until it has, lookups fall back to the old
+# BlacklistedToken table so nothing revoked there is accepted again.
+BLACKLIST_KEY = 'auth:blacklist:{}'
+MIGRATED_KEY = 'auth:blacklist:migrated'
+
+
+def blacklist_key(jti):
+    return BLACKLIST_KEY.format(jti)
+
+
+def blacklist_jti(jti, exp):
+    """Blacklist ``jti`` until ``exp`` (epoch seconds); False if it already was or has expired."""
+    ttl = int(exp - time.time()) + 1
+    if ttl <= 1:
+        return False
+    return bool(get_redis().set(blacklist_key(jti), 1, ex=ttl, nx=True))
+
+
+def is_blacklisted(jti):
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.exists(blacklist_key(jti))
+    pipe.exists(MIGRATED_KEY)
+    blacklisted, migrated = pipe.execute()
+    if blacklisted:
+        return True
+    if not migrated:
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+    return False
+
+
+class RefreshToken(tokens.RefreshToken):
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        tokens.Token.verify(self, *args, **kwargs)
+
+    def check_blacklist(self):
+        try:
+            blacklisted = is_blacklisted(self.payload[api_settings.JTI_CLAIM])
+        except RedisError:
+            # can't tell whether it was revoked: refuse rather than accept
+            raise TokenError(_('Token could not be checked, try again'))
+        if blacklisted:
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        try:
+            blacklisted = blacklist_jti(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        except RedisError:
+            raise TokenError(_('Token could not be blacklisted, try again'))
+        if not blacklisted:
+            # a concurrent refresh or logout got there first: only one of
+            # them may swap this token for new ones
+            raise TokenError(_('Token is blacklisted'))
+        return True
+
+    def outstand(self):
+        # issued tokens aren't tracked; only revocations are
+        return None
+
+    @classmethod
+    def for_user(cls, user):
+        # skip BlacklistMixin.for_user, which inserts an OutstandingToken row
+        return super(tokens.BlacklistMixin, cls).for_user(user)
@@ -2,10 +2,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import User
-from .serializers import UserSerializer, RegisterSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from .serializers import ClaimsTokenObtainPairSerializer, UserSerializer, RegisterSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import TokenError
+from .tokens import RefreshToken
 
 class UserViewSet(viewsets.GenericViewSet):
     queryset = User.objects.all()
@@ -28,13 +29,15 @@ class UserViewSet(viewsets.GenericViewSet):
 
     @action(detail=False, methods=['post'], permission_classes=[AllowAny])
     def login(self, request):
-        serializer = TokenObtainPairSerializer(data=request.data)
+        serializer = ClaimsTokenObtainPairSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         return Response(serializer.validated_data)
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def logout(self, request):
         refresh_token = request.data.get('refresh')
-        token = RefreshToken(refresh_token)
-        token.blacklist()
+        try:
+            RefreshToken(refresh_token).blacklist()
+        except TokenError as exc:
+            raise ValidationError({'refresh': str(exc)})
         return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
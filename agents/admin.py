@@ -1,7 +1,9 @@
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 from django.contrib import admin
-from .models import AgentApplication
+from django.utils import timezone
+from django.utils.html import format_html
+from .models import AgentApplication, ApplicationDocument, DocumentUpload
 
 class AgentApplicationResource(resources.ModelResource):
     class Meta:
@@ -9,9 +11,36 @@ class AgentApplicationResource(resources.ModelResource):
         fields = ('id', 'name', 'email', 'phone', 'company', 'status', 
                  'submitted_at', 'reviewed_at')
 
+class ApplicationDocumentInline(admin.TabularInline):
+    # small previews from the processing pipeline instead of the originals
+    model = ApplicationDocument
+    extra = 0
+    can_delete = False
+    fields = ('kind', 'preview_display', 'state', 'content_type', 'size', 'duplicates_display', 'error')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Preview')
+    def preview_display(self, obj):
+        if not obj.thumbnail:
+            return '-'
+        return format_html(
+            '<a href="{}" target="_blank"><img src="{}" style="max-height:128px"></a>',
+            obj.preview.url, obj.thumbnail.url,
+        )
+
+    @admin.display(description='Also on')
+    def duplicates_display(self, obj):
+        applications = obj.duplicates().values_list('application_id', flat=True)
+        return ', '.join(str(application_id) for application_id in applications) or '-'
+
+
 @admin.register(AgentApplication)
 class AgentApplicationAdmin(ImportExportModelAdmin):
     resource_class = AgentApplicationResource
+    inlines = (ApplicationDocumentInline,)
     list_display = (
         'name', 'email', 'phone', 'company',
         'status', 'submitted_at', 'reviewed_at'
@@ -40,3 +69,11 @@ class AgentApplicationAdmin(ImportExportModelAdmin):
             obj.reviewed_at = timezone.now()
             obj.reviewed_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(DocumentUpload)
+class DocumentUploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'state', 'received', 'size', 'created_at', 'completed_at')
+    list_filter = ('state',)
+    search_fields = ('id', 'filename')
+    readonly_fields = ('filename', 'size', 'sha256', 'received', 'state', 'file', 'created_at', 'completed_at')
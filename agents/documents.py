@@ -0,0 +1,179 @@
+import hashlib
+import io
+import zipfile
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import AgentApplication, ApplicationDocument
+
+# Agent document processing, run by agents.tasks.process_document after
+# an application's files change: sniff the real type from the first bytes
+# (the extension is whatever the applicant typed), hash the content so the
+# same file turning up on several applications is visible, and render a
+# thumbnail and a review-size preview of images and a PDF's first page so
+# the admin loads a few tens of KB instead of the scanned original.
+DOCUMENT_FIELDS = [kind for kind, _ in ApplicationDocument.KIND_CHOICES]
+THUMBNAIL_PX = 256
+PREVIEW_PX = 1280
+JPEG_QUALITY = 80
+
+PDF = 'application/pdf'
+JPEG = 'image/jpeg'
+PNG = 'image/png'
+DOC = 'application/msword'
+DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+EXTENSION_TYPES = {'pdf': PDF, 'jpg': JPEG, 'jpeg': JPEG, 'png': PNG, 'doc': DOC, 'docx': DOCX}
+MAGIC = [
+    (b'%PDF-', PDF),
+    (b'\xff\xd8\xff', JPEG),
+    (b'\x89PNG\r\n\x1a\n', PNG),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', DOC),  # OLE2 compound file
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+
+class InvalidDocument(Exception):
+    pass
+
+
+def allowed_types(kind):
+    """Content types the model field's extension whitelist stands for."""
+    field = AgentApplication._meta.get_field(kind)
+    extensions = set()
+    for validator in field.validators:
+        extensions.update(getattr(validator, 'allowed_extensions', None) or [])
+    return {EXTENSION_TYPES[ext] for ext in extensions if ext in EXTENSION_TYPES}
+
+
+def sniff(fh):
+    """Content type of an open binary file from its magic bytes, or None."""
+    fh.seek(0)
+    head = fh.read(16)
+    content_type = next((kind for magic, kind in MAGIC if head.startswith(magic)), None)
+    if content_type == 'application/zip':
+        # .docx is a zip with a Word part; anything else zipped is not a document
+        fh.seek(0)
+        try:
+            with zipfile.ZipFile(fh) as archive:
+                content_type = DOCX if 'word/document.xml' in archive.namelist() else content_type
+        except zipfile.BadZipFile:
+            content_type = None
+    fh.seek(0)
+    return content_type
+
+
+def content_hash(fh):
+    fh.seek(0)
+    digest, size = hashlib.sha256(), 0
+    for block in iter(lambda: fh.read(64 * 1024), b''):
+        digest.update(block)
+        size += len(block)
+    fh.seek(0)
+    return digest.hexdigest(), size
+
+
+def _jpeg(image, px):
+    copy = image.copy()
+    copy.thumbnail((px, px), Image.LANCZOS)
+    buffer = io.BytesIO()
+    copy.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def render_image(fh):
+    with Image.open(fh) as image:
+        # JPEG can decode straight at a fraction of full size
+        image.draft('RGB', (PREVIEW_PX, PREVIEW_PX))
+        image = ImageOps.exif_transpose(image)
+        return image.convert('RGB')
+
+
+def render_pdf_page(fh):
+    # pdfium is a native library; only load it in workers that render PDFs
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(fh)
+    try:
+        if not len(pdf):
+            raise InvalidDocument('PDF has no pages.')
+        page = pdf[0]
+        width, height = page.get_size()
+        scale = PREVIEW_PX / max(width, height)
+        return page.render(scale=scale).to_pil().convert('RGB')
+    except pdfium.PdfiumError as exc:
+        raise InvalidDocument(f'Unreadable PDF: {exc}')
+    finally:
+        pdf.close()
+
+
+def delete_previews(document):
+    for field in ('thumbnail', 'preview'):
+        if getattr(document, field):
+            getattr(document, field).delete(save=False)
+
+
+def _save_previews(document, image):
+    delete_previews(document)
+    for field, px in (('thumbnail', THUMBNAIL_PX), ('preview', PREVIEW_PX)):
+        getattr(document, field).save(
+            f'{document.application_id}/{document.kind}-{field}.jpg', ContentFile(_jpeg(image, px)), save=False
+        )
+
+
+def process(document):
+    """Validate, hash and render previews for ``document``; saves it."""
+    document.error = ''
+    try:
+        storage = AgentApplication._meta.get_field(document.kind).storage
+        with storage.open(document.source, 'rb') as fh:
+            document.sha256, document.size = content_hash(fh)
+            document.content_type = sniff(fh) or ''
+            if document.content_type not in allowed_types(document.kind):
+                raise InvalidDocument(
+                    f"Content is {document.content_type or 'of an unknown type'}, "
+                    f"not one of the accepted {document.get_kind_display()} formats."
+                )
+            image = None
+            if document.content_type == PDF:
+                image = render_pdf_page(fh)
+            elif document.content_type in (JPEG, PNG):
+                try:
+                    image = render_image(fh)
+                except (OSError, Image.DecompressionBombError) as exc:
+                    raise InvalidDocument(f'Unreadable image: {exc}')
+        if image is not None:
+            _save_previews(document, image)
+        document.state = 'ready'
+    except InvalidDocument as exc:
+        document.state, document.error = 'invalid', str(exc)
+    document.processed_at = timezone.now()
+    document.save()
+    return document
+
+
+def sync_documents(application):
+    """
+    Pending ApplicationDocument rows for files of ``application`` that
+    haven't been processed in their current version; stale rows for
+    removed files are dropped. Returns the ids to process.
+    """
+    existing = {document.kind: document for document in application.documents.all()}
+    pending = []
+    for kind in DOCUMENT_FIELDS:
+        name = getattr(application, kind).name
+        document = existing.get(kind)
+        if not name:
+            if document:
+                delete_previews(document)
+                document.delete()
+            continue
+        if document and document.source == name:
+            continue
+        if document:
+            document.source, document.state = name, 'pending'
+            document.save(update_fields=['source', 'state'])
+        else:
+            document = ApplicationDocument.objects.create(application=application, kind=kind, source=name)
+        pending.append(document.pk)
+    return pending
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:51
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0002_alter_agentapplication_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Declared total size in bytes')),
+                ('sha256', models.CharField(blank=True, help_text='Optional hex digest from the client, checked on completion', max_length=64)),
+                ('received', models.PositiveBigIntegerField(default=0, help_text='Bytes stored so far; the offset to resume from')),
+                ('state', models.CharField(choices=[('uploading', 'Uploading'), ('assembling', 'Assembling'), ('complete', 'Complete'), ('attached', 'Attached')], default='uploading', max_length=20)),
+                ('file', models.FileField(blank=True, max_length=255, upload_to='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.PositiveBigIntegerField()),
+                ('size', models.PositiveIntegerField()),
+                ('path', models.CharField(max_length=255)),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='agents.documentupload')),
+            ],
+            options={
+                'ordering': ['offset'],
+                'constraints': [models.UniqueConstraint(fields=('upload', 'offset'), name='unique_upload_chunk_offset')],
+            },
+        ),
+    ]
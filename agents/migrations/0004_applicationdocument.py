@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0003_documentupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('id_document', 'ID document'), ('business_license', 'Business license'), ('resume', 'Resume/CV')], max_length=20)),
+                ('source', models.CharField(help_text='Storage name of the file processed', max_length=255)),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('invalid', 'Invalid'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('content_type', models.CharField(blank=True, help_text='Detected from magic bytes', max_length=100)),
+                ('size', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('sha256', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('thumbnail', models.FileField(blank=True, max_length=255, upload_to='agent_documents/previews/')),
+                ('preview', models.FileField(blank=True, max_length=255, upload_to='agent_documents/previews/')),
+                ('error', models.TextField(blank=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='agents.agentapplication')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('application', 'kind'), name='unique_application_document_kind')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:59
+
+import core.storage
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agents', '0004_applicationdocument'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agentapplication',
+            name='business_license',
+            field=models.FileField(blank=True, help_text='Business license or registration (PDF, JPG, JPEG, PNG)', null=True, storage=core.storage.blob_storage, upload_to='agent_documents/license/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'jpg', 'jpeg', 'png'])]),
+        ),
+        migrations.AlterField(
+            model_name='agentapplication',
+            name='id_document',
+            field=models.FileField(blank=True, help_text='Valid ID document (PDF, JPG, JPEG, PNG)', null=True, storage=core.storage.blob_storage, upload_to='agent_documents/id/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'jpg', 'jpeg', 'png'])]),
+        ),
+        migrations.AlterField(
+            model_name='agentapplication',
+            name='resume',
+            field=models.FileField(blank=True, help_text='Resume or CV (PDF, DOC, DOCX)', null=True, storage=core.storage.blob_storage, upload_to='agent_documents/resume/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx'])]),
+        ),
+        migrations.AlterField(
+            model_name='applicationdocument',
+            name='preview',
+            field=models.FileField(blank=True, max_length=255, storage=core.storage.blob_storage, upload_to='agent_documents/previews/'),
+        ),
+        migrations.AlterField(
+            model_name='applicationdocument',
+            name='thumbnail',
+            field=models.FileField(blank=True, max_length=255, storage=core.storage.blob_storage, upload_to='agent_documents/previews/'),
+        ),
+        migrations.AlterField(
+            model_name='documentupload',
+            name='file',
+            field=models.FileField(blank=True, max_length=255, storage=core.storage.blob_storage, upload_to=''),
+        ),
+    ]
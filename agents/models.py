@@ -3,6 +3,9 @@ from django.core.validators import FileExtensionValidator
 from django.conf import settings
 import uuid
 
+from core.storage import blob_storage
+
+
 class AgentApplication(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending Review'),
@@ -21,6 +24,7 @@ class AgentApplication(models.Model):
     # Document fields - made nullable for existing records
     id_document = models.FileField(
         upload_to='agent_documents/id/',
+        storage=blob_storage,
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'jpg', 'jpeg', 'png'])],
         help_text='Valid ID document (PDF, JPG, JPEG, PNG)',
         null=True,  # Added for existing records
@@ -28,6 +32,7 @@ class AgentApplication(models.Model):
     )
     business_license = models.FileField(
         upload_to='agent_documents/license/',
+        storage=blob_storage,
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'jpg', 'jpeg', 'png'])],
         help_text='Business license or registration (PDF, JPG, JPEG, PNG)',
         null=True,
@@ -35,6 +40,7 @@ class AgentApplication(models.Model):
     )
     resume = models.FileField(
         upload_to='agent_documents/resume/',
+        storage=blob_storage,
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx'])],
         help_text='Resume or CV (PDF, DOC, DOCX)',
         null=True,  # Added for existing records
@@ -57,9 +63,22 @@ class AgentApplication(models.Model):
         related_name='reviewed_applications'
     )
     admin_notes = models.TextField(blank=True)
+    # review-queue lease: the reviewer working on it, until when
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='claimed_applications'
+    )
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            # the review queue: one status, oldest first, keyset-paginated
+            models.Index(fields=['status', 'submitted_at', 'id']),
+        ]
 
     def __str__(self):
         return f'{self.name} ({self.email}) - {self.get_status_display()}'
@@ -72,3 +91,96 @@ class AgentApplication(models.Model):
                 raise ValidationError({'id_document': 'ID document is required for new applications.'})
             if not self.resume:
                 raise ValidationError({'resume': 'Resume/CV is required for new applications.'})
+
+
+class DocumentUpload(models.Model):
+    """
+    A resumable upload session for one applicant document. The bytes
+    arrive as ordered UploadChunks; completing the session joins them into
+    ``file``, which an AgentApplication can then reference by id.
+    """
+    STATE_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('assembling', 'Assembling'),
+        ('complete', 'Complete'),
+        ('attached', 'Attached'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text='Declared total size in bytes')
+    sha256 = models.CharField(
+        max_length=64, blank=True,
+        help_text='Optional hex digest from the client, checked on completion'
+    )
+    received = models.PositiveBigIntegerField(default=0, help_text='Bytes stored so far; the offset to resume from')
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='uploading')
+    file = models.FileField(max_length=255, blank=True, storage=blob_storage)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.filename} ({self.received}/{self.size} bytes, {self.state})'
+
+
+class UploadChunk(models.Model):
+    upload = models.ForeignKey(DocumentUpload, on_delete=models.CASCADE, related_name='chunks')
+    offset = models.PositiveBigIntegerField()
+    size = models.PositiveIntegerField()
+    path = models.CharField(max_length=255)
+
+    class Meta:
+        ordering = ['offset']
+        constraints = [
+            # the arbiter when the same range is PUT twice concurrently
+            models.UniqueConstraint(fields=['upload', 'offset'], name='unique_upload_chunk_offset'),
+        ]
+
+
+class ApplicationDocument(models.Model):
+    """
+    Background-processing results for one document of an application:
+    the type sniffed from its content, a content hash and small previews
+    for the review screen. Rebuilt whenever the document file changes.
+    """
+    KIND_CHOICES = [
+        ('id_document', 'ID document'),
+        ('business_license', 'Business license'),
+        ('resume', 'Resume/CV'),
+    ]
+    STATE_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('invalid', 'Invalid'),
+        ('failed', 'Failed'),
+    ]
+
+    application = models.ForeignKey(AgentApplication, on_delete=models.CASCADE, related_name='documents')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    source = models.CharField(max_length=255, help_text='Storage name of the file processed')
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='pending')
+    content_type = models.CharField(max_length=100, blank=True, help_text='Detected from magic bytes')
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    thumbnail = models.FileField(
+        upload_to='agent_documents/previews/', max_length=255, blank=True, storage=blob_storage
+    )
+    preview = models.FileField(
+        upload_to='agent_documents/previews/', max_length=255, blank=True, storage=blob_storage
+    )
+    error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['application', 'kind'], name='unique_application_document_kind'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} of {self.application_id} ({self.state})'
+
+    def duplicates(self):
+        """The same file submitted as a document of other applications."""
+        if not self.sha256:
+            return ApplicationDocument.objects.none()
+        return ApplicationDocument.objects.filter(sha256=self.sha256).exclude(application_id=self.application_id)
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AgentApplication
+
+# Review queue for agent applications.
+#
+# Reviewers claim the oldest open applications for a short lease, so two
+# people never work the same one; an abandoned claim lapses by itself.
+# Claiming locks candidate rows with SKIP LOCKED (where the database has
+# it) and the UPDATE re-checks that each row is still unclaimed, so
+# concurrent claims split the queue between them. Decisions are a single
+# conditional UPDATE however many applications they cover.
+OPEN_STATUSES = ('pending', 'under_review')
+CLAIM_LEASE = timedelta(minutes=15)
+MAX_CLAIM = 50
+MAX_BULK = 1000
+
+
+def available_to(user, now=None):
+    """Not leased to anyone else right now."""
+    now = now or timezone.now()
+    return Q(claimed_by__isnull=True) | Q(claim_expires_at__lte=now) | Q(claimed_by=user)
+
+
+def queue(status='pending', user=None):
+    applications = AgentApplication.objects.filter(status=status)
+    if user is not None:
+        applications = applications.filter(available_to(user))
+    return applications
+
+
+def claim_next(user, count=10):
+    """Lease up to ``count`` of the oldest open applications to ``user``."""
+    now = timezone.now()
+    count = max(1, min(count, MAX_CLAIM))
+    with transaction.atomic():
+        candidates = list(
+            AgentApplication.objects.select_for_update(skip_locked=True)
+            .filter(status__in=OPEN_STATUSES)
+            .filter(Q(claimed_by__isnull=True) | Q(claim_expires_at__lte=now))
+            .order_by('submitted_at', 'id')
+            .values_list('id', flat=True)[:count]
+        )
+        expires = now + CLAIM_LEASE
+        AgentApplication.objects.filter(pk__in=candidates).filter(available_to(user, now)).update(
+            claimed_by=user, claim_expires_at=expires
+        )
+    return AgentApplication.objects.filter(
+        pk__in=candidates, claimed_by=user, claim_expires_at=expires
+    ).order_by('submitted_at', 'id')
+
+
+def release(user, ids):
+    """Give back ``user``'s claims on ``ids``; returns how many were released."""
+    return AgentApplication.objects.filter(pk__in=ids, claimed_by=user).update(
+        claimed_by=None, claim_expires_at=None
+    )
+
+
+def decide(user, ids, status, notes=''):
+    """
+    Set ``status`` on the open applications in ``ids`` that aren't leased
+    to another reviewer, in one UPDATE. Returns the ids that were changed.
+    """
+    now = timezone.now()
+    ids = list(ids)[:MAX_BULK]
+    updated = (
+        AgentApplication.objects.filter(pk__in=ids, status__in=OPEN_STATUSES)
+        .filter(available_to(user, now))
+        .update(
+            status=status,
+            reviewed_at=now,
+            reviewed_by=user,
+            admin_notes=notes,
+            claimed_by=None,
+            claim_expires_at=None,
+        )
+    )
+    if not updated:
+        return []
+    # this decision's rows are the ones stamped with its exact time
+    return list(
+        AgentApplication.objects.filter(pk__in=ids, reviewed_by=user, reviewed_at=now)
+        .order_by('id').values_list('id', flat=True)
+    )
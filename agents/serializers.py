@@ -1,14 +1,52 @@
+from django.core.exceptions import SuspiciousFileOperation, ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils.text import get_valid_filename
 from rest_framework import serializers
-from .models import AgentApplication
+from .models import AgentApplication, ApplicationDocument, DocumentUpload
+from .review import MAX_BULK
+from .uploads import MAX_UPLOAD_BYTES
+
+DOCUMENT_FIELDS = ('id_document', 'business_license', 'resume')
+
+
+class DocumentUploadSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(min_value=1, max_value=MAX_UPLOAD_BYTES)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+
+    class Meta:
+        model = DocumentUpload
+        fields = ['id', 'filename', 'size', 'sha256', 'received', 'state', 'created_at', 'completed_at']
+        read_only_fields = ['id', 'received', 'state', 'created_at', 'completed_at']
+
+    def validate_filename(self, value):
+        try:
+            return get_valid_filename(value.replace('\\', '/').rsplit('/', 1)[-1])
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError('Invalid file name.')
+
+    def validate_sha256(self, value):
+        return value.lower()
+
 
 class AgentApplicationSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    # ids of completed resumable uploads, instead of multipart files
+    id_document_upload = serializers.PrimaryKeyRelatedField(
+        queryset=DocumentUpload.objects.all(), write_only=True, required=False
+    )
+    business_license_upload = serializers.PrimaryKeyRelatedField(
+        queryset=DocumentUpload.objects.all(), write_only=True, required=False
+    )
+    resume_upload = serializers.PrimaryKeyRelatedField(
+        queryset=DocumentUpload.objects.all(), write_only=True, required=False
+    )
 
     class Meta:
         model = AgentApplication
         fields = [
             'id', 'name', 'email', 'phone', 'company', 'experience',
             'id_document', 'business_license', 'resume',
+            'id_document_upload', 'business_license_upload', 'resume_upload',
             'status', 'status_display', 'submitted_at',
             'reviewed_at', 'reviewed_by', 'admin_notes'
         ]
@@ -18,14 +56,69 @@ class AgentApplicationSerializer(serializers.ModelSerializer):
         ]
 
     def validate(self, data):
+        for field in DOCUMENT_FIELDS:
+            upload = data.get(f'{field}_upload')
+            if upload is None:
+                continue
+            if upload.state != 'complete':
+                raise serializers.ValidationError({f'{field}_upload': 'Upload is not complete or already used.'})
+            try:
+                for validator in AgentApplication._meta.get_field(field).validators:
+                    validator(upload.file)
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError({f'{field}_upload': exc.messages})
+
         # Ensure required documents are provided
         if self.context['request'].method == 'POST':
-            if not data.get('id_document'):
+            if not data.get('id_document') and not data.get('id_document_upload'):
                 raise serializers.ValidationError({'id_document': 'This document is required.'})
-            if not data.get('resume'):
+            if not data.get('resume') and not data.get('resume_upload'):
                 raise serializers.ValidationError({'resume': 'Resume/CV is required.'})
         return data
 
+    @transaction.atomic
+    def save(self, **kwargs):
+        uploads = {
+            field: self.validated_data.pop(f'{field}_upload')
+            for field in DOCUMENT_FIELDS if f'{field}_upload' in self.validated_data
+        }
+        for field, upload in uploads.items():
+            # each upload backs exactly one application
+            if not DocumentUpload.objects.filter(pk=upload.pk, state='complete').update(state='attached'):
+                raise serializers.ValidationError({f'{field}_upload': 'Upload is not complete or already used.'})
+            kwargs[field] = upload.file.name
+            # the application now points at the upload's blob too
+            upload.file.storage.reference(upload.file.name)
+        return super().save(**kwargs)
+
+
+class ApplicationDocumentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ApplicationDocument
+        fields = ['kind', 'state', 'content_type', 'size', 'sha256', 'thumbnail', 'preview', 'error', 'processed_at']
+        read_only_fields = fields
+
+
 class AdminAgentApplicationSerializer(AgentApplicationSerializer):
+    documents = ApplicationDocumentSerializer(many=True, read_only=True)
+
     class Meta(AgentApplicationSerializer.Meta):
+        fields = AgentApplicationSerializer.Meta.fields + ['documents']
         read_only_fields = ['id', 'submitted_at']
+
+
+class ReviewQueueSerializer(serializers.ModelSerializer):
+    documents = ApplicationDocumentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = AgentApplication
+        fields = [
+            'id', 'name', 'email', 'company', 'status', 'submitted_at',
+            'claimed_by', 'claim_expires_at', 'documents'
+        ]
+        read_only_fields = fields
+
+
+class ReviewDecisionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=MAX_BULK)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .documents import sync_documents
+from .models import AgentApplication
+from .tasks import process_document
+
+
+@receiver(post_save, sender=AgentApplication)
+def queue_document_processing(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for document_id in sync_documents(instance):
+        transaction.on_commit(lambda pk=document_id: process_document.delay(pk))
@@ -0,0 +1,34 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from .documents import process
+from .models import ApplicationDocument
+from .uploads import expire_uploads
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def process_document(self, document_id):
+    """Type-check, hash and render previews for one application document."""
+    document = ApplicationDocument.objects.filter(pk=document_id).first()
+    if document is None:
+        return None
+    try:
+        document = process(document)
+    except Exception as exc:
+        logger.exception(f"Processing {document} failed")
+        ApplicationDocument.objects.filter(pk=document_id).update(state='failed', error=str(exc))
+        raise self.retry(exc=exc)
+    if document.state == 'invalid':
+        logger.warning(f"{document}: {document.error}")
+    return document.state
+
+
+@shared_task
+def expire_document_uploads():
+    """Delete abandoned upload sessions and completed uploads nothing attached."""
+    sessions, uploads = expire_uploads()
+    if sessions or uploads:
+        logger.info(f"Expired {sessions} upload sessions and {uploads} unused uploads")
+    return sessions, uploads
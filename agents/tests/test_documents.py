@@ -0,0 +1,131 @@
+import io
+import zipfile
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from PIL import Image
+from rest_framework.test import APIClient
+
+from agents.documents import DOCX, sniff
+from agents.models import AgentApplication, ApplicationDocument
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def jpeg_bytes(size=(2400, 1600)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('RGB', (300, 300), (0, 0, 255)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def pdf_bytes():
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdf.drawString(100, 750, 'Curriculum vitae')
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def docx_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('word/document.xml', '<document/>')
+    return buffer.getvalue()
+
+
+def apply(django_capture_on_commit_callbacks, id_document, resume, email='jane@doe.com'):
+    with django_capture_on_commit_callbacks(execute=True):
+        return AgentApplication.objects.create(
+            name='Jane Doe', email=email, phone='0551234567',
+            id_document=SimpleUploadedFile(*id_document),
+            resume=SimpleUploadedFile(*resume),
+        )
+
+
+def test_sniff():
+    assert sniff(io.BytesIO(pdf_bytes())) == 'application/pdf'
+    assert sniff(io.BytesIO(png_bytes())) == 'image/png'
+    assert sniff(io.BytesIO(docx_bytes())) == DOCX
+    assert sniff(io.BytesIO(b'MZ\x90\x00 not a document')) is None
+
+
+def test_documents_are_processed_after_upload(django_capture_on_commit_callbacks):
+    application = apply(django_capture_on_commit_callbacks, ('id.jpg', jpeg_bytes()), ('cv.pdf', pdf_bytes()))
+    documents = {document.kind: document for document in application.documents.all()}
+    assert set(documents) == {'id_document', 'resume'}
+
+    scan = documents['id_document']
+    assert (scan.state, scan.content_type, scan.size) == ('ready', 'image/jpeg', application.id_document.size)
+    assert len(scan.sha256) == 64
+    with Image.open(scan.thumbnail) as thumbnail, Image.open(scan.preview) as preview:
+        assert max(thumbnail.size) == 256 and max(preview.size) == 1280
+    assert scan.preview.size < application.id_document.size
+
+    cv = documents['resume']
+    assert (cv.state, cv.content_type) == ('ready', 'application/pdf')
+    with Image.open(cv.preview) as page:
+        assert max(page.size) == 1280 and page.height > page.width  # portrait first page
+
+
+def test_content_must_match_accepted_types(django_capture_on_commit_callbacks):
+    # a PNG renamed to .pdf is not an accepted CV format
+    application = apply(django_capture_on_commit_callbacks, ('id.png', png_bytes()), ('cv.pdf', png_bytes()))
+    cv = application.documents.get(kind='resume')
+    assert (cv.state, cv.content_type) == ('invalid', 'image/png')
+    assert 'not one of the accepted' in cv.error and not cv.preview
+    # .docx is recognised but has no preview
+    application.resume = SimpleUploadedFile('cv.docx', docx_bytes())
+    with django_capture_on_commit_callbacks(execute=True):
+        application.save()
+    cv.refresh_from_db()
+    assert (cv.state, cv.content_type, cv.preview.name) == ('ready', DOCX, '')
+
+
+def test_duplicate_documents_across_applications(django_capture_on_commit_callbacks):
+    scan = ('id.jpg', jpeg_bytes((400, 300)))
+    first = apply(django_capture_on_commit_callbacks, scan, ('cv.pdf', pdf_bytes()))
+    second = apply(django_capture_on_commit_callbacks, scan, ('cv2.pdf', pdf_bytes()), email='other@x.com')
+    document = second.documents.get(kind='id_document')
+    assert list(document.duplicates().values_list('application_id', flat=True)) == [first.id]
+
+
+def test_status_changes_do_not_reprocess(django_capture_on_commit_callbacks, monkeypatch):
+    application = apply(django_capture_on_commit_callbacks, ('id.png', png_bytes()), ('cv.pdf', pdf_bytes()))
+    monkeypatch.setattr('agents.signals.process_document.delay', lambda pk: pytest.fail('reprocessed'))
+    application.status = 'under_review'
+    with django_capture_on_commit_callbacks(execute=True):
+        application.save()
+
+
+def test_admin_api_lists_previews(django_capture_on_commit_callbacks):
+    apply(django_capture_on_commit_callbacks, ('id.png', png_bytes()), ('cv.pdf', pdf_bytes()))
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_superuser(username='admin', password='pass'))
+    documents = client.get(reverse('agent-applications-list')).json()[0]['documents']
+    assert {document['kind'] for document in documents} == {'id_document', 'resume'}
+    assert all(document['thumbnail'].endswith('.jpg') for document in documents)
+
+
+def test_admin_review_screen_shows_thumbnails(client, django_capture_on_commit_callbacks):
+    application = apply(django_capture_on_commit_callbacks, ('id.png', png_bytes()), ('cv.pdf', pdf_bytes()))
+    client.force_login(User.objects.create_superuser(username='admin', password='pass'))
+    resp = client.get(reverse('admin:agents_agentapplication_change', args=[application.pk]))
+    assert resp.status_code == 200
+    assert resp.content.count(b'<img src="/media/blobs/') == 2
@@ -0,0 +1,129 @@
+from datetime import timedelta
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from agents import review
+from agents.models import AgentApplication
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+def make_applications(count, status='pending'):
+    start = timezone.now() - timedelta(days=count)
+    applications = []
+    for i in range(count):
+        application = AgentApplication.objects.create(
+            name=f'Agent {i}', email=f'agent{i}@example.com', phone='0240000000', status=status
+        )
+        AgentApplication.objects.filter(pk=application.pk).update(submitted_at=start + timedelta(hours=i))
+        applications.append(application.pk)
+    return applications
+
+
+@pytest.fixture
+def reviewers():
+    return (
+        User.objects.create_superuser('ama', 'ama@example.com', 'pass'),
+        User.objects.create_superuser('kofi', 'kofi@example.com', 'pass'),
+    )
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def test_queue_pages_oldest_first_by_cursor(reviewers):
+    ids = make_applications(5)
+    make_applications(2, status='approved')
+    client = client_for(reviewers[0])
+
+    seen, url = [], reverse('agent-applications-queue') + '?page_size=2'
+    while url:
+        body = client.get(url).json()
+        assert len(body['results']) <= 2
+        seen += [row['id'] for row in body['results']]
+        url = body['next']
+    assert seen == [str(pk) for pk in ids]
+
+
+def test_claims_never_overlap(reviewers):
+    ama, kofi = reviewers
+    ids = make_applications(5)
+
+    first = [a.pk for a in review.claim_next(ama, 3)]
+    second = [a.pk for a in review.claim_next(kofi, 3)]
+    assert first == ids[:3]
+    assert second == ids[3:]
+    assert not review.claim_next(kofi, 3).exists()
+
+    # ama's queue no longer shows what kofi is working on
+    body = client_for(ama).get(reverse('agent-applications-queue')).json()
+    assert [row['id'] for row in body['results']] == [str(pk) for pk in ids[:3]]
+
+
+def test_expired_claims_return_to_the_queue(reviewers):
+    ama, kofi = reviewers
+    ids = make_applications(2)
+    review.claim_next(ama, 2)
+    AgentApplication.objects.filter(pk=ids[0]).update(claim_expires_at=timezone.now() - timedelta(seconds=1))
+
+    assert [a.pk for a in review.claim_next(kofi, 2)] == [ids[0]]
+    assert review.release(ama, ids) == 1
+    assert AgentApplication.objects.get(pk=ids[1]).claimed_by is None
+
+
+def test_bulk_approve_is_one_update(reviewers, django_assert_num_queries):
+    ama, kofi = reviewers
+    ids = make_applications(30)
+    AgentApplication.objects.filter(pk=ids[0]).update(
+        claimed_by=kofi, claim_expires_at=timezone.now() + timedelta(minutes=5)
+    )
+    AgentApplication.objects.filter(pk=ids[1]).update(status='rejected')
+
+    with django_assert_num_queries(2):
+        changed = review.decide(ama, ids, 'approved', 'documents verified')
+    assert set(changed) == set(ids[2:])
+    approved = AgentApplication.objects.filter(status='approved')
+    assert approved.count() == 28
+    assert set(approved.values_list('reviewed_by', flat=True)) == {ama.pk}
+
+
+def test_bulk_reject_endpoint_reports_skipped(reviewers):
+    ama, kofi = reviewers
+    ids = make_applications(3)
+    review.claim_next(kofi, 1)
+
+    response = client_for(ama).post(
+        reverse('agent-applications-bulk-reject'), {'ids': [str(pk) for pk in ids], 'notes': 'incomplete'},
+        format='json',
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(body['updated']) == sorted(str(pk) for pk in ids[1:])
+    assert body['skipped'] == [str(ids[0])]
+    assert AgentApplication.objects.get(pk=ids[0]).status == 'pending'
+
+
+def test_single_approve_respects_claims(reviewers):
+    ama, kofi = reviewers
+    [pk] = make_applications(1)
+    review.claim_next(kofi, 1)
+
+    url = reverse('agent-applications-approve', args=[pk])
+    assert client_for(ama).post(url).status_code == 409
+    assert client_for(kofi).post(url).status_code == 200
+    application = AgentApplication.objects.get(pk=pk)
+    assert application.status == 'approved'
+    assert application.claimed_by is None
+
+    # decided already: a late reject doesn't overwrite it
+    response = client_for(ama).post(reverse('agent-applications-reject', args=[pk]))
+    assert response.status_code == 409
+    assert 'already been decided' in response.json()['detail']
+    assert AgentApplication.objects.get(pk=pk).status == 'approved'
@@ -0,0 +1,162 @@
+import hashlib
+import pytest
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from agents import uploads
+from agents.models import AgentApplication, DocumentUpload, UploadChunk
+from agents.tasks import expire_document_uploads
+from core.models import Blob
+
+pytestmark = pytest.mark.django_db
+
+CONTENT = b'%PDF-1.4 ' + bytes(range(256)) * 40
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+def open_upload(client, filename='scan.pdf', content=CONTENT, **extra):
+    resp = client.post(reverse('agent-uploads-list'), {'filename': filename, 'size': len(content), **extra}, format='json')
+    assert resp.status_code == 201, resp.json()
+    return resp.json()['id']
+
+
+def put_chunk(client, upload_id, content, first, size=4000):
+    body = content[first:first + size]
+    return client.put(
+        reverse('agent-uploads-detail', args=[upload_id]), body,
+        content_type='application/octet-stream',
+        HTTP_CONTENT_RANGE=f'bytes {first}-{first + len(body) - 1}/{len(content)}',
+    )
+
+
+def upload_all(client, upload_id, content=CONTENT):
+    for first in range(0, len(content), 4000):
+        assert put_chunk(client, upload_id, content, first).status_code == 200
+    return client.post(reverse('agent-uploads-complete', args=[upload_id]))
+
+
+def test_chunked_upload_resumes_and_completes(client):
+    upload_id = open_upload(client, filename='../../etc/My Scan.pdf', sha256=hashlib.sha256(CONTENT).hexdigest())
+    url = reverse('agent-uploads-detail', args=[upload_id])
+
+    assert put_chunk(client, upload_id, CONTENT, 0).json()['received'] == 4000
+    # a retry of the same chunk, or a gap, is refused with the resume offset
+    for first in (0, 8000):
+        resp = put_chunk(client, upload_id, CONTENT, first)
+        assert resp.status_code == 409 and resp.json()['received'] == 4000
+    # completing early is refused too
+    assert client.post(reverse('agent-uploads-complete', args=[upload_id])).status_code == 409
+
+    # the client reconnects, asks where to resume and carries on
+    resume_from = client.get(url).json()['received']
+    for first in range(resume_from, len(CONTENT), 4000):
+        assert put_chunk(client, upload_id, CONTENT, first).status_code == 200
+    assert UploadChunk.objects.filter(upload_id=upload_id).count() == 3
+
+    data = client.post(reverse('agent-uploads-complete', args=[upload_id])).json()
+    assert data['state'] == 'complete' and data['filename'] == 'My_Scan.pdf'
+    upload = DocumentUpload.objects.get(pk=upload_id)
+    # joined into content-addressed blob storage
+    assert upload.file.name.endswith(f'{hashlib.sha256(CONTENT).hexdigest()}.pdf')
+    with upload.file.open() as fh:
+        assert fh.read() == CONTENT
+    # chunk objects are gone once joined
+    assert not UploadChunk.objects.exists()
+    assert default_storage.listdir(f'{uploads.UPLOAD_DIR}/{upload_id}')[1] == []
+
+
+def test_bad_chunks_are_rejected(client, monkeypatch):
+    upload_id = open_upload(client)
+    url = reverse('agent-uploads-detail', args=[upload_id])
+    put = lambda body, header: client.put(url, body, content_type='application/octet-stream', HTTP_CONTENT_RANGE=header)
+
+    assert put(b'abc', 'bytes=0-2').status_code == 400
+    assert put(b'abc', f'bytes 0-2/{len(CONTENT) + 1}').status_code == 400
+    # the body must match the declared range
+    assert put(b'abcd', 'bytes 0-2/%d' % len(CONTENT)).status_code == 400
+    assert put(b'ab', 'bytes 0-2/%d' % len(CONTENT)).status_code == 400
+    monkeypatch.setattr(uploads, 'MAX_CHUNK_BYTES', 10)
+    assert put(CONTENT[:11], 'bytes 0-10/%d' % len(CONTENT)).status_code == 400
+    assert DocumentUpload.objects.get(pk=upload_id).received == 0
+    assert not UploadChunk.objects.exists()
+
+
+def test_checksum_mismatch_restarts_session(client):
+    upload_id = open_upload(client, sha256='0' * 64)
+    resp = upload_all(client, upload_id)
+    assert resp.status_code == 409 and resp.json()['received'] == 0
+    upload = DocumentUpload.objects.get(pk=upload_id)
+    assert (upload.state, upload.received, upload.file.name) == ('uploading', 0, '')
+
+
+def test_application_references_uploads(client):
+    id_upload, resume_upload = open_upload(client, 'id.png'), open_upload(client, 'cv.pdf')
+    for upload_id in (id_upload, resume_upload):
+        assert upload_all(client, upload_id).status_code == 200
+
+    payload = {
+        'name': 'Jane Doe', 'email': 'jane@doe.com', 'phone': '0551234567',
+        'id_document_upload': id_upload, 'resume_upload': resume_upload,
+    }
+    resp = client.post(reverse('agent-applications-list'), payload, format='json')
+    assert resp.status_code == 201, resp.json()
+    application = AgentApplication.objects.get()
+    assert application.id_document.name == DocumentUpload.objects.get(pk=id_upload).file.name
+    assert application.id_document.read() == CONTENT
+    assert DocumentUpload.objects.get(pk=resume_upload).state == 'attached'
+
+    # an upload backs one application only
+    resp = client.post(reverse('agent-applications-list'), payload, format='json')
+    assert resp.status_code == 400 and 'id_document_upload' in resp.json()
+
+
+def test_application_checks_upload_type_and_state(client):
+    exe, pending = open_upload(client, 'tool.exe'), open_upload(client, 'cv.pdf')
+    assert upload_all(client, exe).status_code == 200
+    resp = client.post(reverse('agent-applications-list'), {
+        'name': 'Jane Doe', 'email': 'jane@doe.com', 'phone': '0551234567',
+        'id_document_upload': exe, 'resume_upload': pending,
+    }, format='json')
+    assert resp.status_code == 400
+    assert 'id_document_upload' in resp.json()
+    assert DocumentUpload.objects.get(pk=exe).state == 'complete'
+
+
+def test_abandoned_and_unused_uploads_expire(client):
+    abandoned, unused, id_upload, resume_upload, fresh = (
+        open_upload(client, name) for name in ('a.pdf', 'b.pdf', 'id.pdf', 'cv.pdf', 'd.pdf')
+    )
+    assert put_chunk(client, abandoned, CONTENT, 0).status_code == 200
+    assert put_chunk(client, fresh, CONTENT, 0).status_code == 200
+    for upload_id in (unused, id_upload, resume_upload):
+        assert upload_all(client, upload_id).status_code == 200
+    resp = client.post(reverse('agent-applications-list'), {
+        'name': 'Jane Doe', 'email': 'jane@doe.com', 'phone': '0551234567',
+        'id_document_upload': id_upload, 'resume_upload': resume_upload,
+    }, format='json')
+    assert resp.status_code == 201, resp.json()
+    long_ago = timezone.now() - uploads.UPLOAD_EXPIRY - timedelta(minutes=1)
+    DocumentUpload.objects.exclude(pk=fresh).update(created_at=long_ago, completed_at=long_ago)
+    DocumentUpload.objects.filter(pk__in=[abandoned, fresh]).update(completed_at=None)
+
+    assert expire_document_uploads() == (1, 1)
+    remaining = {str(pk) for pk in DocumentUpload.objects.values_list('id', flat=True)}
+    assert remaining == {id_upload, resume_upload, fresh}
+    assert default_storage.listdir(f'{uploads.UPLOAD_DIR}/{abandoned}')[1] == []
+    assert default_storage.listdir(f'{uploads.UPLOAD_DIR}/{fresh}')[1]
+    assert str(UploadChunk.objects.get().upload_id) == fresh
+    # same content as the attached uploads: only the unused reference goes
+    blob = Blob.objects.get(name=AgentApplication.objects.get().id_document.name)
+    assert blob.refcount == 4
@@ -0,0 +1,218 @@
+import hashlib
+import io
+import re
+from datetime import timedelta
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DocumentUpload, UploadChunk
+
+# Resumable document uploads.
+#
+# A client opens a session with the file's name and size, PUTs the bytes
+# in order as ranged chunks (Content-Range: bytes <first>-<last>/<size>)
+# and then completes the session. Each chunk is streamed from the request
+# straight into its own storage object, so a worker holds one read buffer
+# whatever the file size, and a dropped connection only loses the chunk in
+# flight: GET the session for the offset to resume from. Completing joins
+# the chunks into the final file, again as a stream, in blob storage.
+# Sessions are open to anyone, so expire_uploads() (run hourly) deletes
+# those left incomplete for UPLOAD_EXPIRY, and completed uploads no
+# application took within it.
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+UPLOAD_DIR = 'agent_documents/uploads'
+UPLOAD_EXPIRY = timedelta(days=1)
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadConflict(UploadError):
+    """The chunk doesn't start where the session left off."""
+
+    def __init__(self, message, received):
+        super().__init__(message)
+        self.received = received
+
+
+def parse_content_range(header):
+    """(first, last, total) from a ``bytes first-last/total`` header."""
+    match = CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        raise UploadError('Content-Range must be "bytes <first>-<last>/<size>".')
+    first, last, total = map(int, match.groups())
+    if last < first:
+        raise UploadError('Content-Range end is before its start.')
+    return first, last, total
+
+
+class _CountingReader(io.RawIOBase):
+    """Reads at most ``limit`` bytes from ``stream``, counting what it got."""
+
+    def __init__(self, stream, limit):
+        self.stream, self.remaining, self.count = stream, limit, 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.stream.read(min(len(buffer), self.remaining))
+        self.remaining -= len(data)
+        self.count += len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def write_chunk(upload, content_range, stream):
+    """
+    Store the bytes of ``stream`` as the chunk described by the
+    ``content_range`` header. Returns the new resume offset.
+    """
+    first, last, total = parse_content_range(content_range)
+    length = last - first + 1
+    if total != upload.size or last >= upload.size:
+        raise UploadError(f'This upload is {upload.size} bytes.')
+    if length > MAX_CHUNK_BYTES:
+        raise UploadError(f'Chunks may be at most {MAX_CHUNK_BYTES} bytes.')
+    if upload.state != 'uploading':
+        raise UploadConflict('This upload is already complete.', upload.received)
+    if first != upload.received:
+        raise UploadConflict(f'Expected the chunk starting at byte {upload.received}.', upload.received)
+
+    reader = _CountingReader(stream, length)
+    path = default_storage.save(f'{UPLOAD_DIR}/{upload.id}/{first:012d}.part', File(reader))
+    if reader.count != length or stream.read(1):
+        default_storage.delete(path)
+        raise UploadError(f'The body must be exactly the {length} bytes in Content-Range.')
+
+    try:
+        with transaction.atomic():
+            UploadChunk.objects.create(upload=upload, offset=first, size=length, path=path)
+            claimed = DocumentUpload.objects.filter(
+                pk=upload.pk, state='uploading', received=first
+            ).update(received=F('received') + length)
+            if not claimed:
+                raise IntegrityError
+    except IntegrityError:
+        # another request stored this range first
+        default_storage.delete(path)
+        upload.refresh_from_db(fields=['received'])
+        raise UploadConflict(f'Expected the chunk starting at byte {upload.received}.', upload.received)
+    upload.received = first + length
+    return upload.received
+
+
+class _ChunkReader(io.RawIOBase):
+    """The session's chunk objects read back to back, hashed on the way through."""
+
+    def __init__(self, paths):
+        self.paths = iter(paths)
+        self.current = None
+        self.digest = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self.current is None:
+                path = next(self.paths, None)
+                if path is None:
+                    return 0
+                self.current = default_storage.open(path, 'rb')
+            data = self.current.read(len(buffer))
+            if data:
+                self.digest.update(data)
+                buffer[:len(data)] = data
+                return len(data)
+            self.current.close()
+            self.current = None
+
+
+def complete_upload(upload):
+    """Join the chunks of a fully received session into its final file."""
+    claimed = DocumentUpload.objects.filter(
+        pk=upload.pk, state='uploading', received=F('size')
+    ).update(state='assembling')
+    if not claimed:
+        upload.refresh_from_db()
+        if upload.state in ('complete', 'attached'):
+            return upload
+        raise UploadConflict(
+            f'Only {upload.received} of {upload.size} bytes have been received.', upload.received
+        )
+
+    paths = list(upload.chunks.values_list('path', flat=True))
+    reader = _ChunkReader(paths)
+    try:
+        upload.file.save(upload.filename, File(reader, name=upload.filename), save=False)
+    except Exception:
+        # e.g. storage unavailable: let the client retry completing
+        DocumentUpload.objects.filter(pk=upload.pk).update(state='uploading')
+        raise
+    digest = reader.digest.hexdigest()
+
+    if upload.sha256 and digest != upload.sha256:
+        # corrupted in transit: start the session over
+        upload.file.delete(save=False)
+        _discard_chunks(upload, paths)
+        DocumentUpload.objects.filter(pk=upload.pk).update(state='uploading', received=0)
+        raise UploadConflict('Checksum mismatch; upload the file again.', 0)
+
+    upload.sha256 = digest
+    upload.state = 'complete'
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['file', 'sha256', 'state', 'completed_at'])
+    _discard_chunks(upload, paths)
+    return upload
+
+
+def _discard_chunks(upload, paths):
+    for path in paths:
+        default_storage.delete(path)
+    upload.chunks.all().delete()
+
+
+def _delete_session_files(upload_id):
+    # every .part file of the session, including any whose UploadChunk row
+    # was never written
+    directory = f'{UPLOAD_DIR}/{upload_id}'
+    try:
+        _, filenames = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in filenames:
+        default_storage.delete(f'{directory}/{filename}')
+
+
+def expire_uploads(max_age=UPLOAD_EXPIRY):
+    """
+    Delete sessions opened more than ``max_age`` ago that never completed,
+    with their chunk files, and completed uploads that no application took
+    within ``max_age``. Returns (sessions, uploads) deleted.
+    """
+    cutoff = timezone.now() - max_age
+    sessions = uploads = 0
+    stale = DocumentUpload.objects.filter(state__in=('uploading', 'assembling'), created_at__lt=cutoff)
+    for upload_id, state in stale.values_list('id', 'state').iterator():
+        # only if it hasn't moved on since; chunk rows go with it
+        deleted, _ = DocumentUpload.objects.filter(pk=upload_id, state=state).delete()
+        if deleted:
+            _delete_session_files(upload_id)
+            sessions += 1
+
+    unused = DocumentUpload.objects.filter(state='complete', completed_at__lt=cutoff)
+    for upload in unused.only('id', 'file').iterator():
+        # an application attaching it now gets "already used" instead
+        deleted, _ = DocumentUpload.objects.filter(pk=upload.pk, state='complete').delete()
+        if deleted:
+            # drops the blob reference; gc_blobs removes the file
+            upload.file.delete(save=False)
+            uploads += 1
+    return sessions, uploads
@@ -1,7 +1,8 @@
 from rest_framework.routers import DefaultRouter
-from .views import AgentApplicationViewSet
+from .views import AgentApplicationViewSet, DocumentUploadViewSet
 
 router = DefaultRouter()
 router.register('applications', AgentApplicationViewSet, basename='agent-applications')
+router.register('uploads', DocumentUploadViewSet, basename='agent-uploads')
 
 urlpatterns = router.urls
@@ -1,44 +1,121 @@
-from rest_framework import viewsets, status
+import io
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAdminUser
-from django.utils import timezone
-from .models import AgentApplication
-from .serializers import AgentApplicationSerializer, AdminAgentApplicationSerializer
+from . import review as review_queue
+from .models import AgentApplication, DocumentUpload
+from .serializers import (
+    AgentApplicationSerializer,
+    AdminAgentApplicationSerializer,
+    DocumentUploadSerializer,
+    ReviewDecisionSerializer,
+    ReviewQueueSerializer,
+)
+from .uploads import UploadConflict, UploadError, complete_upload, write_chunk
+
+
+class ReviewQueuePagination(CursorPagination):
+    # keyset over the (status, submitted_at, id) index: every page is a range scan
+    ordering = ('submitted_at', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
 
 class AgentApplicationViewSet(viewsets.ModelViewSet):
-    queryset = AgentApplication.objects.all().order_by('-submitted_at')
+    """
+    Agent applications. Reviewers work the queue:
+
+    GET  queue/?status=pending: oldest first, cursor-paginated, without
+    applications another reviewer has claimed.
+    POST claim/ {"count"}: lease the next applications to yourself.
+    POST release/ {"ids"}: hand your claims back.
+    POST bulk-approve/, bulk-reject/ {"ids", "notes"?}: decide many at once.
+    """
+    queryset = AgentApplication.objects.prefetch_related('documents').order_by('-submitted_at')
     http_method_names = ['get', 'post', 'patch']
 
     def get_serializer_class(self):
+        if self.action in ['queue', 'claim']:
+            return ReviewQueueSerializer
         if self.request.user.is_staff:
             return AdminAgentApplicationSerializer
         return AgentApplicationSerializer
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'update', 'partial_update', 'approve', 'reject']:
+        if self.action in [
+            'list', 'retrieve', 'update', 'partial_update', 'approve', 'reject',
+            'queue', 'claim', 'release', 'bulk_approve', 'bulk_reject',
+        ]:
             return [IsAdminUser()]
         return [AllowAny()]
 
-    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
-    def approve(self, request, pk=None):
+    def _decide(self, request, new_status):
         application = self.get_object()
-        application.status = 'approved'
-        application.reviewed_at = timezone.now()
-        application.reviewed_by = request.user
-        application.admin_notes = request.data.get('notes', '')
-        application.save()
+        # the same conditional UPDATE as the bulk decisions, so it can't race
+        # them, another reviewer's claim or an earlier decision
+        if not review_queue.decide(request.user, [application.pk], new_status, request.data.get('notes', '')):
+            application.refresh_from_db()
+            if application.status not in review_queue.OPEN_STATUSES:
+                detail = 'This application has already been decided.'
+            else:
+                detail = 'Another reviewer has claimed this application.'
+            return Response({'detail': detail}, status=status.HTTP_409_CONFLICT)
+        application.refresh_from_db()
         return Response(self.get_serializer(application).data)
 
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def approve(self, request, pk=None):
+        return self._decide(request, 'approved')
+
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def reject(self, request, pk=None):
-        application = self.get_object()
-        application.status = 'rejected'
-        application.reviewed_at = timezone.now()
-        application.reviewed_by = request.user
-        application.admin_notes = request.data.get('notes', '')
-        application.save()
-        return Response(self.get_serializer(application).data)
+        return self._decide(request, 'rejected')
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def queue(self, request):
+        queue_status = request.query_params.get('status', 'pending')
+        if queue_status not in dict(AgentApplication.STATUS_CHOICES):
+            raise ValidationError({'status': 'Unknown status.'})
+        queryset = review_queue.queue(queue_status, request.user).prefetch_related('documents')
+        paginator = ReviewQueuePagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def claim(self, request):
+        try:
+            count = int(request.data.get('count', 10))
+        except (TypeError, ValueError):
+            raise ValidationError({'count': 'Must be a number.'})
+        claimed = review_queue.claim_next(request.user, count).prefetch_related('documents')
+        return Response(self.get_serializer(claimed, many=True).data)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def release(self, request):
+        serializer = ReviewDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'released': review_queue.release(request.user, serializer.validated_data['ids'])})
+
+    def _bulk_decide(self, request, new_status):
+        serializer = ReviewDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        changed = review_queue.decide(request.user, ids, new_status, serializer.validated_data['notes'])
+        # the rest were decided already or are claimed by someone else
+        skipped = sorted(set(ids) - set(changed), key=str)
+        return Response({'status': new_status, 'updated': changed, 'skipped': skipped})
+
+    @action(detail=False, methods=['post'], url_path='bulk-approve', permission_classes=[IsAdminUser])
+    def bulk_approve(self, request):
+        return self._bulk_decide(request, 'approved')
+
+    @action(detail=False, methods=['post'], url_path='bulk-reject', permission_classes=[IsAdminUser])
+    def bulk_reject(self, request):
+        return self._bulk_decide(request, 'rejected')
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def review(self, request, pk=None):
@@ -46,3 +123,41 @@ class AgentApplicationViewSet(viewsets.ModelViewSet):
         application.status = 'under_review'
         application.save()
         return Response(self.get_serializer(application).data)
+
+
+class DocumentUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable document uploads for agent applications.
+
+    POST {"filename", "size", "sha256"?}: open a session.
+    PUT  <id>/ with Content-Range: bytes <first>-<last>/<size>: store a chunk.
+    GET  <id>/: progress; ``received`` is the offset to resume from.
+    POST <id>/complete/: join the chunks; then pass the id to the application
+    as id_document_upload / business_license_upload / resume_upload.
+    Sessions still incomplete after a day are deleted, and so are completed
+    uploads that no application has used by then.
+    """
+    queryset = DocumentUpload.objects.all()
+    serializer_class = DocumentUploadSerializer
+    permission_classes = [AllowAny]
+    # one document is many requests; don't spend the anon daily budget on it
+    throttle_scope = 'uploads'
+
+    def update(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            write_chunk(upload, request.headers.get('Content-Range'), request.stream or io.BytesIO())
+        except UploadConflict as exc:
+            return Response({'detail': str(exc), 'received': exc.received}, status=status.HTTP_409_CONFLICT)
+        except UploadError as exc:
+            raise ValidationError({'detail': str(exc)})
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        upload = self.get_object()
+        try:
+            complete_upload(upload)
+        except UploadConflict as exc:
+            return Response({'detail': str(exc), 'received': exc.received}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(upload).data)
@@ -2,7 +2,13 @@ from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 from decimal import Decimal
 from django.contrib import admin
-from .models import BoxType, Booking, NotificationLog, ContainerBatch
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from agents.models import AgentApplication
+from .models import (
+    AgentDailyStats, BoxType, Booking, NotificationLog, ContainerBatch, BatchStatusPropagation, PickupSlotCapacity,
+)
+from .rollups import leaderboard
 
 class BoxTypeResource(resources.ModelResource):
     class Meta:
@@ -44,6 +50,19 @@ class ContainerBatchAdmin(ImportExportModelAdmin):
         'percent_full_display',
     )
     list_filter = ('status',)
+    actions = ('mark_ready', 'mark_dispatched')
+
+    def _transition(self, request, queryset, status):
+        started = sum(1 for batch in queryset if batch.transition_to(status))
+        self.message_user(request, f"Status update queued for {started} batch(es).")
+
+    @admin.action(description='Mark selected batches ready to ship')
+    def mark_ready(self, request, queryset):
+        self._transition(request, queryset, 'ready')
+
+    @admin.action(description='Mark selected batches dispatched')
+    def mark_dispatched(self, request, queryset):
+        self._transition(request, queryset, 'dispatched')
 
     def current_volume_display(self, obj):
         # call the model’s property
@@ -58,6 +77,28 @@ class ContainerBatchAdmin(ImportExportModelAdmin):
 
 
 
+@admin.register(BatchStatusPropagation)
+class BatchStatusPropagationAdmin(admin.ModelAdmin):
+    list_display = (
+        'batch', 'status', 'state', 'processed_bookings',
+        'total_bookings', 'created_at', 'finished_at',
+    )
+    list_filter = ('state', 'status')
+    readonly_fields = [field.name for field in BatchStatusPropagation._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(PickupSlotCapacity)
+class PickupSlotCapacityAdmin(admin.ModelAdmin):
+    list_display = ('date', 'slot', 'area', 'capacity', 'reserved')
+    list_filter = ('slot', 'area')
+    list_editable = ('capacity',)
+    readonly_fields = ('reserved',)
+    date_hierarchy = 'date'
+
+
 @admin.register(BoxType)
 class BoxTypeAdmin(ImportExportModelAdmin):
     resource_class = BoxTypeResource
@@ -72,9 +113,13 @@ class BookingAdmin(ImportExportModelAdmin):
     list_display = (
         'reference_code', 'user', 'box_type',
         'quantity', 'pickup_date', 'pickup_slot',
-        'cost', 'created_at'
+        'cost', 'current_status', 'created_at'
+    )
+    list_filter = ('current_status',)
+    readonly_fields = (
+        'reference_code', 'cost', 'created_at',
+        'current_status', 'current_location', 'status_updated_at',
     )
-    readonly_fields = ('reference_code', 'cost', 'created_at')
     search_fields = ('reference_code', 'user__username', 'pickup_address')
 
 
@@ -88,6 +133,21 @@ class NotificationLogAdmin(ImportExportModelAdmin):
 
 
 
+@admin.register(AgentDailyStats)
+class AgentDailyStatsAdmin(admin.ModelAdmin):
+    # maintained by bookings.rollups; repair with `manage.py rebuild_agent_stats`
+    list_display = ('date', 'agent', 'bookings', 'revenue', 'volume_m3', 'avg_booking_value')
+    list_filter = ('date',)
+    search_fields = ('agent__username',)
+    date_hierarchy = 'date'
+    list_select_related = ('agent',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 def dashboard_callback(request, context):
     today = timezone.localdate()
@@ -117,24 +177,18 @@ def dashboard_callback(request, context):
           .order_by('-bookings')[:5]
     )
 
-    # Status distribution
+    # Status distribution (current status of today's bookings)
     context['status_distribution'] = (
-        TrackingRecord.objects.filter(booking__created_at__date=today)
-        .values('status')
+        daily_bookings.exclude(current_status='')
+        .values(status=F('current_status'))
         .annotate(count=Count('id'))
         .order_by('status')
     )
 
-    # Agent performance
-    context['agent_performance'] = (
-        daily_bookings.filter(user__is_agent=True)
-        .values('user__username')
-        .annotate(
-            bookings=Count('id'),
-            revenue=Sum('cost'),
-            avg_booking_value=Avg('cost')
-        ).order_by('-revenue')[:5]
-    )
+    # Agent performance, from the daily rollups
+    context['agent_performance'] = [
+        {**row, 'user__username': row['username']} for row in leaderboard(today, today, limit=5)
+    ]
 
     # New agent applications
     context['new_applications'] = AgentApplication.objects.filter(
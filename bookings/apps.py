@@ -8,6 +8,7 @@ class BookingsConfig(AppConfig):
     def ready(self):
         # Delay import until Django is fully loaded
         from django_celery_beat.models import PeriodicTask, CrontabSchedule
+        from . import signals  # noqa: F401
         from . import tasks
 
         try:
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.db import transaction
+
+# Public tracking responses are cached per reference code; anything that
+# changes a booking's summary or timeline must call invalidate_tracking().
+TRACKING_CACHE_KEY = 'bookings:tracking:{}'
+TRACKING_CACHE_TTL = 300  # seconds
+
+
+def tracking_cache_key(reference_code):
+    return TRACKING_CACHE_KEY.format(reference_code)
+
+
+def invalidate_tracking(*reference_codes):
+    keys = [tracking_cache_key(code) for code in reference_codes if code]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # A reader may re-cache the old timeline before our transaction commits
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+# Pickup availability calendars are cached per area; reserve/release and
+# capacity edits call invalidate_availability().
+AVAILABILITY_CACHE_KEY = 'bookings:availability:{}'
+AVAILABILITY_CACHE_TTL = 60  # seconds; also bounds staleness across midnight
+
+
+def availability_cache_key(area):
+    return AVAILABILITY_CACHE_KEY.format(area or '-')
+
+
+def invalidate_availability(area):
+    key = availability_cache_key(area)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+# Container load plans are cached per batch together with the box counts
+# they cover; bookings.packing.get_load_plan() extends or rebuilds them.
+LOAD_PLAN_CACHE_KEY = 'bookings:load_plan:{}'
+LOAD_PLAN_CACHE_TTL = 60 * 60 * 24
+
+
+def load_plan_cache_key(batch_id):
+    return LOAD_PLAN_CACHE_KEY.format(batch_id)
+
+
+# Fill-date forecasts per batch; refresh_capacity_forecasts rewrites them
+# hourly, the TTL only covers a stalled beat.
+FORECAST_CACHE_KEY = 'bookings:forecast:{}'
+FORECAST_CACHE_TTL = 60 * 60 * 3
+
+
+def forecast_cache_key(batch_id):
+    return FORECAST_CACHE_KEY.format(batch_id)
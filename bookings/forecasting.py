@@ -0,0 +1,142 @@
+from datetime import timedelta
+from statistics import NormalDist
+import numpy as np
+from django.core.cache import cache
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+
+from .cache import FORECAST_CACHE_TTL, forecast_cache_key
+from .models import Booking
+
+# Fill-date forecasting from booking velocity.
+#
+# History is one grouped query: booked volume per day. Each weekday gets
+# its own exponentially weighted mean and variance (recent weeks count
+# most), and the remaining volume is projected forward day by day. Days
+# are treated as independent, so the variance of the cumulative volume is
+# the sum of the daily variances; the band is where the expected
+# cumulative volume +/- z standard deviations crosses what's left. Every
+# step is vectorized over the whole history, so years of data fit in a
+# few milliseconds.
+HISTORY_DAYS = 3 * 365
+HALF_LIFE_DAYS = 56
+HORIZON_DAYS = 2 * 365
+CONFIDENCE = 0.8
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+_CM3_PER_M3 = 1_000_000
+
+
+def _booked_cm3():
+    return Sum(Cast(
+        F('box_type__length_cm') * F('box_type__width_cm') * F('box_type__height_cm') * F('quantity'),
+        FloatField(),
+    ))
+
+
+def weekday_of(days):
+    """Monday=0 weekdays of a datetime64[D] array (1970-01-01 was a Thursday)."""
+    return (days.astype('int64') + 3) % 7
+
+
+def daily_volumes(start, end):
+    """
+    (days, volumes): a datetime64[D] array from the first booking day on or
+    after ``start`` through ``end``, and booked m³ per day, zero-filled.
+    """
+    rows = (
+        Booking.objects.filter(created_at__date__gte=start, created_at__date__lte=end)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(cm3=_booked_cm3())
+        .values_list('day', 'cm3')
+    )
+    rows = list(rows)
+    if not rows:
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype=float)
+    booked_days = np.array([day for day, _ in rows], dtype='datetime64[D]')
+    booked = np.array([float(cm3 or 0) for _, cm3 in rows]) / _CM3_PER_M3
+
+    first = booked_days.min()
+    days = np.arange(first, np.datetime64(end, 'D') + 1)
+    volumes = np.zeros(len(days))
+    np.add.at(volumes, (booked_days - first).astype('int64'), booked)
+    return days, volumes
+
+
+def weekday_rates(days, volumes, half_life_days=HALF_LIFE_DAYS):
+    """Exponentially weighted (mean, std) of daily m³ for each weekday."""
+    if not len(days):
+        return np.zeros(7), np.zeros(7)
+    age = (days[-1] - days).astype('int64')
+    weights = 0.5 ** (age / half_life_days)
+    weekday = weekday_of(days)
+    total = np.bincount(weekday, weights=weights, minlength=7)
+    # weekdays not in the history yet (a brand-new service) get nothing
+    safe = np.where(total > 0, total, 1)
+    mean = np.bincount(weekday, weights=weights * volumes, minlength=7) / safe
+    sq_dev = (volumes - mean[weekday]) ** 2
+    var = np.bincount(weekday, weights=weights * sq_dev, minlength=7) / safe
+    return mean, np.sqrt(var)
+
+
+def project_fill(remaining, mean, std, first_day, horizon=HORIZON_DAYS, confidence=CONFIDENCE):
+    """
+    (expected, earliest, latest) dates the cumulative booked volume from
+    ``first_day`` on reaches ``remaining`` m³; None beyond ``horizon`` days.
+    """
+    days = np.arange(horizon) + np.datetime64(first_day, 'D')
+    weekday = weekday_of(days)
+    expected = np.cumsum(mean[weekday])
+    spread = NormalDist().inv_cdf((1 + confidence) / 2) * np.sqrt(np.cumsum(std[weekday] ** 2))
+
+    def crossing(cumulative):
+        hit = cumulative >= remaining
+        return days[hit.argmax()].item() if hit.any() else None
+
+    return crossing(expected), crossing(expected + spread), crossing(expected - spread)
+
+
+def compute_forecast(batch, today=None):
+    today = today or timezone.localdate()
+    booked = (
+        Booking.objects.filter(batch=batch).aggregate(cm3=_booked_cm3())['cm3'] or 0
+    ) / _CM3_PER_M3
+    target = float(batch.target_volume)
+    remaining = max(target - booked, 0.0)
+
+    # today is still filling up, so the rates come from complete days only
+    days, volumes = daily_volumes(today - timedelta(days=HISTORY_DAYS), today - timedelta(days=1))
+    mean, std = weekday_rates(days, volumes)
+    if remaining == 0:
+        expected = earliest = latest = today
+    else:
+        # today's rate is already partly in ``booked``: project from tomorrow
+        expected, earliest, latest = project_fill(remaining, mean, std, today + timedelta(days=1))
+
+    return {
+        'batch': batch.id,
+        'target_volume_m3': round(target, 2),
+        'booked_volume_m3': round(booked, 2),
+        'remaining_volume_m3': round(remaining, 2),
+        'daily_rate_m3': round(float(mean.mean()), 3),
+        'weekday_rates_m3': {name: round(float(rate), 3) for name, rate in zip(WEEKDAYS, mean)},
+        'history_days': len(days),
+        'estimated_fill_date': expected,
+        'confidence': CONFIDENCE,
+        'fill_date_earliest': earliest,
+        'fill_date_latest': latest,
+        'computed_at': timezone.now(),
+    }
+
+
+def refresh_forecast(batch):
+    forecast = compute_forecast(batch)
+    cache.set(forecast_cache_key(batch.id), forecast, FORECAST_CACHE_TTL)
+    return forecast
+
+
+def get_forecast(batch):
+    """Cached forecast for ``batch``; refresh_capacity_forecasts keeps it warm."""
+    return cache.get(forecast_cache_key(batch.id)) or refresh_forecast(batch)
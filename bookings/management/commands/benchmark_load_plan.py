@@ -0,0 +1,82 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+
+from bookings.models import BoxType
+from bookings.packing import add_boxes, new_plan, pack, packed_cm3, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the container load-plan estimator: a full pack of N boxes "
+        "and the incremental cost of adding one booking at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--boxes', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--booking-size', type=int, default=4, help='Boxes per simulated booking.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--from-db', action='store_true',
+            help='Use the BoxType table instead of a synthetic set of box sizes.'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if options['from_db']:
+            dims = {
+                box.id: (box.length_cm, box.width_cm, box.height_cm)
+                for box in BoxType.objects.all()
+            }
+        else:
+            dims = {1: (45, 45, 45), 2: (50, 50, 50), 3: (60, 40, 40),
+                    4: (80, 60, 50), 5: (100, 50, 50), 6: (30, 30, 30)}
+        if not dims:
+            self.stderr.write('No box types to pack.')
+            return
+
+        quantities = {type_id: 0 for type_id in dims}
+        for _ in range(options['boxes']):
+            quantities[rng.choice(list(dims))] += 1
+
+        timings = []
+        for _ in range(max(options['repeat'], 1)):
+            start = time.perf_counter()
+            plan = pack(dims, quantities)
+            summary = summarize(plan)
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(
+            f"Full pack of {options['boxes']} boxes ({len(dims)} types): "
+            f"median {statistics.median(timings) * 1000:.1f} ms, "
+            f"max {max(timings) * 1000:.1f} ms"
+        )
+        self.stdout.write(
+            f"  placed {summary['boxes_placed']}/{summary['boxes_requested']} boxes, "
+            f"{summary['packed_volume_m3']} of {summary['booked_volume_m3']} m³ booked; "
+            f"utilization {summary['utilization']:.2%}, "
+            f"effective capacity {summary['effective_capacity_m3']} m³"
+        )
+
+        # incremental: one booking at a time, as get_load_plan does
+        plan = new_plan()
+        size = max(options['booking_size'], 1)
+        steps = []
+        added = 0
+        while added < options['boxes']:
+            type_id = rng.choice(list(dims))
+            start = time.perf_counter()
+            add_boxes(plan, dims, {type_id: size})
+            if plan['placed'] != plan['counts']:
+                fresh = pack(dims, plan['counts'])
+                if packed_cm3(fresh) > packed_cm3(plan):
+                    plan = fresh
+            steps.append(time.perf_counter() - start)
+            added += size
+        self.stdout.write(
+            f"Incremental: {len(steps)} bookings of {size} boxes, "
+            f"median {statistics.median(steps) * 1e6:.0f} µs, "
+            f"max {max(steps) * 1000:.2f} ms per booking; "
+            f"final plan holds {summarize(plan)['packed_volume_m3']} m³"
+        )
@@ -0,0 +1,57 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from bookings.models import PostcodeGeocode
+
+
+class Command(BaseCommand):
+    help = (
+        "Load postcode coordinates from a CSV with postcode, latitude and "
+        "longitude columns (e.g. an ONS postcode directory extract). "
+        "Outward codes such as 'SE1' can be included as area centroids."
+    )
+
+    BATCH_SIZE = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to load.')
+
+    def handle(self, *args, **options):
+        try:
+            fh = open(options['path'], newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        loaded = 0
+        with fh:
+            reader = csv.DictReader(fh)
+            missing = {'postcode', 'latitude', 'longitude'} - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing columns: {', '.join(sorted(missing))}")
+            # keyed by postcode: an upsert can't touch the same row twice
+            batch = {}
+            for row in reader:
+                try:
+                    geocode = PostcodeGeocode(
+                        postcode=row['postcode'].replace(' ', '').upper(),
+                        latitude=float(row['latitude']),
+                        longitude=float(row['longitude']),
+                    )
+                except (AttributeError, TypeError, ValueError):
+                    continue
+                batch[geocode.postcode] = geocode
+                if len(batch) >= self.BATCH_SIZE:
+                    loaded += self._save(batch.values())
+                    batch = {}
+            loaded += self._save(batch.values())
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} postcode geocodes."))
+
+    def _save(self, batch):
+        batch = list(batch)
+        PostcodeGeocode.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['postcode'],
+            update_fields=['latitude', 'longitude'],
+        )
+        return len(batch)
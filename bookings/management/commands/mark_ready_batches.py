@@ -8,8 +8,7 @@ class Command(BaseCommand):
         open_batches = ContainerBatch.objects.filter(status='open')
         for batch in open_batches:
             if batch.current_volume >= batch.target_volume:
-                batch.status = 'ready'
-                batch.save()
+                batch.transition_to('ready')
                 self.stdout.write(
                     self.style.SUCCESS(
                         f"Batch #{batch.id} marked ready "
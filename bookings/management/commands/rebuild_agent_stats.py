@@ -0,0 +1,25 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute agent daily stats from bookings (backfill, or repair after bulk imports)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day, YYYY-MM-DD (default: 30 days ago).')
+        parser.add_argument('--end', help='Last day, YYYY-MM-DD (default: today).')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else today - timedelta(days=30)
+            end = date.fromisoformat(options['end']) if options['end'] else today
+        except ValueError:
+            raise CommandError('Dates must be YYYY-MM-DD.')
+        if start > end:
+            raise CommandError('--start is after --end.')
+        rows = rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} agent-day rows for {start} to {end}."))
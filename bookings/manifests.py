@@ -0,0 +1,131 @@
+import csv
+import io
+import math
+import re
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+
+from .models import PICKUP_SLOTS, Booking, PostcodeGeocode
+
+# Daily pickup manifests: one run per (slot, area), stops ordered with a
+# nearest-neighbour walk over locally stored postcode coordinates. A day is
+# built from one query on the (pickup_date, pickup_slot) index plus one
+# geocode lookup for every postcode seen.
+POSTCODE_RE = re.compile(r'\b([A-Z]{1,2}\d[A-Z\d]?)\s*(\d[A-Z]{2})\b', re.IGNORECASE)
+UNKNOWN_AREA = 'UNKNOWN'
+SLOT_ORDER = {slot: index for index, (slot, _) in enumerate(PICKUP_SLOTS)}
+CSV_FIELDS = [
+    'pickup_date', 'pickup_slot', 'area', 'stop', 'reference_code', 'customer',
+    'pickup_address', 'postcode', 'box_type', 'quantity', 'volume_m3', 'leg_km',
+]
+
+
+def parse_postcode(address):
+    """(outward code, full postcode) from a free-text UK address, or (None, None)."""
+    match = POSTCODE_RE.search(address or '')
+    if not match:
+        return None, None
+    outward, inward = match.group(1).upper(), match.group(2).upper()
+    return outward, outward + inward
+
+
+def haversine_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 6371.0 * 2 * math.asin(math.sqrt(h))
+
+
+def nearest_neighbour(stops, start=None):
+    """
+    Order ``stops`` (dicts with 'coords' as (lat, lng) or None) by always
+    driving to the closest unvisited stop, starting at ``start`` or the
+    first located stop. Stops that could not be geocoded go last.
+    """
+    remaining = [stop for stop in stops if stop['coords']]
+    route = []
+    current = start or (remaining[0]['coords'] if remaining else None)
+    while remaining:
+        nearest = min(remaining, key=lambda stop: haversine_km(current, stop['coords']))
+        nearest['leg_km'] = round(haversine_km(current, nearest['coords']), 2)
+        route.append(nearest)
+        remaining.remove(nearest)
+        current = nearest['coords']
+    unlocated = sorted((stop for stop in stops if not stop['coords']), key=lambda stop: stop['pickup_address'])
+    for stop in unlocated:
+        stop['leg_km'] = None
+    return route + unlocated
+
+
+def build_manifests(pickup_date):
+    """
+    [{'pickup_date', 'pickup_slot', 'area', 'stops': [...], 'total_km'}]
+    for every booking collected on ``pickup_date``.
+    """
+    bookings = (
+        Booking.objects.filter(pickup_date=pickup_date)
+        .select_related('box_type', 'user')
+        .order_by('pickup_slot', 'created_at')
+    )
+    groups = defaultdict(list)
+    postcodes = set()
+    for booking in bookings.iterator(chunk_size=2000):
+        outward, postcode = parse_postcode(booking.pickup_address)
+        if postcode:
+            postcodes.update((postcode, outward))
+        user = booking.user
+        groups[(booking.pickup_slot, booking.pickup_area or outward or UNKNOWN_AREA)].append({
+            'reference_code': booking.reference_code,
+            'customer': (user.get_full_name() or user.username) if user else '',
+            'pickup_address': booking.pickup_address,
+            'postcode': postcode or '',
+            'outward': outward,
+            'box_type': booking.box_type.name,
+            'quantity': booking.quantity,
+            'volume_m3': booking.volume_m3.quantize(Decimal('0.001')),
+        })
+
+    coords = {
+        postcode: (latitude, longitude)
+        for postcode, latitude, longitude in PostcodeGeocode.objects.filter(
+            postcode__in=postcodes
+        ).values_list('postcode', 'latitude', 'longitude')
+    }
+    depot = getattr(settings, 'PICKUP_DEPOT', None)
+
+    manifests = []
+    for (slot, area), stops in sorted(
+        groups.items(), key=lambda item: (SLOT_ORDER.get(item[0][0], len(SLOT_ORDER)), item[0])
+    ):
+        for stop in stops:
+            # fall back to the outward-code centroid
+            outward = stop.pop('outward')
+            stop['coords'] = coords.get(stop['postcode']) or coords.get(outward)
+        route = nearest_neighbour(stops, start=depot)
+        for sequence, stop in enumerate(route, start=1):
+            stop['stop'] = sequence
+        manifests.append({
+            'pickup_date': pickup_date,
+            'pickup_slot': slot,
+            'area': area,
+            'stops': route,
+            'total_km': round(sum(stop['leg_km'] or 0 for stop in route), 2),
+        })
+    return manifests
+
+
+def render_csv(manifests):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for manifest in manifests:
+        for stop in manifest['stops']:
+            writer.writerow({
+                **stop,
+                'pickup_date': manifest['pickup_date'].isoformat(),
+                'pickup_slot': manifest['pickup_slot'],
+                'area': manifest['area'],
+                'leg_km': '' if stop['leg_km'] is None else stop['leg_km'],
+            })
+    return buffer.getvalue()
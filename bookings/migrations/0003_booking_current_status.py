@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_containerbatch_volume_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='current_location',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='current_status',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='status_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_current_status'),
+        ('referrals', '0002_alter_referral_options_referral_last_clicked_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['current_status', 'status_updated_at'], name='bookings_bo_current_a46cbf_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:29
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_current_status(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    TrackingRecord = apps.get_model('tracking', 'TrackingRecord')
+    latest = TrackingRecord.objects.filter(booking=OuterRef('pk')).order_by('-timestamp', '-id')
+    Booking.objects.filter(pk__in=TrackingRecord.objects.values('booking')).update(
+        current_status=Subquery(latest.values('status')[:1]),
+        current_location=Subquery(latest.values('location')[:1]),
+        status_updated_at=Subquery(latest.values('timestamp')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_current_status_index'),
+        ('tracking', '0002_trackingrecord_tracking_tr_booking_ed73cf_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_current_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_backfill_current_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='bookings.containerbatch'),
+        ),
+        migrations.CreateModel(
+            name='BatchStatusPropagation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Open'), ('ready', 'Ready to Ship'), ('dispatched', 'Dispatched')], max_length=20)),
+                ('tracking_status', models.CharField(max_length=50)),
+                ('location', models.CharField(blank=True, max_length=100)),
+                ('notify', models.BooleanField(default=True)),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_bookings', models.PositiveIntegerField(default=0)),
+                ('processed_bookings', models.PositiveIntegerField(default=0)),
+                ('last_booking_id', models.UUIDField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='propagations', to='bookings.containerbatch')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
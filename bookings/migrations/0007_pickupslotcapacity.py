@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def reserve_existing_bookings(apps, schema_editor):
+    # Upcoming bookings already hold their slots; capacity is raised where
+    # a slot was overbooked before capacity existed.
+    Booking = apps.get_model('bookings', 'Booking')
+    PickupSlotCapacity = apps.get_model('bookings', 'PickupSlotCapacity')
+    default = getattr(settings, 'PICKUP_SLOT_CAPACITY', 20)
+    counts = (
+        Booking.objects.filter(pickup_date__gte=timezone.localdate())
+        .values('pickup_date', 'pickup_slot')
+        .annotate(booked=Count('id'))
+    )
+    PickupSlotCapacity.objects.bulk_create([
+        PickupSlotCapacity(
+            date=row['pickup_date'], slot=row['pickup_slot'], area='',
+            capacity=max(default, row['booked']), reserved=row['booked'],
+        )
+        for row in counts
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_batch_batchstatuspropagation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='pickup_area',
+            field=models.CharField(blank=True, default='', help_text='Driver zone (e.g. postcode district); slot capacity is per area', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='PickupSlotCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('slot', models.CharField(choices=[('morning', '9:00 AM - 12:00 PM'), ('afternoon', '12:00 PM - 3:00 PM'), ('evening', '3:00 PM - 6:00 PM')], max_length=20)),
+                ('area', models.CharField(blank=True, default='', max_length=20)),
+                ('capacity', models.PositiveIntegerField()),
+                ('reserved', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'slot', 'area'],
+                'indexes': [models.Index(fields=['area', 'date'], name='bookings_pi_area_42eedf_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'slot', 'area'), name='unique_pickup_slot')],
+            },
+        ),
+        migrations.RunPython(reserve_existing_bookings, migrations.RunPython.noop),
+    ]
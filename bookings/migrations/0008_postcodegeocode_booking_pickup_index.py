@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_pickupslotcapacity'),
+        ('referrals', '0002_alter_referral_options_referral_last_clicked_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostcodeGeocode',
+            fields=[
+                ('postcode', models.CharField(help_text='Upper case, no spaces', max_length=10, primary_key=True, serialize=False)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['pickup_date', 'pickup_slot'], name='bookings_bo_pickup__e8e745_idx'),
+        ),
+    ]
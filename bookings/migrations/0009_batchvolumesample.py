@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal, InvalidOperation
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def copy_volume_history(apps, schema_editor):
+    ContainerBatch = apps.get_model('bookings', 'ContainerBatch')
+    BatchVolumeSample = apps.get_model('bookings', 'BatchVolumeSample')
+    for batch in ContainerBatch.objects.exclude(volume_history=[]).only('id', 'volume_history').iterator():
+        samples = []
+        for point in batch.volume_history or []:
+            try:
+                timestamp = parse_datetime(point['timestamp'])
+                volume = Decimal(point['volume']).quantize(Decimal('0.01'))
+            except (KeyError, TypeError, ValueError, InvalidOperation):
+                continue
+            if timestamp is not None:
+                samples.append(BatchVolumeSample(batch_id=batch.id, timestamp=timestamp, volume=volume))
+        BatchVolumeSample.objects.bulk_create(samples, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_postcodegeocode_booking_pickup_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchVolumeSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('volume', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('batch', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='volume_samples', to='bookings.containerbatch')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['batch', 'timestamp'], name='bookings_ba_batch_i_d5f14e_idx')],
+            },
+        ),
+        migrations.RunPython(copy_volume_history, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='containerbatch',
+            name='volume_history',
+        ),
+    ]
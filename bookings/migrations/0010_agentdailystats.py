@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:05
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_agent_stats(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    AgentDailyStats = apps.get_model('bookings', 'AgentDailyStats')
+    grouped = (
+        Booking.objects.filter(user__is_agent=True)
+        .annotate(day=TruncDate('created_at'))
+        .values('user', 'day')
+        .annotate(
+            count=Count('id'),
+            revenue=Sum('cost'),
+            volume_cm3=Sum(
+                F('box_type__length_cm') * F('box_type__width_cm') * F('box_type__height_cm') * F('quantity')
+            ),
+        )
+    )
+    AgentDailyStats.objects.bulk_create(
+        (
+            AgentDailyStats(
+                agent_id=row['user'], date=row['day'], bookings=row['count'],
+                revenue=row['revenue'] or 0, volume_cm3=row['volume_cm3'] or 0,
+            )
+            for row in grouped.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_batchvolumesample'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12)),
+                ('volume_cm3', models.BigIntegerField(default=0)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'agent daily stats',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['date', 'agent'], name='bookings_ag_date_a5e507_idx')],
+                'constraints': [models.UniqueConstraint(fields=('agent', 'date'), name='unique_agent_day')],
+            },
+        ),
+        migrations.RunPython(backfill_agent_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+
+def mark_reserved_bookings(apps, schema_editor):
+    # Bookings don't record which of them took a place, so hand each slot's
+    # reserved count to that many of its bookings; the rest (admin, import)
+    # never reserved one and won't release one.
+    Booking = apps.get_model('bookings', 'Booking')
+    PickupSlotCapacity = apps.get_model('bookings', 'PickupSlotCapacity')
+    for date, slot, area, reserved in (
+        PickupSlotCapacity.objects.filter(reserved__gt=0)
+        .values_list('date', 'slot', 'area', 'reserved').iterator()
+    ):
+        ids = list(
+            Booking.objects.filter(pickup_date=date, pickup_slot=slot, pickup_area__iexact=area)
+            .order_by('created_at').values_list('id', flat=True)[:reserved]
+        )
+        Booking.objects.filter(id__in=ids).update(slot_reserved=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_agentdailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='slot_reserved',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_reserved_bookings, migrations.RunPython.noop),
+    ]
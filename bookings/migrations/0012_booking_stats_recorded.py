@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:56
+
+from django.db import migrations, models
+
+
+def mark_recorded_bookings(apps, schema_editor):
+    # 0010 backfilled the rollups from every agent's bookings and the
+    # signals have counted agents' bookings since, so those are the counted
+    # ones; `manage.py rebuild_agent_stats` realigns both if they've drifted.
+    Booking = apps.get_model('bookings', 'Booking')
+    Booking.objects.filter(user__is_agent=True).update(stats_recorded=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_slot_reserved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='stats_recorded',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_recorded_bookings, migrations.RunPython.noop),
+    ]
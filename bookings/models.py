@@ -1,8 +1,9 @@
 import uuid
 import logging
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 from datetime import datetime, time, timedelta
 from django.db.models import F, Sum, ExpressionWrapper, DecimalField
@@ -53,34 +54,89 @@ class Booking(models.Model):
         on_delete=models.SET_NULL,
         null=True, blank=True,
     )
+    batch          = models.ForeignKey(
+        'ContainerBatch',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='bookings',
+    )
     box_type       = models.ForeignKey(BoxType, on_delete=models.PROTECT)
     quantity       = models.PositiveIntegerField(default=1)
     pickup_address = models.TextField()
     pickup_date    = models.DateField()
     pickup_slot    = models.CharField(max_length=20)
+    pickup_area    = models.CharField(
+        max_length=20, blank=True, default='',
+        help_text="Driver zone (e.g. postcode district); slot capacity is per area"
+    )
+    # Whether this booking holds a place in its PickupSlotCapacity row;
+    # only bookings that reserved one give it back, or move it.
+    slot_reserved  = models.BooleanField(default=False, editable=False)
+    # Whether this booking is counted in its agent's AgentDailyStats row;
+    # only counted bookings are taken back off when deleted.
+    stats_recorded = models.BooleanField(default=False, editable=False)
     created_at     = models.DateTimeField(auto_now_add=True)
     cost           = models.DecimalField(
         max_digits=10, decimal_places=2, editable=False,
         help_text="Computed as volume (m³) × £453.66"
     )
+    # Denormalized from the latest TrackingRecord
+    current_status    = models.CharField(max_length=50, blank=True, default='')
+    current_location  = models.CharField(max_length=100, blank=True, default='')
+    status_updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # "all bookings currently <status>" and status distributions
+            models.Index(fields=['current_status', 'status_updated_at']),
+            # a day's pickup run (manifests)
+            models.Index(fields=['pickup_date', 'pickup_slot']),
+        ]
 
     def __str__(self):
         return self.reference_code
 
     def save(self, *args, **kwargs):
+        if not self._state.adding and self.slot_reserved:
+            with transaction.atomic():
+                self._move_slot_reservation(kwargs.get('update_fields'))
+                return self._save(*args, **kwargs)
+        return self._save(*args, **kwargs)
+
+    def _move_slot_reservation(self, update_fields=None):
+        """Follow a change of pickup date, slot or area; raises SlotUnavailable if the new one is full."""
+        fields = ('pickup_date', 'pickup_slot', 'pickup_area')
+        if update_fields is not None and not set(fields) & set(update_fields):
+            return
+        from .slots import normalize_area, release_slot, reserve_slot
+        old = Booking.objects.filter(pk=self.pk).values_list(*fields).first()
+        new = (self.pickup_date, self.pickup_slot, self.pickup_area)
+        if old is None or (old[0], old[1], normalize_area(old[2])) == (new[0], new[1], normalize_area(new[2])):
+            return
+        reserve_slot(*new)
+        release_slot(*old)
+
+    def _save(self, *args, **kwargs):
         is_new = self._state.adding
+        current_batch = None
+        if is_new or 'quantity' in (kwargs.get('update_fields') or []):
+            current_batch = ContainerBatch.objects.filter(status='open').first()
+        # New bookings ship in the container currently being filled
+        if is_new and self.batch_id is None and current_batch:
+            self.batch = current_batch
         super().save(*args, **kwargs)
 
         # Log capacity after save
-        if is_new or 'quantity' in kwargs.get('update_fields', []):
-            current_batch = ContainerBatch.objects.filter(status='open').first()
-            if current_batch:
-                ContainerCapacity.log_capacity(current_batch)
+        if current_batch:
+            ContainerCapacity.log_capacity(current_batch)
 
         # Existing notification logic
         if is_new:
             from .models import send_booking_notifications
             send_booking_notifications.delay(str(self.id))
+        else:
+            from .cache import invalidate_tracking
+            invalidate_tracking(self.reference_code)
 
     @classmethod
     def total_booked_volume(cls) -> Decimal:
@@ -100,16 +156,6 @@ class Booking(models.Model):
 
 
 class ContainerBatch(models.Model):
-    # Add historical tracking
-    volume_history = models.JSONField(default=list, help_text="Historical volume data")
-    
-    def update_volume_history(self):
-        current_volume = Booking.total_booked_volume()
-        self.volume_history.append({
-            'timestamp': timezone.now().isoformat(),
-            'volume': str(current_volume)
-        })
-        self.save(update_fields=['volume_history'])
     STATUS_CHOICES = (
         ('open', 'Open'),
         ('ready', 'Ready to Ship'),
@@ -125,6 +171,113 @@ class ContainerBatch(models.Model):
     def __str__(self):
         return f"Batch #{self.id} ({self.get_status_display()})"
 
+    def booked_volume(self) -> Decimal:
+        cm3 = self.bookings.aggregate(total=Sum(
+            F('box_type__length_cm') * F('box_type__width_cm') * F('box_type__height_cm') * F('quantity')
+        ))['total']
+        return Decimal(cm3 or 0) / 1_000_000
+
+    def update_volume_history(self):
+        """Record the batch's current booked volume: a single INSERT."""
+        return BatchVolumeSample.objects.create(
+            batch=self, volume=self.booked_volume().quantize(Decimal('0.01'))
+        )
+
+    def volume_history(self, start=None, end=None):
+        """Volume samples in [start, end), oldest first."""
+        samples = self.volume_samples.order_by('timestamp')
+        if start is not None:
+            samples = samples.filter(timestamp__gte=start)
+        if end is not None:
+            samples = samples.filter(timestamp__lt=end)
+        return samples
+
+    def transition_to(self, status, location='', notify=True):
+        """
+        Move the batch to ``status`` and fan the change out to its bookings
+        (tracking event + customer notification) in a background job.
+        Returns the BatchStatusPropagation tracking that job, or None if the
+        batch was already in ``status`` or changed concurrently.
+        """
+        if status not in dict(self.STATUS_CHOICES):
+            raise ValueError(f"Unknown batch status: {status}")
+        if status == self.status:
+            return None
+        with transaction.atomic():
+            # compare-and-set so two operators can't both fire the fan-out
+            updated = ContainerBatch.objects.filter(pk=self.pk, status=self.status).update(status=status)
+            if not updated:
+                return None
+            self.status = status
+            propagation = BatchStatusPropagation.objects.create(
+                batch=self,
+                status=status,
+                tracking_status=self.get_status_display(),
+                location=location,
+                notify=notify,
+                total_bookings=self.bookings.count(),
+            )
+            from .tasks import propagate_batch_status
+            transaction.on_commit(lambda: propagate_batch_status.delay(propagation.pk))
+        return propagation
+
+
+class BatchVolumeSample(models.Model):
+    """
+    One point of a batch's booked-volume time series. Rows are only ever
+    appended; read ranges with ContainerBatch.volume_history().
+    """
+    # the (batch, timestamp) index below covers lookups by batch
+    batch = models.ForeignKey(
+        ContainerBatch, on_delete=models.CASCADE, related_name='volume_samples', db_index=False
+    )
+    timestamp = models.DateTimeField(default=timezone.now)
+    volume = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [models.Index(fields=['batch', 'timestamp'])]
+
+    def __str__(self):
+        return f"Batch #{self.batch_id} @ {self.timestamp:%Y-%m-%d %H:%M}: {self.volume} m³"
+
+
+class BatchStatusPropagation(models.Model):
+    """
+    Progress of one batch status fan-out. The job walks the batch's bookings
+    in primary-key order, one short transaction per chunk; ``last_booking_id``
+    is the keyset cursor, so a crashed job resumes where it stopped.
+    """
+    STATE_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+    batch = models.ForeignKey(ContainerBatch, on_delete=models.CASCADE, related_name='propagations')
+    status = models.CharField(max_length=20, choices=ContainerBatch.STATUS_CHOICES)
+    tracking_status = models.CharField(max_length=50)
+    location = models.CharField(max_length=100, blank=True)
+    notify = models.BooleanField(default=True)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='pending')
+    total_bookings = models.PositiveIntegerField(default=0)
+    processed_bookings = models.PositiveIntegerField(default=0)
+    last_booking_id = models.UUIDField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Batch #{self.batch_id} → {self.status} ({self.processed_bookings}/{self.total_bookings})"
+
+    @property
+    def percent_complete(self) -> float:
+        if not self.total_bookings:
+            return 100.0 if self.state == 'completed' else 0.0
+        return round(min(self.processed_bookings / self.total_bookings, 1) * 100, 2)
+
 
 class NotificationLog(models.Model):
     CHANNEL_CHOICES = (
@@ -146,6 +299,43 @@ class NotificationLog(models.Model):
         return f"{self.get_channel_display()} to {self.recipient} for {self.booking or 'ADMIN'}"
 
 
+class AgentDailyStats(models.Model):
+    """
+    One agent's bookings on one (local) day. Counters are only changed by
+    F() updates from bookings.rollups as bookings are created or deleted,
+    so a date-range report reads at most one row per agent per day.
+    """
+    agent = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_stats'
+    )
+    date = models.DateField()
+    bookings = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0'))
+    volume_cm3 = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+        verbose_name_plural = 'agent daily stats'
+        constraints = [
+            models.UniqueConstraint(fields=['agent', 'date'], name='unique_agent_day'),
+        ]
+        indexes = [
+            # the admin report: every agent over a date range
+            models.Index(fields=['date', 'agent']),
+        ]
+
+    def __str__(self):
+        return f"{self.agent} {self.date}: {self.bookings} bookings"
+
+    @property
+    def volume_m3(self) -> Decimal:
+        return Decimal(self.volume_cm3) / 1_000_000
+
+    @property
+    def avg_booking_value(self) -> Decimal:
+        return self.revenue / self.bookings if self.bookings else Decimal('0')
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Task‐proxy so tests that patch("bookings.models.send_booking_notifications.delay")
 # continue to work without a circular import on module load.
@@ -163,6 +353,7 @@ from typing import Dict
 
 CONTAINER_MAX_VOLUME = 65  # Maximum volume in m³ per container
 MAX_BOXES_PER_TYPE = 100   # Maximum number of boxes per type per booking
+PRICE_PER_M3 = Decimal('453.66')  # Shipping rate in £ per m³
 
 # Volume-based discount tiers (volume in m³: discount percentage)
 VOLUME_DISCOUNTS: Dict[Decimal, Decimal] = {
@@ -183,6 +374,51 @@ MIN_PICKUP_DAYS = 1  # Minimum days in advance for pickup
 MAX_PICKUP_DAYS = 14  # Maximum days in advance for pickup
 
 
+class PickupSlotCapacity(models.Model):
+    """
+    Driver capacity for one pickup slot. ``reserved`` is only changed by
+    conditional UPDATEs (see bookings.slots), so concurrent bookings can't
+    overbook it. Rows are created on first reservation with the default
+    capacity; edit ``capacity`` in the admin to add or remove drivers.
+    """
+    date = models.DateField()
+    slot = models.CharField(max_length=20, choices=PICKUP_SLOTS)
+    area = models.CharField(max_length=20, blank=True, default='')
+    capacity = models.PositiveIntegerField()
+    reserved = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'slot', 'area']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'slot', 'area'], name='unique_pickup_slot'),
+        ]
+        indexes = [
+            # availability calendar: one area, a date range
+            models.Index(fields=['area', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.slot} {self.area or '-'} ({self.reserved}/{self.capacity})"
+
+    @property
+    def available(self) -> int:
+        return max(self.capacity - self.reserved, 0)
+
+
+class PostcodeGeocode(models.Model):
+    """
+    Locally supplied postcode coordinates (full postcodes and outward-code
+    centroids), loaded with `manage.py load_postcode_geocodes`; used to
+    order pickup stops without calling an external geocoder.
+    """
+    postcode = models.CharField(max_length=10, primary_key=True, help_text="Upper case, no spaces")
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    def __str__(self):
+        return self.postcode
+
+
 class ContainerCapacity(models.Model):
     batch = models.ForeignKey(ContainerBatch, on_delete=models.CASCADE, related_name='capacity_logs')
     total_volume = models.DecimalField(max_digits=10, decimal_places=2)
@@ -0,0 +1,250 @@
+from decimal import Decimal
+from itertools import permutations
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from .cache import LOAD_PLAN_CACHE_TTL, load_plan_cache_key
+from .models import Booking
+
+# Load-plan estimator: a wall-building, 3D guillotine heuristic.
+#
+# The container is filled front to back in walls spanning its full width
+# and height. A wall's depth is the box orientation that covers the
+# cross-section best; each wall is then packed as a set of free cuboid
+# cells: a block (a cols x rows grid of one box type/orientation) goes in
+# the corner of a cell, and the rest of the cell is cut into the space
+# behind, beside and above the block. Work is per block, not per box, so
+# thousands of boxes of a handful of types pack in milliseconds.
+#
+# Plans are plain dicts so they can be cached and extended: adding boxes
+# fills the cached free cells first, then opens new walls.
+MIN_CELL_CM = 5
+
+
+def orientations(dims):
+    """Distinct (depth, width, height) rotations of a box; boxes may be tipped."""
+    return sorted(set(permutations(dims)))
+
+
+def new_plan(container=None):
+    length, width, height = container or settings.CONTAINER_INTERIOR_CM
+    return {
+        'container': [length, width, height],
+        'dims': {},          # box type id -> [l, w, h] in cm
+        'counts': {},        # boxes requested per type
+        'placed': {},        # boxes placed per type
+        'walls': [],         # [x, depth]
+        'blocks': [],        # [type, x, y, z, d, w, h, cols, rows]
+        'free': [],          # cells: [x, y, z, depth, width, height]
+        'length_used': 0,
+    }
+
+
+def _best_block(plan, remaining, depth, width, height):
+    """Type/orientation placing the most volume in a depth x width x height cell."""
+    best = None
+    for type_id, left in remaining.items():
+        if left <= 0:
+            continue
+        for d, w, h in orientations(plan['dims'][type_id]):
+            if d > depth or w > width or h > height:
+                continue
+            cols, rows = width // w, height // h
+            if cols * rows > left:
+                # not enough boxes for a full grid: as many full rows as we have
+                rows = left // cols
+                if rows == 0:
+                    cols, rows = left, 1
+            volume = cols * rows * d * w * h
+            if best is None or volume > best[0]:
+                best = (volume, type_id, d, w, h, cols, rows)
+    return best
+
+
+def _fill_cells(plan, remaining, cells):
+    """Pack ``cells`` (and the cells they split into) until nothing fits."""
+    leftover = []
+    while cells:
+        x, y, z, depth, width, height = cells.pop()
+        best = _best_block(plan, remaining, depth, width, height)
+        if best is None:
+            leftover.append([x, y, z, depth, width, height])
+            continue
+        _, type_id, d, w, h, cols, rows = best
+        plan['blocks'].append([type_id, x, y, z, d, w, h, cols, rows])
+        count = cols * rows
+        remaining[type_id] -= count
+        plan['placed'][type_id] = plan['placed'].get(type_id, 0) + count
+
+        block_w, block_h = cols * w, rows * h
+        for cell in (
+            [x + d, y, z, depth - d, block_w, block_h],          # behind
+            [x, y + block_w, z, depth, width - block_w, height],  # beside
+            [x, y, z + block_h, depth, block_w, height - block_h],  # above
+        ):
+            if min(cell[3:]) >= MIN_CELL_CM:
+                cells.append(cell)
+    return leftover
+
+
+def _open_walls(plan, remaining):
+    length, width, height = plan['container']
+    while any(left > 0 for left in remaining.values()):
+        space = length - plan['length_used']
+        # wall depth: the orientation that fills the cross-section most densely
+        best = None
+        for type_id, left in remaining.items():
+            if left <= 0:
+                continue
+            for d, w, h in orientations(plan['dims'][type_id]):
+                if d > space or w > width or h > height:
+                    continue
+                density = min((width // w) * (height // h), left) * w * h / (width * height)
+                if best is None or density > best[0] or (density == best[0] and d < best[1]):
+                    best = (density, d)
+        if best is None:
+            return
+        depth = best[1]
+        x = plan['length_used']
+        plan['walls'].append([x, depth])
+        plan['length_used'] += depth
+        plan['free'] += _fill_cells(plan, remaining, [[x, 0, 0, depth, width, height]])
+
+
+def add_boxes(plan, box_dims, quantities):
+    """
+    Extend ``plan`` with ``quantities`` ({type_id: n}) of boxes whose sizes
+    are ``box_dims`` ({type_id: (l, w, h)} in cm). Existing placements are
+    kept; new boxes go into free cells first, then new walls.
+    """
+    remaining = {}
+    for type_id, quantity in quantities.items():
+        plan['dims'][type_id] = list(box_dims[type_id])
+        plan['counts'][type_id] = plan['counts'].get(type_id, 0) + quantity
+        remaining[type_id] = quantity
+    # carry over boxes that didn't fit last time
+    for type_id, count in plan['counts'].items():
+        unplaced = count - plan['placed'].get(type_id, 0) - remaining.get(type_id, 0)
+        if unplaced > 0:
+            remaining[type_id] = remaining.get(type_id, 0) + unplaced
+
+    # _fill_cells pops from the end: smallest cells are tried first, which
+    # keeps the big ones for boxes that need them
+    free = sorted(plan['free'], key=lambda cell: cell[3] * cell[4] * cell[5], reverse=True)
+    plan['free'] = _fill_cells(plan, remaining, free)
+    _open_walls(plan, remaining)
+    return plan
+
+
+def pack(box_dims, quantities, container=None):
+    """Fresh plan for ``quantities`` of boxes; see add_boxes()."""
+    return add_boxes(new_plan(container), box_dims, quantities)
+
+
+def _box_cm3(plan):
+    return {type_id: dims[0] * dims[1] * dims[2] for type_id, dims in plan['dims'].items()}
+
+
+def effective_capacity_cm3(plan):
+    """
+    Volume of boxes a container really holds for the plan's box mix: pack
+    the same mix scaled up to overflow the container and see what fits.
+    """
+    if not plan['counts']:
+        return None
+    length, width, height = plan['container']
+    box_cm3 = _box_cm3(plan)
+    requested = sum(box_cm3[t] * n for t, n in plan['counts'].items())
+    # a quarter more than fits, so the estimate can't just cherry-pick the
+    # easiest boxes out of a huge surplus
+    scale = -(-5 * length * width * height // (4 * requested))  # ceil
+    full = pack(plan['dims'], {t: n * scale for t, n in plan['counts'].items()}, plan['container'])
+    return packed_cm3(full)
+
+
+def packed_cm3(plan):
+    box_cm3 = _box_cm3(plan)
+    return sum(box_cm3[t] * n for t, n in plan['placed'].items())
+
+
+def summarize(plan):
+    length, width, height = plan['container']
+    cm3_per_m3 = Decimal(1_000_000)
+    container_cm3 = length * width * height
+    box_cm3 = _box_cm3(plan)
+    requested = sum(box_cm3[t] * n for t, n in plan['counts'].items())
+    packed = packed_cm3(plan)
+    effective = effective_capacity_cm3(plan)
+    unplaced = {
+        type_id: count - plan['placed'].get(type_id, 0)
+        for type_id, count in plan['counts'].items()
+        if count > plan['placed'].get(type_id, 0)
+    }
+    return {
+        'container_volume_m3': (Decimal(container_cm3) / cm3_per_m3).quantize(Decimal('0.01')),
+        'booked_volume_m3': (Decimal(requested) / cm3_per_m3).quantize(Decimal('0.01')),
+        'packed_volume_m3': (Decimal(packed) / cm3_per_m3).quantize(Decimal('0.01')),
+        'length_used_cm': plan['length_used'],
+        'utilization': (Decimal(packed) / Decimal(container_cm3)).quantize(Decimal('0.0001')),
+        # what the container really holds if the current box mix continues
+        'effective_capacity_m3': (
+            (Decimal(effective) / cm3_per_m3).quantize(Decimal('0.01')) if effective else None
+        ),
+        'boxes_requested': sum(plan['counts'].values()),
+        'boxes_placed': sum(plan['placed'].values()),
+        'unplaced': unplaced,
+        'fits': not unplaced,
+        'walls': len(plan['walls']),
+    }
+
+
+def batch_box_counts(batch):
+    """({type_id: (l, w, h)}, {type_id: quantity}) for ``batch`` in one query."""
+    rows = (
+        Booking.objects.filter(batch=batch)
+        .values('box_type', 'box_type__length_cm', 'box_type__width_cm', 'box_type__height_cm')
+        .annotate(quantity=Sum('quantity'))
+        .order_by('box_type')
+    )
+    dims, counts = {}, {}
+    for row in rows:
+        type_id = row['box_type']
+        dims[type_id] = (row['box_type__length_cm'], row['box_type__width_cm'], row['box_type__height_cm'])
+        counts[type_id] = row['quantity']
+    return dims, counts
+
+
+def get_load_plan(batch):
+    """
+    Cached load plan for ``batch``, brought up to date with its bookings.
+    If boxes were only added since the plan was cached, they are packed
+    into it incrementally; any removal or resize rebuilds it. Once boxes
+    no longer fit, a fresh pack is tried too and the fuller plan kept,
+    since greedy additions to a nearly full container pack less tightly.
+    """
+    dims, counts = batch_box_counts(batch)
+    key = load_plan_cache_key(batch.pk)
+    plan = cache.get(key)
+    container = list(settings.CONTAINER_INTERIOR_CM)
+
+    incremental = False
+    if plan is not None and plan['container'] == container:
+        cached = plan['counts']
+        grown = all(counts.get(t, 0) >= n for t, n in cached.items())
+        same_boxes = all(plan['dims'][t] == list(dims[t]) for t in cached if t in dims)
+        if grown and same_boxes:
+            added = {t: n - cached.get(t, 0) for t, n in counts.items() if n > cached.get(t, 0)}
+            if not added:
+                return plan
+            plan = add_boxes(plan, dims, added)
+            incremental = True
+
+    if not incremental:
+        plan = pack(dims, counts, container)
+    elif plan['placed'] != plan['counts']:
+        fresh = pack(dims, counts, container)
+        if packed_cm3(fresh) > packed_cm3(plan):
+            plan = fresh
+    cache.set(key, plan, LOAD_PLAN_CACHE_TTL)
+    return plan
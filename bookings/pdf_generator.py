@@ -1,10 +1,12 @@
 from io import BytesIO
 from decimal import Decimal
+from xml.sax.saxutils import escape
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+from reportlab.lib.pagesizes import landscape
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, PageBreak, Spacer
 from .models import BoxType
 
 def generate_box_cheatsheet():
@@ -65,4 +67,66 @@ def generate_box_cheatsheet():
     # Build PDF
     doc.build(elements)
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
+
+
+def generate_pickup_manifest(manifests):
+    """One page per (slot, area) run, stops in driving order."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(A4),
+        title="Pickup Manifest",
+        author="Cargo Ghana"
+    )
+    styles = getSampleStyleSheet()
+    elements = []
+
+    if not manifests:
+        elements.append(Paragraph("No pickups scheduled.", styles['Heading1']))
+
+    for index, manifest in enumerate(manifests):
+        if index:
+            elements.append(PageBreak())
+        elements.append(Paragraph(
+            f"Pickups {manifest['pickup_date']:%a %d %b %Y} · "
+            f"{manifest['pickup_slot']} · {escape(manifest['area'])}",
+            styles['Heading1']
+        ))
+        elements.append(Paragraph(
+            f"{len(manifest['stops'])} stops · approx. {manifest['total_km']} km",
+            styles['Normal']
+        ))
+        elements.append(Spacer(1, 12))
+
+        data = [['#', 'Ref', 'Customer', 'Address', 'Boxes', 'Volume (m³)', 'Leg (km)']]
+        for stop in manifest['stops']:
+            data.append([
+                stop['stop'],
+                stop['reference_code'],
+                stop['customer'],
+                # Paragraph text is markup; addresses are whatever the customer typed
+                Paragraph(escape(stop['pickup_address']), styles['Normal']),
+                f"{stop['quantity']} × {stop['box_type']}",
+                str(stop['volume_m3']),
+                '' if stop['leg_km'] is None else stop['leg_km'],
+            ])
+        table = Table(
+            data,
+            colWidths=[0.4*inch, 1.1*inch, 1.6*inch, 3.8*inch, 1.6*inch, 1*inch, 0.8*inch],
+            repeatRows=1
+        )
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+        ]))
+        elements.append(table)
+
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,150 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AgentDailyStats, Booking
+
+# Per-agent daily rollups.
+#
+# Each booking by an agent adds itself to its agent's row for the day it
+# was made (and a deleted booking takes itself back off), with the same
+# get_or_create + F() update used for pickup slots, so concurrent bookings
+# never lose a count. A booking records that it was counted in
+# stats_recorded, and only those are taken back off: one that never got
+# added (made before its user became an agent, bulk-loaded without
+# signals) mustn't skew the totals. Reports then sum at most one row per
+# agent per day instead of joining and grouping the bookings table.
+
+
+def _booking_cm3(booking):
+    box = booking.box_type
+    return box.length_cm * box.width_cm * box.height_cm * booking.quantity
+
+
+def _is_agent_booking(booking):
+    return booking.user_id is not None and booking.user.is_agent
+
+
+def _add(agent_id, day, bookings, revenue, volume_cm3):
+    AgentDailyStats.objects.get_or_create(agent_id=agent_id, date=day)
+    AgentDailyStats.objects.filter(agent_id=agent_id, date=day).update(
+        bookings=F('bookings') + bookings,
+        revenue=F('revenue') + revenue,
+        volume_cm3=F('volume_cm3') + volume_cm3,
+    )
+
+
+def _remove(agent_id, day, revenue, volume_cm3):
+    AgentDailyStats.objects.filter(agent_id=agent_id, date=day).update(
+        bookings=F('bookings') - 1,
+        revenue=F('revenue') - revenue,
+        volume_cm3=F('volume_cm3') - volume_cm3,
+    )
+
+
+def _mark_recorded(bookings):
+    Booking.objects.filter(pk__in=[booking.pk for booking in bookings]).update(stats_recorded=True)
+    for booking in bookings:
+        booking.stats_recorded = True
+
+
+def record_booking(booking, sign=1):
+    """Add ``booking`` to its agent's day (``sign=-1`` removes a counted one)."""
+    day = timezone.localdate(booking.created_at)
+    if sign < 0:
+        _remove(booking.user_id, day, booking.cost or 0, _booking_cm3(booking))
+    elif _is_agent_booking(booking):
+        _add(booking.user_id, day, 1, booking.cost or 0, _booking_cm3(booking))
+        _mark_recorded([booking])
+
+
+def record_bookings(bookings):
+    """record_booking for many bookings (e.g. after bulk_create): one update per agent-day."""
+    days = {}
+    counted = []
+    for booking in bookings:
+        if not _is_agent_booking(booking):
+            continue
+        counted.append(booking)
+        key = (booking.user_id, timezone.localdate(booking.created_at))
+        count, revenue, volume_cm3 = days.get(key, (0, 0, 0))
+        days[key] = (count + 1, revenue + (booking.cost or 0), volume_cm3 + _booking_cm3(booking))
+    for (agent_id, day), totals in days.items():
+        _add(agent_id, day, *totals)
+    if counted:
+        _mark_recorded(counted)
+
+
+def _totals(rows):
+    totals = rows.aggregate(
+        bookings=Sum('bookings'), revenue=Sum('revenue'), volume_cm3=Sum('volume_cm3')
+    )
+    return _with_averages({
+        'bookings': totals['bookings'] or 0,
+        'revenue': totals['revenue'] or Decimal('0'),
+        'volume_cm3': totals['volume_cm3'] or 0,
+    })
+
+
+def _with_averages(row):
+    row['volume_m3'] = (Decimal(row.pop('volume_cm3')) / 1_000_000).quantize(Decimal('0.001'))
+    row['avg_booking_value'] = (
+        (row['revenue'] / row['bookings']).quantize(Decimal('0.01')) if row['bookings'] else Decimal('0.00')
+    )
+    return row
+
+
+def agent_summary(agent, start, end):
+    """Totals and the per-day rows of ``agent`` between ``start`` and ``end`` inclusive."""
+    rows = AgentDailyStats.objects.filter(agent=agent, date__range=(start, end))
+    days = [
+        _with_averages({'date': date, 'bookings': bookings, 'revenue': revenue, 'volume_cm3': volume_cm3})
+        for date, bookings, revenue, volume_cm3 in rows.values_list('date', 'bookings', 'revenue', 'volume_cm3')
+    ]
+    return {'start': start, 'end': end, **_totals(rows), 'days': days}
+
+
+def leaderboard(start, end, limit=None):
+    """Agents by revenue between ``start`` and ``end`` inclusive."""
+    rows = (
+        AgentDailyStats.objects.filter(date__range=(start, end))
+        .values('agent', username=F('agent__username'))
+        .annotate(bookings=Sum('bookings'), revenue=Sum('revenue'), volume_cm3=Sum('volume_cm3'))
+        .order_by('-revenue', 'username')
+    )
+    if limit:
+        rows = rows[:limit]
+    return [_with_averages(dict(row)) for row in rows]
+
+
+@transaction.atomic
+def rebuild(start, end):
+    """Recompute the rollups for ``start``..``end`` from the bookings table."""
+    AgentDailyStats.objects.filter(date__range=(start, end)).delete()
+    grouped = (
+        Booking.objects.filter(user__is_agent=True)
+        .annotate(day=TruncDate('created_at'))
+        .filter(day__range=(start, end))
+        .values('user', 'day')
+        .annotate(
+            count=Count('id'),
+            revenue=Sum('cost'),
+            volume_cm3=Sum(
+                F('box_type__length_cm') * F('box_type__width_cm') * F('box_type__height_cm') * F('quantity')
+            ),
+        )
+    )
+    rows = [
+        AgentDailyStats(
+            agent_id=row['user'], date=row['day'], bookings=row['count'],
+            revenue=row['revenue'] or 0, volume_cm3=row['volume_cm3'] or 0,
+        )
+        for row in grouped
+    ]
+    AgentDailyStats.objects.bulk_create(rows, batch_size=1000)
+    in_range = Booking.objects.filter(created_at__date__range=(start, end))
+    in_range.filter(user__is_agent=True).update(stats_recorded=True)
+    in_range.exclude(user__is_agent=True).update(stats_recorded=False)
+    return len(rows)
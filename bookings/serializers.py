@@ -1,12 +1,17 @@
-from django.db import models
+from collections import Counter
+from django.db import models, transaction
 from rest_framework import serializers
 from decimal import Decimal
-from .models import BoxType, Booking, ContainerBatch, ContainerCapacity  # Add ContainerCapacity here
+from .models import BoxType, Booking, ContainerBatch, ContainerCapacity, BatchStatusPropagation, BatchVolumeSample
 from referrals.models import Referral
-from .models import CONTAINER_MAX_VOLUME, MAX_BOXES_PER_TYPE
-from datetime import datetime, date
+from tracking.serializers import TrackingEventSerializer
+from .models import CONTAINER_MAX_VOLUME, MAX_BOXES_PER_TYPE, PRICE_PER_M3
+from datetime import datetime, date, timedelta
 from django.utils import timezone
 from .models import PICKUP_SLOTS, MIN_PICKUP_DAYS, MAX_PICKUP_DAYS
+from .rollups import record_bookings
+from .slots import SlotUnavailable, area_for_address, reserve_slot
+from .tasks import send_bulk_booking_notifications
 
 
 class ContainerProgressSerializer(serializers.Serializer):
@@ -96,7 +101,7 @@ class VolumeCalcSerializer(serializers.Serializer):
             box_type = BoxType.objects.get(id=item['type_id'])
             quantity = item['quantity']
             volume = box_type.volume_m3 * quantity
-            cost = volume * Decimal('453.66')
+            cost = volume * PRICE_PER_M3
             
             result['boxes'].append({
                 'type_id': item['type_id'],
@@ -130,6 +135,15 @@ class BookingCreateSerializer(serializers.ModelSerializer):
     referral_code = serializers.CharField(write_only=True, required=False, allow_blank=True)
     cost          = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     pickup_slot = serializers.ChoiceField(choices=PICKUP_SLOTS)
+    pickup_area = serializers.CharField(read_only=True)
+
+    class Meta:
+        model  = Booking
+        fields = [
+            'id','box_type','quantity','pickup_address','pickup_date',
+            'pickup_slot','pickup_area','referral_code','cost','reference_code'
+        ]
+        read_only_fields = ['reference_code']
 
     def validate_pickup_date(self, value):
         today = timezone.now().date()
@@ -152,22 +166,16 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         return value
 
     def validate(self, data):
-        data = super().validate(data)
-        
-        # Additional validation can be added here if needed
-        # For example, checking if the selected slot is still available
-        
+        data['pickup_area'] = area_for_address(data.get('pickup_address'))
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         code = validated_data.pop('referral_code', None)
         referral = None
         if code:
             try:
-                referral = Referral.objects.get(code=code, is_active=True)
-                # increment usage
-                referral.times_used = models.F('times_used') + 1
-                referral.save()
+                referral = Referral.objects.get(code=code)
             except Referral.DoesNotExist:
                 raise serializers.ValidationError({"referral_code": "Invalid or inactive code"})
 
@@ -176,6 +184,18 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if req and req.user and req.user.is_authenticated:
             user = req.user
 
+        # Slot availability is checked by the reservation itself; doing it
+        # in validate() would race with other bookings for the same slot.
+        # The reservation rolls back with the booking if anything below fails.
+        try:
+            reserve_slot(
+                validated_data['pickup_date'],
+                validated_data['pickup_slot'],
+                validated_data['pickup_area'],
+            )
+        except SlotUnavailable as exc:
+            raise serializers.ValidationError({"pickup_slot": str(exc)})
+
         booking = Booking.objects.create(
             user            = user,
             box_type        = validated_data['box_type'],
@@ -183,12 +203,84 @@ class BookingCreateSerializer(serializers.ModelSerializer):
             pickup_address  = validated_data['pickup_address'],
             pickup_date     = validated_data['pickup_date'],
             pickup_slot     = validated_data['pickup_slot'],
+            pickup_area     = validated_data['pickup_area'],
+            slot_reserved   = True,
             referral        = referral,
             # `cost` and `reference_code` are set in model.save()
         )
+        if referral:
+            # atomic counter/reward update; safe under concurrent bookings
+            referral.track_successful_referral(booking)
         return booking
 
 
+MAX_BULK_BOOKINGS = 200
+
+
+class BulkBookingItemSerializer(BookingCreateSerializer):
+    # resolved for the whole request at once in BulkBookingSerializer.validate
+    box_type = serializers.IntegerField(min_value=1)
+
+    class Meta(BookingCreateSerializer.Meta):
+        fields = ['box_type', 'quantity', 'pickup_address', 'pickup_date', 'pickup_slot', 'pickup_area']
+        read_only_fields = []
+
+
+class BulkBookingSerializer(serializers.Serializer):
+    """
+    Many bookings made by one agent. Box types are looked up in one query,
+    each distinct pickup slot is reserved with one conditional UPDATE for
+    all of its bookings, the bookings are inserted with bulk_create and the
+    agent gets one confirmation for the lot. All or nothing.
+    """
+    bookings = BulkBookingItemSerializer(many=True, allow_empty=False, max_length=MAX_BULK_BOOKINGS)
+
+    def validate(self, data):
+        ids = {item['box_type'] for item in data['bookings']}
+        box_types = BoxType.objects.in_bulk(ids)
+        errors = [
+            {} if item['box_type'] in box_types else {'box_type': [f"Invalid pk \"{item['box_type']}\" - object does not exist."]}
+            for item in data['bookings']
+        ]
+        if any(errors):
+            raise serializers.ValidationError({'bookings': errors})
+        for item in data['bookings']:
+            item['box_type'] = box_types[item['box_type']]
+        return data
+
+    @transaction.atomic
+    def create(self, validated_data):
+        items = validated_data['bookings']
+        slots = Counter((item['pickup_date'], item['pickup_slot'], item['pickup_area']) for item in items)
+        # a fixed order, so two bulk requests lock the slot rows the same way round
+        for (pickup_date, pickup_slot, area), count in sorted(slots.items()):
+            try:
+                reserve_slot(pickup_date, pickup_slot, area, count=count)
+            except SlotUnavailable as exc:
+                raise serializers.ValidationError({'bookings': [str(exc)]})
+
+        batch = ContainerBatch.objects.filter(status='open').first()
+        user = self.context['request'].user
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                user=user,
+                batch=batch,
+                cost=(item['box_type'].volume_m3 * item['quantity'] * PRICE_PER_M3).quantize(Decimal('0.01')),
+                slot_reserved=True,
+                **item,
+            )
+            for item in items
+        ])
+        # once for the whole request, instead of per booking as in Booking.save()
+        record_bookings(bookings)
+        if batch:
+            ContainerCapacity.log_capacity(batch)
+            batch.update_volume_history()
+        booking_ids = [str(booking.id) for booking in bookings]
+        transaction.on_commit(lambda: send_bulk_booking_notifications.delay(booking_ids))
+        return bookings
+
+
 class BookingDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model  = Booking
@@ -201,12 +293,16 @@ class BookingDetailSerializer(serializers.ModelSerializer):
 
 
 class BookingTrackingSerializer(serializers.ModelSerializer):
+    box_type_name = serializers.CharField(source='box_type.name', read_only=True)
+    # Ordered timeline; the view prefetches it so this adds no queries
+    tracking = TrackingEventSerializer(many=True, read_only=True)
+
     class Meta:
         model  = Booking
         fields = [
-            'reference_code','box_type','quantity',
+            'reference_code','box_type','box_type_name','quantity',
             'pickup_address','pickup_date','pickup_slot',
-            'cost','created_at'
+            'cost','created_at','tracking'
         ]
         read_only_fields = fields
 
@@ -235,3 +331,40 @@ class ContainerCapacitySerializer(serializers.ModelSerializer):
         elif percentage >= 50:
             return 'yellow'  # Half full
         return 'green'  # Plenty of space
+
+
+class BatchVolumeSampleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BatchVolumeSample
+        fields = ['timestamp', 'volume']
+        read_only_fields = fields
+
+
+class BatchStatusPropagationSerializer(serializers.ModelSerializer):
+    percent_complete = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = BatchStatusPropagation
+        fields = [
+            'id', 'status', 'tracking_status', 'location', 'notify', 'state',
+            'total_bookings', 'processed_bookings', 'percent_complete',
+            'error_message', 'created_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+
+class BatchStatusUpdateSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=ContainerBatch.STATUS_CHOICES)
+    location = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    notify = serializers.BooleanField(required=False, default=True)
+
+
+class AgentStatsSerializer(serializers.Serializer):
+    # one day, a whole range, or one agent's line of the report
+    agent = serializers.IntegerField(required=False)
+    username = serializers.CharField(required=False)
+    date = serializers.DateField(required=False)
+    bookings = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    volume_m3 = serializers.DecimalField(max_digits=12, decimal_places=3)
+    avg_booking_value = serializers.DecimalField(max_digits=12, decimal_places=2)
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_availability
+from .models import Booking, PickupSlotCapacity
+from .rollups import record_booking
+from .slots import release_slot
+
+
+@receiver(post_delete, sender=Booking)
+def release_pickup_slot(sender, instance, **kwargs):
+    if instance.slot_reserved:
+        release_slot(instance.pickup_date, instance.pickup_slot, instance.pickup_area)
+
+
+@receiver(post_save, sender=Booking)
+def add_to_agent_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_booking(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def remove_from_agent_stats(sender, instance, **kwargs):
+    if instance.stats_recorded:
+        record_booking(instance, sign=-1)
+
+
+@receiver([post_save, post_delete], sender=PickupSlotCapacity)
+def pickup_capacity_changed(sender, instance, **kwargs):
+    # capacity edited in the admin
+    invalidate_availability(instance.area)
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import AVAILABILITY_CACHE_TTL, availability_cache_key, invalidate_availability
+from .manifests import parse_postcode
+from .models import MAX_PICKUP_DAYS, MIN_PICKUP_DAYS, PICKUP_SLOTS, PickupSlotCapacity
+
+# Slot reservation is a single conditional UPDATE
+#   reserved = reserved + n WHERE reserved <= capacity - n
+# which the database serializes per row: a burst of concurrent bookings
+# for the last place gets exactly one winner and no read-modify-write race.
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+def normalize_area(area):
+    return (area or '').strip().upper()
+
+
+def area_for_address(address):
+    """The slot area for a pickup: the outward code of its postcode, '' if it has none.
+
+    Always derived here, never taken from the client, or a full slot could be
+    dodged by booking it under a made-up area.
+    """
+    outward, _ = parse_postcode(address)
+    return normalize_area(outward)
+
+
+def reserve_slot(pickup_date, pickup_slot, area='', count=1):
+    """Take ``count`` places in the slot, all or none, or raise SlotUnavailable."""
+    area = normalize_area(area)
+    slot = PickupSlotCapacity.objects.filter(date=pickup_date, slot=pickup_slot, area=area)
+    # get_or_create handles the race on first use via the unique constraint
+    PickupSlotCapacity.objects.get_or_create(
+        date=pickup_date, slot=pickup_slot, area=area,
+        defaults={'capacity': settings.PICKUP_SLOT_CAPACITY},
+    )
+    if not slot.filter(reserved__lte=F('capacity') - count).update(reserved=F('reserved') + count):
+        if count == 1:
+            raise SlotUnavailable(f"The {pickup_slot} slot on {pickup_date} is fully booked.")
+        raise SlotUnavailable(f"The {pickup_slot} slot on {pickup_date} has fewer than {count} places left.")
+    invalidate_availability(area)
+
+
+def release_slot(pickup_date, pickup_slot, area=''):
+    """Give back a place taken by reserve_slot (e.g. when a booking is deleted)."""
+    area = normalize_area(area)
+    PickupSlotCapacity.objects.filter(
+        date=pickup_date, slot=pickup_slot, area=area, reserved__gt=0
+    ).update(reserved=F('reserved') - 1)
+    invalidate_availability(area)
+
+
+def availability(area=''):
+    """
+    Calendar of bookable slots from MIN_PICKUP_DAYS to MAX_PICKUP_DAYS ahead:
+    [{'date', 'slots': [{'slot', 'label', 'capacity', 'reserved', 'available'}]}].
+    One range query over the area's capacity rows; cached briefly and
+    dropped whenever a slot in the area is reserved or released.
+    """
+    area = normalize_area(area)
+    today = timezone.localdate()
+    start = today + timedelta(days=MIN_PICKUP_DAYS)
+    end = today + timedelta(days=MAX_PICKUP_DAYS)
+    key = availability_cache_key(area)
+    calendar = cache.get(key)
+    if calendar is not None:
+        return calendar
+
+    rows = {
+        (date, slot): (capacity, reserved)
+        for date, slot, capacity, reserved in PickupSlotCapacity.objects.filter(
+            area=area, date__range=(start, end)
+        ).values_list('date', 'slot', 'capacity', 'reserved')
+    }
+    default = settings.PICKUP_SLOT_CAPACITY
+    calendar = []
+    day = start
+    while day <= end:
+        if day.weekday() != 6:  # no pickups on Sundays
+            slots = []
+            for slot, label in PICKUP_SLOTS:
+                capacity, reserved = rows.get((day, slot), (default, 0))
+                slots.append({
+                    'slot': slot,
+                    'label': label,
+                    'capacity': capacity,
+                    'reserved': reserved,
+                    'available': max(capacity - reserved, 0),
+                })
+            calendar.append({'date': day.isoformat(), 'slots': slots})
+        day += timedelta(days=1)
+
+    cache.set(key, calendar, AVAILABILITY_CACHE_TTL)
+    return calendar
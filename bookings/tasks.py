@@ -1,12 +1,14 @@
 import os
+from datetime import date, timedelta
 from decimal import Decimal
 from celery import shared_task
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.core.mail import send_mail
-from twilio.rest import Client as TwilioClient
 
-from .models import Booking, NotificationLog, ContainerBatch
+from .models import Booking, NotificationLog, ContainerBatch, BatchStatusPropagation
+from django.db import transaction
+from django.db.models import F
 from django.template.loader import render_to_string
 from django.utils import timezone
 from notification_templates.services import NotificationService
@@ -22,8 +24,6 @@ MILESTONES = [
 CONTAINER_CAPACITY = Decimal('66.16')
 
 
-from notification_templates.services import NotificationService
-
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def send_booking_notifications(self, booking_id):
     try:
@@ -155,6 +155,8 @@ def notify_dispatch_ready():
         admin_wa = getattr(settings, 'ADMIN_WHATSAPP', None)
         if all([settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, admin_wa]):
             try:
+                from twilio.rest import Client as TwilioClient
+
                 tw_client = TwilioClient(
                     settings.TWILIO_ACCOUNT_SID,
                     settings.TWILIO_AUTH_TOKEN
@@ -180,7 +182,7 @@ def notify_dispatch_ready():
 def check_and_mark_batches():
     """
     1) Checks total booked volume.
-    2) Ensures there's a single 'open' ContainerBatch.
+    2) Ensures there's a single 'open' ContainerBatch and samples its volume.
     3) If capacity reached, marks batch ready + fires notify_dispatch_ready.
     """
     total = Booking.total_booked_volume()
@@ -190,14 +192,191 @@ def check_and_mark_batches():
         defaults={'target_volume': CONTAINER_CAPACITY}
     )
 
+    batch.update_volume_history()
+
     # If threshold reached
     if total >= CONTAINER_CAPACITY and batch.status != 'ready':
-        batch.status = 'ready'
-        batch.save()
+        batch.transition_to('ready')
         logger.info(f"ContainerBatch {batch.id} marked READY at {total} m³")
         notify_dispatch_ready.delay()
 
 
+PROPAGATION_CHUNK_SIZE = 1000
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def propagate_batch_status(self, propagation_id, chunk_size=None):
+    """
+    Apply one chunk of a batch status fan-out, then re-enqueue itself for
+    the next chunk. Each chunk is a short transaction (bulk insert of
+    tracking events, one Booking UPDATE, progress bump), so a container of
+    tens of thousands of bookings never holds locks for long and a worker
+    restart only repeats at most the chunk in flight.
+    """
+    from tracking.models import TrackingRecord
+    from .cache import invalidate_tracking
+
+    chunk_size = chunk_size or PROPAGATION_CHUNK_SIZE
+    try:
+        propagation = BatchStatusPropagation.objects.get(pk=propagation_id)
+    except BatchStatusPropagation.DoesNotExist:
+        logger.error(f'BatchStatusPropagation {propagation_id} not found')
+        return
+    if propagation.state in ('completed', 'failed'):
+        return
+
+    bookings = Booking.objects.filter(batch_id=propagation.batch_id).order_by('id')
+    if propagation.last_booking_id:
+        bookings = bookings.filter(id__gt=propagation.last_booking_id)
+    chunk = list(bookings.values_list('id', 'reference_code')[:chunk_size])
+
+    if not chunk:
+        BatchStatusPropagation.objects.filter(pk=propagation.pk).update(
+            state='completed', finished_at=timezone.now()
+        )
+        logger.info(f'Batch #{propagation.batch_id} status fan-out completed')
+        return
+
+    booking_ids = [booking_id for booking_id, _ in chunk]
+    try:
+        with transaction.atomic():
+            # Compare-and-set on the cursor, before any writes: a redelivered
+            # or duplicated copy of this task read the same cursor, finds it
+            # moved on (after waiting out this transaction's row lock) and
+            # stops instead of inserting the chunk's events again.
+            claimed = BatchStatusPropagation.objects.filter(
+                pk=propagation.pk, last_booking_id=propagation.last_booking_id,
+            ).update(
+                state='running',
+                processed_bookings=F('processed_bookings') + len(booking_ids),
+                last_booking_id=booking_ids[-1],
+            )
+            if not claimed:
+                logger.info(f'Batch #{propagation.batch_id} chunk already applied; dropping duplicate task')
+                return
+            records = TrackingRecord.objects.bulk_create([
+                TrackingRecord(
+                    booking_id=booking_id,
+                    status=propagation.tracking_status,
+                    location=propagation.location,
+                )
+                for booking_id in booking_ids
+            ])
+            Booking.objects.filter(id__in=booking_ids).update(
+                current_status=propagation.tracking_status,
+                current_location=propagation.location,
+                status_updated_at=records[-1].timestamp,
+            )
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            BatchStatusPropagation.objects.filter(pk=propagation.pk).update(
+                state='failed', error_message=str(exc), finished_at=timezone.now()
+            )
+            logger.exception(f'Batch #{propagation.batch_id} status fan-out failed')
+            return
+        raise self.retry(exc=exc)
+
+    invalidate_tracking(*[code for _, code in chunk])
+    if propagation.notify:
+        send_batch_status_notifications.delay(propagation.pk, [str(pk) for pk in booking_ids])
+    propagate_batch_status.delay(propagation.pk, chunk_size)
+
+
+@shared_task
+def send_batch_status_notifications(propagation_id, booking_ids):
+    """
+    Email each booking's owner about a batch status change. Failures are
+    logged per recipient and not retried, so one bad address doesn't
+    re-notify the whole chunk.
+    """
+    try:
+        propagation = BatchStatusPropagation.objects.get(pk=propagation_id)
+    except BatchStatusPropagation.DoesNotExist:
+        logger.error(f'BatchStatusPropagation {propagation_id} not found')
+        return
+
+    notification_service = NotificationService()
+    logs = []
+    bookings = (
+        Booking.objects.filter(id__in=booking_ids, user__isnull=False)
+        .select_related('user')
+        .only('id', 'reference_code', 'user__email',
+              'user__username', 'user__first_name', 'user__last_name')
+    )
+    for booking in bookings:
+        context = {
+            'user_name': booking.user.get_full_name() or booking.user.username,
+            'reference_code': booking.reference_code,
+            'status': propagation.tracking_status,
+            'location': propagation.location,
+            'tracking_url': f'{settings.FRONTEND_URL}/track/{booking.reference_code}',
+        }
+        recipient = booking.user.email
+        if not recipient:
+            continue
+        try:
+            notification_service.send_notification('batch_status_update_email', recipient, context)
+            logs.append(NotificationLog(
+                booking=booking, channel='email', recipient=recipient,
+                status='success', payload=str(context),
+            ))
+        except Exception as exc:
+            logs.append(NotificationLog(
+                booking=booking, channel='email', recipient=recipient,
+                status='failed', error_message=str(exc), payload=str(context),
+            ))
+    NotificationLog.objects.bulk_create(logs)
+
+
+@shared_task
+def send_bulk_booking_notifications(booking_ids):
+    """
+    One confirmation email per booker for bookings made together through
+    the bulk endpoint, listing every reference, instead of a task and an
+    email per booking.
+    """
+    notification_service = NotificationService()
+    bookings = (
+        Booking.objects.filter(id__in=booking_ids, user__isnull=False)
+        .select_related('user', 'box_type')
+        .order_by('user_id', 'pickup_date', 'reference_code')
+    )
+    by_user = {}
+    for booking in bookings:
+        by_user.setdefault(booking.user_id, []).append(booking)
+
+    logs = []
+    for user_bookings in by_user.values():
+        user = user_bookings[0].user
+        if not user.email:
+            continue
+        context = {
+            'user_name': user.get_full_name() or user.username,
+            'count': len(user_bookings),
+            'bookings': [
+                {
+                    'reference_code': booking.reference_code,
+                    'pickup_date': booking.pickup_date.strftime('%Y-%m-%d'),
+                    'pickup_slot': booking.pickup_slot,
+                    'box_type': str(booking.box_type),
+                    'quantity': booking.quantity,
+                    'tracking_url': f'{settings.FRONTEND_URL}/track/{booking.reference_code}',
+                }
+                for booking in user_bookings
+            ],
+        }
+        try:
+            notification_service.send_notification('bulk_booking_confirmation_email', user.email, context)
+            result = {'status': 'success'}
+        except Exception as exc:
+            result = {'status': 'failed', 'error_message': str(exc)}
+        logs += [
+            NotificationLog(booking=booking, channel='email', recipient=user.email, payload=str(context), **result)
+            for booking in user_bookings
+        ]
+    NotificationLog.objects.bulk_create(logs)
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def send_notification(self, recipient, template_name, context=None, channel='email'):
     notification_service = NotificationService()
@@ -223,3 +402,53 @@ def send_notification(self, recipient, template_name, context=None, channel='ema
             error_message=str(exc)
         )
         raise self.retry(exc=exc)
+
+
+@shared_task
+def refresh_capacity_forecasts():
+    """Recompute and cache the fill-date forecast of every open batch."""
+    from .forecasting import refresh_forecast
+
+    forecasts = [refresh_forecast(batch) for batch in ContainerBatch.objects.filter(status='open')]
+    for forecast in forecasts:
+        logger.info(
+            f"Batch {forecast['batch']} forecast to fill on {forecast['estimated_fill_date']} "
+            f"({forecast['remaining_volume_m3']} m³ left)"
+        )
+    return len(forecasts)
+
+
+@shared_task
+def generate_pickup_manifests(pickup_date=None):
+    """
+    Build the driver manifests for ``pickup_date`` (ISO date; default
+    tomorrow) and store them as CSV and PDF under manifests/<date>/.
+    """
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from .manifests import build_manifests, render_csv
+    # ReportLab is heavy; only load it in workers that actually render PDFs
+    from .pdf_generator import generate_pickup_manifest
+
+    day = (
+        date.fromisoformat(pickup_date) if pickup_date
+        else timezone.localdate() + timedelta(days=1)
+    )
+    manifests = build_manifests(day)
+    files = {}
+    for ext, content in (
+        ('csv', render_csv(manifests).encode('utf-8')),
+        ('pdf', generate_pickup_manifest(manifests).getvalue()),
+    ):
+        name = manifest_path(day, ext)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        files[ext] = default_storage.save(name, ContentFile(content))
+
+    stops = sum(len(manifest['stops']) for manifest in manifests)
+    logger.info(f'Pickup manifests for {day}: {len(manifests)} runs, {stops} stops')
+    return {'pickup_date': day.isoformat(), 'runs': len(manifests), 'stops': stops, 'files': files}
+
+
+def manifest_path(day, ext):
+    return f'manifests/{day.isoformat()}/pickups.{ext}'
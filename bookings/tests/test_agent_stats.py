@@ -0,0 +1,134 @@
+import io
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import AgentDailyStats, Booking, BoxType
+from bookings.rollups import leaderboard
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def box_type():
+    return BoxType.objects.create(
+        name='Medium', length_cm=50, width_cm=40, height_cm=30,
+        price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+    )
+
+
+@pytest.fixture
+def agent():
+    return User.objects.create_user('agent', 'agent@example.com', 'pass', is_agent=True)
+
+
+def book(user, box_type, cost, quantity=1):
+    with patch('bookings.models.send_booking_notifications.delay'):
+        return Booking.objects.create(
+            user=user, box_type=box_type, quantity=quantity, pickup_address='1 High St',
+            pickup_date=timezone.localdate() + timedelta(days=2), pickup_slot='morning',
+            cost=Decimal(cost),
+        )
+
+
+def test_bookings_roll_up_incrementally(agent, box_type):
+    customer = User.objects.create_user('customer', 'c@example.com', 'pass')
+    book(agent, box_type, '30.00', quantity=2)
+    book(agent, box_type, '15.00')
+    book(customer, box_type, '99.00')
+
+    row = AgentDailyStats.objects.get()
+    assert (row.agent, row.date) == (agent, timezone.localdate())
+    assert row.bookings == 2
+    assert row.revenue == Decimal('45.00')
+    assert row.volume_cm3 == 3 * 50 * 40 * 30
+    assert row.avg_booking_value == Decimal('22.50')
+
+    Booking.objects.filter(cost=Decimal('15.00')).get().delete()
+    row.refresh_from_db()
+    assert (row.bookings, row.revenue) == (1, Decimal('30.00'))
+
+
+def test_deleting_an_uncounted_booking_leaves_rollups_alone(box_type):
+    user = User.objects.create_user('later', 'later@example.com', 'pass')
+    booking = book(user, box_type, '20.00')
+    user.is_agent = True
+    user.save()
+
+    booking.delete()
+    assert not AgentDailyStats.objects.exists()
+
+    counted = book(user, box_type, '10.00')
+    Booking.objects.bulk_create([Booking(
+        user=user, box_type=box_type, pickup_address='2 High St', pickup_date=counted.pickup_date,
+        pickup_slot='morning', cost=Decimal('5.00'),
+    )])
+    Booking.objects.all().delete()
+    row = AgentDailyStats.objects.get()
+    assert (row.bookings, row.revenue, row.volume_cm3) == (0, Decimal('0.00'), 0)
+
+
+def test_counted_booking_is_removed_after_agent_status_ends(agent, box_type):
+    book(agent, box_type, '30.00', quantity=2)
+    kept = book(agent, box_type, '15.00')
+    assert kept.stats_recorded
+    agent.is_agent = False
+    agent.save()
+
+    Booking.objects.get(pk=kept.pk).delete()
+    row = AgentDailyStats.objects.get()
+    assert (row.bookings, row.revenue, row.volume_cm3) == (1, Decimal('30.00'), 2 * 50 * 40 * 30)
+
+
+def test_range_report_reads_only_rollups(agent, box_type, django_assert_num_queries):
+    other = User.objects.create_user('other', 'o@example.com', 'pass', is_agent=True)
+    today = timezone.localdate()
+    AgentDailyStats.objects.bulk_create([
+        AgentDailyStats(agent=agent, date=today - timedelta(days=i), bookings=2, revenue=Decimal('40'))
+        for i in range(400)
+    ] + [AgentDailyStats(agent=other, date=today, bookings=1, revenue=Decimal('500'))])
+
+    with django_assert_num_queries(1):
+        rows = leaderboard(today - timedelta(days=364), today)
+    assert [row['username'] for row in rows] == ['agent', 'other']
+    assert (rows[0]['bookings'], rows[0]['revenue']) == (730, Decimal('14600'))
+    assert rows[0]['avg_booking_value'] == Decimal('20.00')
+
+
+def test_agent_stats_endpoint(agent, box_type):
+    book(agent, box_type, '30.00')
+    client = APIClient()
+    client.force_authenticate(agent)
+
+    body = client.get(reverse('agent-stats')).json()
+    assert body['totals']['bookings'] == 1
+    assert body['totals']['revenue'] == '30.00'
+    assert body['totals']['volume_m3'] == '0.060'
+    assert [day['date'] for day in body['days']] == [timezone.localdate().isoformat()]
+
+    assert client.get(reverse('agent-stats'), {'start': '2020-02-01', 'end': '2020-01-01'}).status_code == 400
+    client.force_authenticate(User.objects.create_user('customer', 'c@example.com', 'pass'))
+    assert client.get(reverse('agent-stats')).status_code == 403
+
+
+def test_admin_report_and_rebuild(agent, box_type):
+    booking = book(agent, box_type, '30.00')
+    Booking.objects.filter(pk=booking.pk).update(created_at=timezone.now() - timedelta(days=3))
+    AgentDailyStats.objects.all().delete()
+    call_command('rebuild_agent_stats', stdout=io.StringIO())
+
+    client = APIClient()
+    client.force_authenticate(User.objects.create_superuser('admin', 'a@example.com', 'pass'))
+    body = client.get(reverse('agent-stats-report'), {'limit': '5'}).json()
+    assert body['agents'] == [{
+        'agent': agent.pk, 'username': 'agent', 'bookings': 1, 'revenue': '30.00',
+        'volume_m3': '0.060', 'avg_booking_value': '30.00',
+    }]
+    assert AgentDailyStats.objects.get().date == timezone.localdate() - timedelta(days=3)
@@ -0,0 +1,133 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bookings import tasks
+from bookings.models import BatchStatusPropagation, Booking, BoxType, ContainerBatch, NotificationLog
+from tracking.models import TrackingRecord
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def batch():
+    return ContainerBatch.objects.create(status='ready')
+
+
+@pytest.fixture
+def bookings(batch):
+    box_type = BoxType.objects.create(
+        name='Medium', length_cm=20, width_cm=20, height_cm=20,
+        price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+    )
+    users = [User.objects.create_user(username=f'customer{i}', email=f'c{i}@x.com', password='pass') for i in range(2)]
+    return Booking.objects.bulk_create([
+        Booking(
+            reference_code=f'BAT{i:09d}', box_type=box_type, quantity=1, batch=batch,
+            user=users[i % 2] if i < 4 else None,
+            pickup_address='1 Dock Rd', pickup_date='2025-08-01',
+            pickup_slot='morning', cost=Decimal('3.63'),
+        )
+        for i in range(25)
+    ])
+
+
+@pytest.fixture
+def templates():
+    call_command('loaddata', 'default_templates', verbosity=0)
+
+
+def test_new_booking_joins_open_batch():
+    batch = ContainerBatch.objects.create(status='open')
+    box_type = BoxType.objects.create(
+        name='Small', length_cm=10, width_cm=10, height_cm=10,
+        price_per_kg=Decimal('1.00'), price_per_box=Decimal('5.00'),
+    )
+    with patch('bookings.models.send_booking_notifications.delay'):
+        booking = Booking.objects.create(
+            box_type=box_type, quantity=1, pickup_address='x',
+            pickup_date='2025-08-01', pickup_slot='morning', cost=Decimal('0.45'),
+        )
+    assert booking.batch == batch
+
+
+def test_transition_fans_out_in_chunks(batch, bookings, templates, django_capture_on_commit_callbacks):
+    with patch.object(tasks, 'PROPAGATION_CHUNK_SIZE', 10), \
+            patch.object(tasks.send_batch_status_notifications, 'delay',
+                         wraps=tasks.send_batch_status_notifications.delay) as notify, \
+            django_capture_on_commit_callbacks(execute=True):
+        propagation = batch.transition_to('dispatched', location='Felixstowe')
+
+    assert notify.call_count == 3  # 10 + 10 + 5
+
+    propagation.refresh_from_db()
+    assert propagation.state == 'completed'
+    assert (propagation.processed_bookings, propagation.total_bookings) == (25, 25)
+    assert propagation.percent_complete == 100.0
+
+    assert TrackingRecord.objects.filter(status='Dispatched', location='Felixstowe').count() == 25
+    assert Booking.objects.filter(current_status='Dispatched').count() == 25
+    # 4 bookings have an owner; unassigned bookings aren't notified
+    assert len(mail.outbox) == 4
+    assert NotificationLog.objects.filter(status='success').count() == 4
+
+
+def test_transition_is_compare_and_set(batch, bookings):
+    stale = ContainerBatch.objects.get(pk=batch.pk)
+    with patch.object(tasks.propagate_batch_status, 'delay'):
+        assert batch.transition_to('dispatched') is not None
+        assert stale.transition_to('dispatched') is None
+        assert batch.transition_to('dispatched') is None
+    assert BatchStatusPropagation.objects.count() == 1
+
+
+def test_propagation_resumes_from_cursor(batch, bookings):
+    with patch.object(tasks.propagate_batch_status, 'delay'):
+        propagation = batch.transition_to('dispatched', notify=False)
+        # first chunk only; the re-enqueue is swallowed as if the worker died
+        tasks.propagate_batch_status(propagation.pk, chunk_size=10)
+    propagation.refresh_from_db()
+    assert (propagation.state, propagation.processed_bookings) == ('running', 10)
+
+    tasks.propagate_batch_status(propagation.pk, chunk_size=10)
+    propagation.refresh_from_db()
+    assert propagation.state == 'completed'
+    assert TrackingRecord.objects.count() == 25
+
+
+def test_duplicate_chunk_is_dropped(batch, bookings):
+    with patch.object(tasks.propagate_batch_status, 'delay') as requeue:
+        propagation = batch.transition_to('dispatched', notify=False)
+        stale = BatchStatusPropagation.objects.get(pk=propagation.pk)
+        tasks.propagate_batch_status(propagation.pk, chunk_size=10)
+        # a redelivered copy that read the cursor before the first one moved it
+        with patch.object(BatchStatusPropagation.objects, 'get', return_value=stale):
+            tasks.propagate_batch_status(propagation.pk, chunk_size=10)
+    assert requeue.call_count == 1
+    assert TrackingRecord.objects.count() == 10
+    propagation.refresh_from_db()
+    assert propagation.processed_bookings == 10
+
+
+def test_batch_status_api(batch, bookings, django_capture_on_commit_callbacks):
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_superuser(username='admin', password='pass'))
+    url = reverse('batch-status', kwargs={'pk': batch.pk})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = client.post(url, {'status': 'dispatched', 'notify': False}, format='json')
+    assert resp.status_code == 202
+
+    data = client.get(url).json()
+    assert data['status'] == 'dispatched'
+    assert data['propagation']['state'] == 'completed'
+    assert data['propagation']['processed_bookings'] == 25
+
+    assert client.post(url, {'status': 'dispatched'}, format='json').status_code == 409
+    assert client.post(url, {'status': 'sunk'}, format='json').status_code == 400
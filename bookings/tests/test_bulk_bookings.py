@@ -0,0 +1,151 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import (
+    MIN_PICKUP_DAYS, AgentDailyStats, Booking, BoxType, ContainerBatch, ContainerCapacity,
+    NotificationLog, PickupSlotCapacity,
+)
+from bookings.tasks import send_bulk_booking_notifications
+from notification_templates.models import NotificationTemplate
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def pickup_date():
+    day = timezone.localdate() + timedelta(days=MIN_PICKUP_DAYS + 1)
+    return day if day.weekday() != 6 else day + timedelta(days=1)
+
+
+@pytest.fixture
+def box_types():
+    return [
+        BoxType.objects.create(
+            name=name, length_cm=side, width_cm=side, height_cm=side,
+            price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+        )
+        for name, side in (('Small', 50), ('Large', 100))
+    ]
+
+
+@pytest.fixture
+def agent_client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('agent', 'agent@example.com', 'pass', is_agent=True))
+    return client
+
+
+def items(box_types, pickup_date, count, slot='morning'):
+    return [
+        {
+            'box_type': box_types[i % 2].id, 'quantity': 1, 'pickup_address': f'{i} High St',
+            'pickup_date': pickup_date.isoformat(), 'pickup_slot': slot,
+        }
+        for i in range(count)
+    ]
+
+
+def post(client, bookings):
+    with patch('bookings.serializers.send_bulk_booking_notifications.delay') as notify:
+        response = client.post(reverse('booking-bulk'), {'bookings': bookings}, format='json')
+    return response, notify
+
+
+def test_bulk_booking(agent_client, box_types, pickup_date, django_capture_on_commit_callbacks):
+    ContainerBatch.objects.create(target_volume=Decimal('66.16'))
+    bookings = items(box_types, pickup_date, 3) + items(box_types, pickup_date, 2, slot='evening')
+    with patch('bookings.serializers.send_bulk_booking_notifications.delay') as notify, \
+            django_capture_on_commit_callbacks(execute=True):
+        response = agent_client.post(reverse('booking-bulk'), {'bookings': bookings}, format='json')
+
+    assert response.status_code == 201
+    created = response.json()['bookings']
+    assert len(created) == 5
+    assert created[0]['cost'] == '56.71'  # 0.125 m³
+    assert dict(PickupSlotCapacity.objects.values_list('slot', 'reserved')) == {'morning': 3, 'evening': 2}
+    assert ContainerCapacity.objects.count() == 1
+    assert Booking.objects.filter(batch__isnull=False).count() == 5
+    assert AgentDailyStats.objects.get().bookings == 5
+    assert not Booking.objects.filter(stats_recorded=False).exists()
+    notify.assert_called_once()
+    assert sorted(notify.call_args.args[0]) == sorted(row['id'] for row in created)
+
+
+def test_queries_do_not_grow_with_bookings(agent_client, box_types, pickup_date, settings):
+    settings.PICKUP_SLOT_CAPACITY = 100
+    post(agent_client, items(box_types, pickup_date, 1))  # creates the slot and stats rows
+    counts = []
+    for count in (2, 20):
+        with CaptureQueriesContext(connection) as queries:
+            response, _ = post(agent_client, items(box_types, pickup_date, count))
+        assert response.status_code == 201
+        counts.append(len(queries))
+    assert counts[0] == counts[1]
+
+
+def test_full_slot_rejects_the_whole_request(agent_client, box_types, pickup_date, settings):
+    settings.PICKUP_SLOT_CAPACITY = 3
+    bookings = items(box_types, pickup_date, 2, slot='evening') + items(box_types, pickup_date, 4)
+    response, notify = post(agent_client, bookings)
+
+    assert response.status_code == 400
+    assert 'fewer than 4 places' in response.json()['bookings'][0]
+    assert not Booking.objects.exists()
+    assert not PickupSlotCapacity.objects.filter(reserved__gt=0).exists()
+    notify.assert_not_called()
+
+
+def test_invalid_items_are_reported_by_position(agent_client, box_types, pickup_date):
+    bookings = items(box_types, pickup_date, 3)
+    bookings[1]['box_type'] = 9999
+    response, _ = post(agent_client, bookings)
+
+    assert response.status_code == 400
+    errors = response.json()['bookings']
+    assert errors[0] == {} and errors[2] == {}
+    assert 'box_type' in errors[1]
+
+
+def test_only_agents_book_in_bulk(box_types, pickup_date):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('customer', 'c@example.com', 'pass'))
+    response, _ = post(client, items(box_types, pickup_date, 1))
+    assert response.status_code == 403
+
+
+def test_one_email_per_agent(box_types, pickup_date, settings):
+    settings.FRONTEND_URL = 'https://example.com'
+    NotificationTemplate.objects.create(
+        name='bulk_booking_confirmation_email', channel='email', subject='{{count}} bookings',
+        body='{% for booking in bookings %}{{booking.reference_code}} {% endfor %}',
+    )
+    agent = User.objects.create_user('agent', 'agent@example.com', 'pass', is_agent=True)
+    bookings = Booking.objects.bulk_create([
+        Booking(user=agent, box_type=box_types[0], pickup_address='1 High St', pickup_date=pickup_date,
+                pickup_slot='morning', cost=Decimal('10.00'))
+        for _ in range(3)
+    ])
+
+    send_bulk_booking_notifications([str(booking.id) for booking in bookings])
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].subject == '3 bookings'
+    assert all(booking.reference_code in mail.outbox[0].body for booking in bookings)
+    assert NotificationLog.objects.filter(status='success').count() == 3
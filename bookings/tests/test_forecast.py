@@ -0,0 +1,107 @@
+import time
+import numpy as np
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.forecasting import compute_forecast, get_forecast, project_fill, weekday_rates
+from bookings.models import Booking, BoxType, ContainerBatch
+from bookings.tasks import refresh_capacity_forecasts
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_weekday_rates_weight_recent_weeks():
+    days = np.arange(np.datetime64('2030-01-07'), np.datetime64('2030-03-04'))  # Mondays to a Sunday
+    volumes = np.where((days - days[0]).astype(int) % 7 == 0, 2.0, 0.0)
+    mean, std = weekday_rates(days, volumes)
+    assert mean[0] == pytest.approx(2.0) and std[0] == pytest.approx(0.0)
+    assert mean[1:].sum() == 0
+
+    # Mondays jumped to 4 m³ in the last fortnight: the weighted rate leans that way
+    volumes[-7] = volumes[-14] = 4.0
+    mean, _ = weekday_rates(days, volumes, half_life_days=14)
+    assert 3.0 < mean[0] < 4.0
+
+
+def test_project_fill_band():
+    mean = np.full(7, 1.0)
+    assert project_fill(10, mean, np.zeros(7), date(2030, 1, 1)) == (date(2030, 1, 10),) * 3
+
+    expected, earliest, latest = project_fill(10, mean, np.full(7, 1.0), date(2030, 1, 1))
+    assert earliest < expected == date(2030, 1, 10) < latest
+    # nothing is booked on Sundays, nothing fills within the horizon at zero velocity
+    assert project_fill(1, np.zeros(7), np.zeros(7), date(2030, 1, 1), horizon=30) == (None,) * 3
+
+
+def test_years_of_history_compute_in_milliseconds():
+    days = np.arange(np.datetime64('2027-01-01'), np.datetime64('2030-01-01'))
+    volumes = np.random.default_rng(0).gamma(2.0, 0.5, len(days))
+    start = time.perf_counter()
+    mean, std = weekday_rates(days, volumes)
+    expected, earliest, latest = project_fill(60, mean, std, date(2030, 1, 1))
+    assert time.perf_counter() - start < 0.05
+    assert earliest <= expected <= latest
+
+
+@pytest.fixture
+def history():
+    """Four weeks of 0.25 m³ a day (two 50cm cubes) in an open 15 m³ batch."""
+    box_type = BoxType.objects.create(
+        name='Medium', length_cm=50, width_cm=50, height_cm=50,
+        price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+    )
+    batch = ContainerBatch.objects.create(status='open', target_volume=Decimal('15.00'))
+    today = timezone.localdate()
+    bookings = Booking.objects.bulk_create([
+        Booking(
+            reference_code=f'FC{i:010d}', box_type=box_type, quantity=2, batch=batch,
+            pickup_address='1 Dock Rd', pickup_date=today, pickup_slot='morning',
+            cost=Decimal('113.42'),
+        )
+        for i in range(28)
+    ])
+    for age, booking in enumerate(bookings, start=1):
+        created = timezone.make_aware(datetime.combine(today - timedelta(days=age), datetime.min.time()))
+        Booking.objects.filter(pk=booking.pk).update(created_at=created + timedelta(hours=12))
+    return batch
+
+
+def test_compute_forecast(history):
+    today = timezone.localdate()
+    forecast = compute_forecast(history)
+    assert forecast['booked_volume_m3'] == 7.0
+    assert forecast['remaining_volume_m3'] == 8.0
+    assert forecast['history_days'] == 28
+    assert forecast['daily_rate_m3'] == 0.25
+    assert forecast['estimated_fill_date'] == today + timedelta(days=32)
+    assert forecast['fill_date_earliest'] == forecast['fill_date_latest'] == today + timedelta(days=32)
+
+
+def test_full_batch_fills_today(history):
+    history.target_volume = Decimal('5.00')
+    assert compute_forecast(history)['estimated_fill_date'] == timezone.localdate()
+
+
+def test_forecast_is_cached_and_refreshed_by_task(history, django_assert_num_queries):
+    assert refresh_capacity_forecasts() == 1
+    with django_assert_num_queries(0):
+        forecast = get_forecast(history)
+    assert forecast['batch'] == history.id
+
+    resp = APIClient().get(reverse('capacity-forecast'))
+    assert resp.status_code == 200
+    assert resp.json()['estimated_fill_date'] == forecast['estimated_fill_date'].isoformat()
+    assert APIClient().get(reverse('capacity-forecast'), {'batch': 'x'}).status_code == 400
+    assert APIClient().get(reverse('capacity-forecast'), {'batch': history.id + 1}).status_code == 404
@@ -0,0 +1,155 @@
+import io
+import time
+import pytest
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bookings import packing
+from bookings.models import Booking, BoxType, ContainerBatch
+from bookings.packing import get_load_plan, pack, summarize
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+CONTAINER = [1203, 235, 239]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def batch():
+    return ContainerBatch.objects.create(status='open')
+
+
+@pytest.fixture
+def box_types():
+    return [
+        BoxType.objects.create(
+            name=name, length_cm=l, width_cm=w, height_cm=h,
+            price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+        )
+        for name, l, w, h in [('Small', 45, 45, 45), ('Large', 60, 60, 60), ('TV', 110, 70, 20)]
+    ]
+
+
+def add_bookings(batch, box_type, count, quantity=1):
+    start = Booking.objects.count()
+    return Booking.objects.bulk_create([
+        Booking(
+            reference_code=f'LP{start + i:010d}', box_type=box_type, quantity=quantity, batch=batch,
+            pickup_address='1 Dock Rd', pickup_date='2025-08-01', pickup_slot='morning',
+            cost=Decimal('41.34'),
+        )
+        for i in range(count)
+    ])
+
+
+def overlaps(a, b):
+    return all(a[0][i] < b[1][i] and b[0][i] < a[1][i] for i in range(3))
+
+
+def assert_valid(plan):
+    cuboids = []
+    for type_id, x, y, z, d, w, h, cols, rows in plan['blocks']:
+        assert sorted((d, w, h)) == sorted(plan['dims'][type_id])
+        low, high = (x, y, z), (x + d, y + cols * w, z + rows * h)
+        assert all(0 <= low[i] and high[i] <= plan['container'][i] for i in range(3))
+        cuboids.append((low, high))
+    for i, a in enumerate(cuboids):
+        assert not any(overlaps(a, b) for b in cuboids[i + 1:])
+    placed = {}
+    for block in plan['blocks']:
+        placed[block[0]] = placed.get(block[0], 0) + block[7] * block[8]
+    assert placed == plan['placed']
+
+
+def test_small_batch_fits(batch, box_types):
+    small, large, tv = box_types
+    add_bookings(batch, small, 20, quantity=2)
+    add_bookings(batch, tv, 5)
+    plan = get_load_plan(batch)
+    assert_valid(plan)
+    summary = summarize(plan)
+    assert summary['fits'] and summary['boxes_placed'] == 45
+    assert summary['packed_volume_m3'] == summary['booked_volume_m3']
+    assert summary['effective_capacity_m3'] < summary['container_volume_m3']
+
+
+def test_overfull_container_reports_unplaced():
+    plan = pack({1: (60, 60, 60)}, {1: 400}, CONTAINER)
+    assert_valid(plan)
+    summary = summarize(plan)
+    # 20 walls of 3 x 3 cubes, and the gap above each column is too small
+    assert summary['boxes_placed'] == 180
+    assert summary['unplaced'] == {1: 220} and not summary['fits']
+
+
+def test_added_bookings_extend_cached_plan(batch, box_types, monkeypatch):
+    small, large, _ = box_types
+    add_bookings(batch, small, 10)
+    plan = get_load_plan(batch)
+    blocks = [list(block) for block in plan['blocks']]
+
+    def no_repack(*args, **kwargs):
+        raise AssertionError('plan was rebuilt')
+
+    monkeypatch.setattr(packing, 'pack', no_repack)
+    add_bookings(batch, large, 4)
+    plan = get_load_plan(batch)
+    # earlier placements are kept, new boxes are added around them
+    assert plan['blocks'][:len(blocks)] == blocks
+    assert plan['placed'] == {small.id: 10, large.id: 4}
+    assert_valid(plan)
+
+
+def test_removed_booking_rebuilds_plan(batch, box_types):
+    small, large, _ = box_types
+    add_bookings(batch, small, 10)
+    add_bookings(batch, large, 1)
+    get_load_plan(batch)
+    Booking.objects.filter(box_type=large).delete()
+    plan = get_load_plan(batch)
+    assert plan['counts'] == {small.id: 10}
+    assert_valid(plan)
+
+
+def test_thousands_of_boxes_pack_quickly(batch, box_types):
+    for box_type in box_types:
+        add_bookings(batch, box_type, 500, quantity=3)
+    start = time.perf_counter()
+    plan = get_load_plan(batch)
+    assert time.perf_counter() - start < 1
+    assert_valid(plan)
+    summary = summarize(plan)
+    assert summary['boxes_requested'] == 4500
+    assert summary['utilization'] > Decimal('0.8')
+
+
+def test_load_plan_endpoint(batch, box_types):
+    add_bookings(batch, box_types[0], 3)
+    client = APIClient()
+    url = reverse('batch-load-plan', args=[batch.id])
+    client.force_authenticate(user=User.objects.create_user(username='customer', password='pass'))
+    assert client.get(url).status_code == 403
+
+    client.force_authenticate(user=User.objects.create_superuser(username='admin', password='pass'))
+    data = client.get(url).json()
+    assert data['batch'] == batch.id and data['fits'] is True
+    assert 'blocks' not in data
+    blocks = client.get(url, {'blocks': 1}).json()['blocks']
+    assert sum(block['cols'] * block['rows'] for block in blocks) == 3
+
+
+def test_benchmark_command():
+    out = io.StringIO()
+    call_command('benchmark_load_plan', boxes=500, repeat=1, stdout=out)
+    assert 'Full pack of 500 boxes' in out.getvalue()
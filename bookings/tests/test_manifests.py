@@ -0,0 +1,145 @@
+import csv
+import io
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bookings.manifests import build_manifests, nearest_neighbour, parse_postcode, render_csv
+from bookings.models import Booking, BoxType, PostcodeGeocode
+from bookings.pdf_generator import generate_pickup_manifest
+from bookings.tasks import generate_pickup_manifests
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+DAY = date(2030, 3, 5)
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def day_of_bookings():
+    box_type = BoxType.objects.create(
+        name='Medium', length_cm=50, width_cm=50, height_cm=50,
+        price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+    )
+    PostcodeGeocode.objects.bulk_create([
+        PostcodeGeocode(postcode='SE15AA', latitude=51.500, longitude=-0.090),
+        PostcodeGeocode(postcode='SE19ZZ', latitude=51.503, longitude=-0.100),
+        PostcodeGeocode(postcode='SE1', latitude=51.498, longitude=-0.089),
+        PostcodeGeocode(postcode='E14', latitude=51.507, longitude=-0.020),
+    ])
+    addresses = [
+        ('morning', '9 Far St, London SE1 9ZZ'),
+        ('morning', '1 Near St, London SE1 5AA'),
+        ('morning', '3 Centroid Rd, London se1 7qq'),   # no exact geocode
+        ('morning', 'Somewhere without a postcode'),
+        ('afternoon', '10 Dock Rd, London E14 3AB'),
+        ('evening', '2 Near St, London SE1 5AA'),
+    ]
+    Booking.objects.bulk_create([
+        Booking(
+            reference_code=f'MAN{i:09d}', box_type=box_type, quantity=2,
+            pickup_address=address, pickup_date=DAY, pickup_slot=slot,
+            cost=Decimal('113.42'),
+        )
+        for i, (slot, address) in enumerate(addresses)
+    ] + [
+        Booking(
+            reference_code='OTHERDAY0001', box_type=box_type, quantity=1,
+            pickup_address='1 Near St, London SE1 5AA', pickup_date=date(2030, 3, 6),
+            pickup_slot='morning', cost=Decimal('56.71'),
+        )
+    ])
+
+
+def test_parse_postcode():
+    assert parse_postcode('Flat 2, 10 Dock Rd, London e14 3ab') == ('E14', 'E143AB')
+    assert parse_postcode('no postcode here') == (None, None)
+
+
+def test_nearest_neighbour_orders_by_distance():
+    stops = [
+        {'pickup_address': 'c', 'coords': (51.6, 0.0)},
+        {'pickup_address': 'x', 'coords': None},
+        {'pickup_address': 'a', 'coords': (51.4, 0.0)},
+        {'pickup_address': 'b', 'coords': (51.5, 0.0)},
+    ]
+    route = nearest_neighbour(stops, start=(51.39, 0.0))
+    assert [stop['pickup_address'] for stop in route] == ['a', 'b', 'c', 'x']
+    assert route[-1]['leg_km'] is None
+
+
+def test_build_manifests_groups_and_orders(day_of_bookings, django_assert_num_queries):
+    # one booking query, one geocode query
+    with django_assert_num_queries(2):
+        manifests = build_manifests(DAY)
+
+    assert [(m['pickup_slot'], m['area']) for m in manifests] == [
+        ('morning', 'SE1'), ('morning', 'UNKNOWN'), ('afternoon', 'E14'), ('evening', 'SE1'),
+    ]
+    se1 = manifests[0]
+    # starts at the first located stop, then always the closest next one
+    assert [stop['postcode'] for stop in se1['stops']] == ['SE19ZZ', 'SE15AA', 'SE17QQ']
+    assert se1['stops'][2]['coords'] == (51.498, -0.089)  # outward-code centroid
+    assert [stop['stop'] for stop in se1['stops']] == [1, 2, 3]
+    assert se1['total_km'] > 0
+    assert sum(len(m['stops']) for m in manifests) == 6
+
+
+def test_render_csv(day_of_bookings):
+    rows = list(csv.DictReader(io.StringIO(render_csv(build_manifests(DAY)))))
+    assert len(rows) == 6
+    assert rows[0]['area'] == 'SE1' and rows[0]['stop'] == '1'
+    assert rows[0]['volume_m3'] == '0.250'
+
+
+def test_generate_task_stores_csv_and_pdf(day_of_bookings):
+    result = generate_pickup_manifests(DAY.isoformat())
+    assert (result['runs'], result['stops']) == (4, 6)
+    with default_storage.open(result['files']['pdf']) as fh:
+        assert fh.read(4) == b'%PDF'
+    # re-running replaces the files instead of adding suffixed copies
+    assert generate_pickup_manifests(DAY.isoformat())['files'] == result['files']
+
+
+def test_pdf_prints_markup_characters_as_text(monkeypatch):
+    monkeypatch.setattr('reportlab.rl_config.pageCompression', 0)
+    manifests = [{
+        'pickup_date': DAY, 'pickup_slot': 'morning', 'area': 'A & B', 'total_km': 1.2,
+        'stops': [{
+            'stop': 1, 'reference_code': 'CG-1', 'customer': 'ama', 'pickup_address': 'Unit <b>2, A & B Road',
+            'quantity': 1, 'box_type': 'Medium', 'volume_m3': Decimal('0.125'), 'leg_km': None,
+        }],
+    }]
+    pdf = generate_pickup_manifest(manifests).getvalue()
+    # printed as typed, not parsed as markup
+    assert b'A & B)' in pdf and b'2, A & B Road' in pdf
+
+
+def test_manifest_api(day_of_bookings):
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_superuser(username='admin', password='pass'))
+    url = reverse('pickup-manifests')
+
+    assert client.get(url, {'date': DAY.isoformat()}).json()['files'] == {'csv': None, 'pdf': None}
+    assert client.post(url, {'date': DAY.isoformat()}, format='json').status_code == 202
+    files = client.get(url, {'date': DAY.isoformat()}).json()['files']
+    assert files['csv'].endswith('pickups.csv') and files['pdf'].endswith('pickups.pdf')
+    assert client.get(url, {'date': '05/03/2030'}).status_code == 400
+
+
+def test_load_postcode_geocodes(tmp_path):
+    path = tmp_path / 'postcodes.csv'
+    path.write_text('postcode,latitude,longitude\nSW1A 1AA,51.501,-0.141\nSW1A 1AA,51.502,-0.142\nbad,x,y\n')
+    call_command('load_postcode_geocodes', str(path), stdout=io.StringIO())
+    geocode = PostcodeGeocode.objects.get(postcode='SW1A1AA')
+    assert (geocode.latitude, geocode.longitude) == (51.502, -0.142)
@@ -0,0 +1,199 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import MAX_PICKUP_DAYS, MIN_PICKUP_DAYS, Booking, BoxType, PickupSlotCapacity
+from bookings.serializers import BookingCreateSerializer, BulkBookingSerializer
+from bookings.slots import SlotUnavailable, availability, reserve_slot
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def pickup_date():
+    day = timezone.localdate() + timedelta(days=MIN_PICKUP_DAYS + 1)
+    return day if day.weekday() != 6 else day + timedelta(days=1)
+
+
+@pytest.fixture
+def box_type():
+    return BoxType.objects.create(
+        name='Medium', length_cm=20, width_cm=20, height_cm=20,
+        price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+    )
+
+
+def book(box_type, pickup_date, slot='morning', area=''):
+    """What BookingCreateSerializer.create does, minus the request plumbing."""
+    with transaction.atomic(), patch('bookings.models.send_booking_notifications.delay'):
+        reserve_slot(pickup_date, slot, area)
+        return Booking.objects.create(
+            box_type=box_type, quantity=1, pickup_address='1 High St',
+            pickup_date=pickup_date, pickup_slot=slot, pickup_area=area,
+            cost=Decimal('3.63'), slot_reserved=True,
+        )
+
+
+@override_settings(PICKUP_SLOT_CAPACITY=2)
+def test_slot_fills_up_per_area(box_type, pickup_date):
+    book(box_type, pickup_date, area='SE1')
+    book(box_type, pickup_date, area='SE1')
+    with pytest.raises(SlotUnavailable):
+        book(box_type, pickup_date, area='SE1')
+    # other areas and slots have their own drivers
+    book(box_type, pickup_date, area='N1')
+    book(box_type, pickup_date, slot='evening', area='SE1')
+
+    slot = PickupSlotCapacity.objects.get(date=pickup_date, slot='morning', area='SE1')
+    assert (slot.reserved, slot.capacity) == (2, 2)
+    assert Booking.objects.filter(pickup_area='SE1', pickup_slot='morning').count() == 2
+
+
+@override_settings(PICKUP_SLOT_CAPACITY=1)
+def test_deleting_booking_releases_slot(box_type, pickup_date):
+    booking = book(box_type, pickup_date)
+    booking.delete()
+    book(box_type, pickup_date)
+    assert PickupSlotCapacity.objects.get(date=pickup_date, slot='morning').reserved == 1
+
+
+@override_settings(PICKUP_SLOT_CAPACITY=1)
+def test_area_comes_from_the_address(box_type, pickup_date):
+    book(box_type, pickup_date, area='SE1')
+    # a made-up area doesn't get round the full SE1 slot
+    serializer = BookingCreateSerializer(data={
+        'box_type': box_type.id, 'quantity': 1, 'pickup_address': '2 High St, London se1 7pb',
+        'pickup_date': pickup_date.isoformat(), 'pickup_slot': 'morning', 'pickup_area': 'NOWHERE',
+    })
+    assert serializer.is_valid(), serializer.errors
+    assert serializer.validated_data['pickup_area'] == 'SE1'
+    with pytest.raises(Exception) as excinfo:
+        serializer.save()
+    assert 'fully booked' in str(excinfo.value)
+    assert not PickupSlotCapacity.objects.filter(area='NOWHERE').exists()
+
+    bulk = BulkBookingSerializer(data={'bookings': [{
+        'box_type': box_type.id, 'quantity': 1, 'pickup_address': '3 High St, SE1 7PB',
+        'pickup_date': pickup_date.isoformat(), 'pickup_slot': 'morning', 'pickup_area': 'NOWHERE',
+    }]})
+    assert bulk.is_valid(), bulk.errors
+    assert bulk.validated_data['bookings'][0]['pickup_area'] == 'SE1'
+
+
+@override_settings(PICKUP_SLOT_CAPACITY=1)
+def test_only_reserving_bookings_release(box_type, pickup_date):
+    book(box_type, pickup_date)
+    with patch('bookings.models.send_booking_notifications.delay'):
+        # e.g. entered in the admin: never took a place
+        unreserved = Booking.objects.create(
+            box_type=box_type, pickup_address='2 High St', pickup_date=pickup_date,
+            pickup_slot='morning', cost=Decimal('3.63'),
+        )
+    unreserved.delete()
+    assert PickupSlotCapacity.objects.get(date=pickup_date, slot='morning').reserved == 1
+
+
+@override_settings(PICKUP_SLOT_CAPACITY=1)
+def test_rescheduling_moves_the_reservation(box_type, pickup_date):
+    booking = book(box_type, pickup_date, area='SE1')
+    booking.pickup_slot = 'evening'
+    booking.pickup_area = 'se1'
+    booking.save()
+    slots = dict(PickupSlotCapacity.objects.filter(date=pickup_date).values_list('slot', 'reserved'))
+    assert slots == {'morning': 0, 'evening': 1}
+
+    # a full slot refuses the move and keeps the old reservation
+    book(box_type, pickup_date, area='SE1')
+    booking.pickup_slot = 'morning'
+    with pytest.raises(SlotUnavailable):
+        booking.save()
+    booking.refresh_from_db()
+    assert booking.pickup_slot == 'evening'
+    slots = dict(PickupSlotCapacity.objects.filter(date=pickup_date).values_list('slot', 'reserved'))
+    assert slots == {'morning': 1, 'evening': 1}
+
+
+@override_settings(PICKUP_SLOT_CAPACITY=1)
+def test_serializer_rejects_full_slot(box_type, pickup_date):
+    book(box_type, pickup_date)
+    serializer = BookingCreateSerializer(data={
+        'box_type': box_type.id, 'quantity': 1, 'pickup_address': '2 High St',
+        'pickup_date': pickup_date.isoformat(), 'pickup_slot': 'morning',
+    })
+    assert serializer.is_valid(), serializer.errors
+    with pytest.raises(Exception) as excinfo:
+        serializer.save()
+    assert 'fully booked' in str(excinfo.value)
+    assert PickupSlotCapacity.objects.get(date=pickup_date, slot='morning').reserved == 1
+
+
+@override_settings(PICKUP_SLOT_CAPACITY=3)
+def test_availability_calendar(box_type, pickup_date, django_assert_num_queries):
+    book(box_type, pickup_date, area='SE1')
+
+    with django_assert_num_queries(1):
+        calendar = availability('se1')
+    with django_assert_num_queries(0):
+        assert availability('SE1') == calendar
+
+    assert all(timezone.datetime.fromisoformat(day['date']).weekday() != 6 for day in calendar)
+    assert len(calendar) >= MAX_PICKUP_DAYS - MIN_PICKUP_DAYS - 2
+    day = next(day for day in calendar if day['date'] == pickup_date.isoformat())
+    morning = next(slot for slot in day['slots'] if slot['slot'] == 'morning')
+    assert (morning['capacity'], morning['reserved'], morning['available']) == (3, 1, 2)
+
+    # a new reservation drops the cached calendar
+    book(box_type, pickup_date, area='SE1')
+    day = next(day for day in availability('SE1') if day['date'] == pickup_date.isoformat())
+    assert day['slots'][0]['available'] == 1
+
+
+def test_availability_endpoint():
+    resp = APIClient().get(reverse('pickup-availability'), {'area': 'e14'})
+    assert resp.status_code == 200
+    assert resp.json()['area'] == 'E14'
+    assert resp.json()['days'][0]['slots'][0]['available'] > 0
+
+
+@pytest.fixture
+def concurrent_db(transactional_db):
+    # The test settings put SQLite on a file for this; its shared-cache
+    # in-memory DB fails fast with "table is locked" instead of waiting.
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        pytest.skip('needs a test database that supports concurrent writers')
+
+
+@override_settings(PICKUP_SLOT_CAPACITY=10)
+def test_concurrent_burst_never_overbooks(concurrent_db, box_type, pickup_date):
+    attempts, threads = 60, 8
+
+    def attempt(_):
+        try:
+            book(box_type, pickup_date)
+            return True
+        except SlotUnavailable:
+            return False
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(attempt, range(attempts)))
+
+    assert results.count(True) == 10
+    assert Booking.objects.filter(pickup_date=pickup_date, pickup_slot='morning').count() == 10
+    assert PickupSlotCapacity.objects.get(date=pickup_date, slot='morning').reserved == 10
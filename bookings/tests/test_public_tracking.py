@@ -1,10 +1,13 @@
 import pytest
 from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 
 from bookings.models import Booking, BoxType
+from tracking.models import TrackingRecord
 
 User = get_user_model()
 pytestmark = pytest.mark.django_db
@@ -57,3 +60,43 @@ def test_public_booking_tracking_not_found():
     url = reverse('booking-track', kwargs={'reference_code': 'NONEXISTENT'})
     resp = client.get(url)
     assert resp.status_code == 404
+
+
+@pytest.fixture
+def tracked_booking():
+    cache.clear()
+    box_type = BoxType.objects.create(
+        name="Test Box",
+        length_cm=10, width_cm=10, height_cm=10,
+        price_per_kg=Decimal('2.50'),
+        price_per_box=Decimal('15.00'),
+    )
+    with patch("bookings.models.send_booking_notifications.delay"):
+        booking = Booking.objects.create(
+            user=None, box_type=box_type, quantity=1,
+            pickup_address='123 Main St', pickup_date='2025-08-01',
+            pickup_slot='morning', cost=Decimal('0.45'),
+        )
+    TrackingRecord.objects.create(booking=booking, status='Received', location='London Depot')
+    TrackingRecord.objects.create(booking=booking, status='In Transit', location='Tema Port')
+    yield booking
+    cache.clear()
+
+def test_public_tracking_includes_ordered_timeline(tracked_booking, django_assert_max_num_queries):
+    url = reverse('booking-track', kwargs={'reference_code': tracked_booking.reference_code})
+    with django_assert_max_num_queries(2):  # booking + prefetched timeline
+        resp = APIClient().get(url)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data['box_type_name'] == 'Test Box'
+    assert [event['status'] for event in data['tracking']] == ['Received', 'In Transit']
+
+def test_public_tracking_is_cached_until_new_event(tracked_booking, django_assert_num_queries):
+    client = APIClient()
+    url = reverse('booking-track', kwargs={'reference_code': tracked_booking.reference_code})
+    client.get(url)
+    with django_assert_num_queries(0):
+        assert len(client.get(url).json()['tracking']) == 2
+
+    TrackingRecord.objects.create(booking=tracked_booking, status='Arrived', location='Accra Warehouse')
+    assert client.get(url).json()['tracking'][-1]['status'] == 'Arrived'
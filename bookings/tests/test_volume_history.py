@@ -0,0 +1,70 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import BatchVolumeSample, Booking, BoxType, ContainerBatch
+from bookings.tasks import check_and_mark_batches
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def batch():
+    batch = ContainerBatch.objects.create(status='open')
+    box_type = BoxType.objects.create(
+        name='Medium', length_cm=50, width_cm=50, height_cm=50,
+        price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+    )
+    Booking.objects.bulk_create([
+        Booking(
+            reference_code=f'VH{i:010d}', box_type=box_type, quantity=3, batch=batch,
+            pickup_address='1 Dock Rd', pickup_date='2025-08-01', pickup_slot='morning',
+            cost=Decimal('170.12'),
+        )
+        for i in range(4)
+    ])
+    return batch
+
+
+def test_update_is_a_single_insert(batch, django_assert_num_queries):
+    # one aggregate for the volume, one INSERT; the batch row is not rewritten
+    with django_assert_num_queries(2):
+        sample = batch.update_volume_history()
+    assert sample.volume == Decimal('1.50')
+    assert BatchVolumeSample.objects.filter(batch=batch).count() == 1
+
+
+def test_range_queries(batch):
+    now = timezone.now()
+    BatchVolumeSample.objects.bulk_create([
+        BatchVolumeSample(batch=batch, timestamp=now - timedelta(hours=hours), volume=Decimal(10 - hours))
+        for hours in range(10)
+    ])
+    window = batch.volume_history(start=now - timedelta(hours=5), end=now - timedelta(hours=2))
+    assert [sample.volume for sample in window] == [Decimal('5'), Decimal('6'), Decimal('7')]
+    assert batch.volume_history().count() == 10
+    assert batch.volume_history()[0].volume == Decimal('1')
+
+
+def test_hourly_check_samples_open_batch(batch):
+    check_and_mark_batches()
+    assert [sample.volume for sample in batch.volume_history()] == [Decimal('1.50')]
+
+
+def test_volume_history_endpoint(batch):
+    batch.update_volume_history()
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_superuser(username='admin', password='pass'))
+    url = reverse('batch-volume-history', args=[batch.id])
+
+    data = client.get(url).json()
+    assert data['batch'] == batch.id
+    assert [sample['volume'] for sample in data['samples']] == ['1.50']
+    tomorrow = (timezone.now() + timedelta(days=1)).isoformat()
+    assert client.get(url, {'start': tomorrow}).json()['samples'] == []
+    assert client.get(url, {'end': '2030-02-30T00:00:00'}).status_code == 400
@@ -3,6 +3,16 @@ from . import views
 
 urlpatterns = [
     path('container/capacity/', views.ContainerCapacityView.as_view(), name='container-capacity'),
+    path('container/capacity/forecast/', views.CapacityForecastView.as_view(), name='capacity-forecast'),
     path('container/capacity/history/', views.CapacityHistoryView.as_view(), name='capacity-history'),
+    path('container/batches/<int:pk>/status/', views.BatchStatusView.as_view(), name='batch-status'),
+    path('container/batches/<int:pk>/load-plan/', views.BatchLoadPlanView.as_view(), name='batch-load-plan'),
+    path('container/batches/<int:pk>/volume-history/', views.BatchVolumeHistoryView.as_view(), name='batch-volume-history'),
+    path('bulk/', views.BulkBookingView.as_view(), name='booking-bulk'),
+    path('agent-stats/', views.AgentStatsView.as_view(), name='agent-stats'),
+    path('agent-stats/report/', views.AgentStatsReportView.as_view(), name='agent-stats-report'),
     path('cheatsheet/download/', views.download_box_cheatsheet, name='download_box_cheatsheet'),
+    path('pickup-slots/availability/', views.PickupAvailabilityView.as_view(), name='pickup-availability'),
+    path('pickup-manifests/', views.PickupManifestView.as_view(), name='pickup-manifests'),
+    path('track/<str:reference_code>/', views.BookingTrackingView.as_view(), name='booking-track'),
 ]
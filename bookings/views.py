@@ -1,23 +1,40 @@
+from datetime import date, timedelta
 from decimal import Decimal
 from django.core import management
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework import viewsets, status, generics
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from django.core.cache import cache
+from django.db.models import Prefetch
 from django.http import FileResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from .pdf_generator import generate_box_cheatsheet
 
-from .models import BoxType, Booking, send_booking_notifications
+from tracking.models import TrackingRecord
+from .cache import TRACKING_CACHE_TTL, tracking_cache_key
+from .models import BoxType, Booking, ContainerBatch, send_booking_notifications
+from .packing import get_load_plan, summarize
+from .rollups import agent_summary, leaderboard
+from .slots import availability, normalize_area
+from .tasks import generate_pickup_manifests, manifest_path
 from .serializers import (
+    AgentStatsSerializer,
+    BatchStatusPropagationSerializer,
+    BatchStatusUpdateSerializer,
+    BatchVolumeSampleSerializer,
     BoxTypeSerializer,
     VolumeCalcSerializer,
     ContainerProgressSerializer,
     BookingCreateSerializer,
     BookingDetailSerializer,
     BookingTrackingSerializer,
+    BulkBookingSerializer,
 )
 
 
@@ -49,14 +66,37 @@ class BookingViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    def get_throttles(self):
+        # only creating a booking has its own budget; admins browsing use theirs
+        self.throttle_scope = 'booking' if self.action == 'create' else None
+        return super().get_throttles()
+
     def perform_create(self, serializer):
         booking = serializer.save()
         # task is already enqueued in model.save()
         # nothing more to do here
 
 
+class BulkBookingView(APIView):
+    """POST {"bookings": [...]}: an agent's bookings for many customers, all or none."""
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'booking'
+
+    def post(self, request):
+        if not request.user.is_agent:
+            raise PermissionDenied('Only agents can book in bulk.')
+        serializer = BulkBookingSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        bookings = serializer.save()
+        return Response(
+            {'bookings': BookingDetailSerializer(bookings, many=True).data},
+            status=status.HTTP_201_CREATED,
+        )
+
+
 class ContainerProgressView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'progress'
 
     def get(self, request):
         total   = Booking.total_booked_volume()
@@ -73,6 +113,7 @@ class ContainerProgressView(APIView):
 
 class VolumeCalcAPIView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'quote'
 
     def post(self, request, *args, **kwargs):
         serializer = VolumeCalcSerializer(data=request.data)
@@ -101,14 +142,201 @@ def check_dispatch_api(request):
 
 
 class BookingTrackingView(generics.RetrieveAPIView):
-    queryset         = Booking.objects.all()
+    # Booking summary + timeline in one response, cached per reference code
+    # (invalidated when a TrackingRecord is written) so refresh storms after
+    # a vessel arrival are served from Redis.
+    queryset         = Booking.objects.select_related('box_type').prefetch_related(
+        Prefetch('tracking', queryset=TrackingRecord.objects.order_by('timestamp'))
+    )
     serializer_class = BookingTrackingSerializer
     lookup_field     = 'reference_code'
     permission_classes = [AllowAny]
+    throttle_scope   = 'tracking'
+
+    def retrieve(self, request, *args, **kwargs):
+        key = tracking_cache_key(self.kwargs[self.lookup_field])
+        data = cache.get(key)
+        if data is None:
+            data = dict(self.get_serializer(self.get_object()).data)
+            cache.set(key, data, TRACKING_CACHE_TTL)
+        return Response(data)
+
+
+class BatchStatusView(APIView):
+    """
+    GET: batch status and progress of its latest status fan-out.
+    POST {"status", "location", "notify"}: change status; the tracking
+    events and customer notifications are applied by a background job.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get_batch(self, pk):
+        return generics.get_object_or_404(ContainerBatch, pk=pk)
+
+    def get(self, request, pk):
+        batch = self.get_batch(pk)
+        propagation = batch.propagations.first()
+        return Response({
+            'id': batch.id,
+            'status': batch.status,
+            'propagation': BatchStatusPropagationSerializer(propagation).data if propagation else None,
+        })
+
+    def post(self, request, pk):
+        batch = self.get_batch(pk)
+        serializer = BatchStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        propagation = batch.transition_to(**serializer.validated_data)
+        if propagation is None:
+            return Response(
+                {'status': f"Batch is already '{batch.status}'."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(
+            BatchStatusPropagationSerializer(propagation).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class PickupAvailabilityView(APIView):
+    """Bookable pickup slots for the next MAX_PICKUP_DAYS days (?area=<zone>)."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        area = normalize_area(request.query_params.get('area', ''))
+        return Response({'area': area, 'days': availability(area)})
+
+
+class PickupManifestView(APIView):
+    """
+    GET ?date=YYYY-MM-DD: links to that day's stored manifests.
+    POST {"date": "YYYY-MM-DD"}: (re)generate them in the background.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get_date(self, value):
+        try:
+            return date.fromisoformat(value) if value else timezone.localdate() + timedelta(days=1)
+        except ValueError:
+            raise ValidationError({'date': 'Use YYYY-MM-DD.'})
+
+    def get(self, request):
+        day = self.get_date(request.query_params.get('date'))
+        files = {}
+        for ext in ('csv', 'pdf'):
+            name = manifest_path(day, ext)
+            files[ext] = default_storage.url(name) if default_storage.exists(name) else None
+        return Response({'date': day.isoformat(), 'files': files})
+
+    def post(self, request):
+        day = self.get_date(request.data.get('date'))
+        result = generate_pickup_manifests.delay(day.isoformat())
+        return Response(
+            {'date': day.isoformat(), 'task_id': result.id},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class BatchLoadPlanView(APIView):
+    """
+    Estimated container load plan for a batch: how much of the booked
+    volume physically fits and the effective capacity for its box mix.
+    ?blocks=1 includes the placements.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        batch = generics.get_object_or_404(ContainerBatch, pk=pk)
+        plan = get_load_plan(batch)
+        data = {'batch': batch.id, 'target_volume': batch.target_volume, **summarize(plan)}
+        if request.query_params.get('blocks'):
+            fields = ('box_type', 'x', 'y', 'z', 'depth', 'width', 'height', 'cols', 'rows')
+            data['blocks'] = [dict(zip(fields, block)) for block in plan['blocks']]
+        return Response(data)
+
+
+class BatchVolumeHistoryView(APIView):
+    """Booked-volume samples of a batch, optionally within ?start=&end= (ISO datetimes)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        batch = generics.get_object_or_404(ContainerBatch, pk=pk)
+        bounds = {}
+        for name in ('start', 'end'):
+            value = request.query_params.get(name)
+            if not value:
+                continue
+            try:
+                moment = parse_datetime(value)
+            except ValueError:
+                moment = None
+            if moment is None:
+                raise ValidationError({name: 'Use an ISO 8601 datetime.'})
+            bounds[name] = moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+        samples = batch.volume_history(**bounds).only('timestamp', 'volume')
+        return Response({
+            'batch': batch.id,
+            'samples': BatchVolumeSampleSerializer(samples, many=True).data,
+        })
+
+
+def stats_range(params, default_days=30):
+    """(start, end) dates from ?start=&end= (YYYY-MM-DD), the last 30 days by default."""
+    end = timezone.localdate()
+    bounds = {'start': end - timedelta(days=default_days - 1), 'end': end}
+    for name in bounds:
+        value = params.get(name)
+        if value:
+            try:
+                bounds[name] = date.fromisoformat(value)
+            except ValueError:
+                raise ValidationError({name: 'Use YYYY-MM-DD.'})
+    if bounds['start'] > bounds['end']:
+        raise ValidationError({'start': 'Must not be after end.'})
+    return bounds['start'], bounds['end']
+
+
+class AgentStatsView(APIView):
+    """
+    The signed-in agent's bookings, revenue and volume over ?start=&end=,
+    with a row per day that had bookings. Read from the daily rollups.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_agent:
+            raise PermissionDenied('Only agents have booking stats.')
+        start, end = stats_range(request.query_params)
+        summary = agent_summary(request.user, start, end)
+        days = summary.pop('days')
+        return Response({
+            'start': start,
+            'end': end,
+            'totals': AgentStatsSerializer(summary).data,
+            'days': AgentStatsSerializer(days, many=True).data,
+        })
+
+
+class AgentStatsReportView(APIView):
+    """All agents ranked by revenue over ?start=&end= (?limit=N for the top N)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        start, end = stats_range(request.query_params)
+        limit = request.query_params.get('limit', '')
+        if limit and not limit.isdigit():
+            raise ValidationError({'limit': 'Must be a number.'})
+        rows = leaderboard(start, end, int(limit) if limit else None)
+        return Response({
+            'start': start,
+            'end': end,
+            'agents': AgentStatsSerializer(rows, many=True).data,
+        })
 
 
 class ContainerCapacityView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'progress'
 
     def get(self, request):
         current_batch = ContainerBatch.objects.filter(status='open').first()
@@ -125,6 +353,32 @@ class ContainerCapacityView(APIView):
         return Response(serializer.data)
 
 
+class CapacityForecastView(APIView):
+    """
+    When the open container (or ?batch=<id>) is expected to fill, from
+    booking velocity, with an 80% band. Served from the hourly forecast.
+    """
+    permission_classes = [AllowAny]
+    throttle_scope = 'progress'
+
+    def get(self, request):
+        # numpy is slow to import; keep it out of worker startup
+        from .forecasting import get_forecast
+
+        batch_id = request.query_params.get('batch')
+        if batch_id:
+            if not batch_id.isdigit():
+                raise ValidationError({'batch': 'Must be a batch id.'})
+            batch = generics.get_object_or_404(ContainerBatch, pk=batch_id)
+        else:
+            batch = ContainerBatch.objects.filter(status='open').first()
+            if not batch:
+                return Response({
+                    'error': 'No open container batch found'
+                }, status=status.HTTP_404_NOT_FOUND)
+        return Response(get_forecast(batch))
+
+
 class CapacityHistoryView(APIView):
     permission_classes = [IsAdminUser]
 
@@ -143,6 +397,9 @@ class CapacityHistoryView(APIView):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def download_box_cheatsheet(request):
+    # ReportLab is heavy; only load it in workers that actually render PDFs
+    from .pdf_generator import generate_box_cheatsheet
+
     pdf_buffer = generate_box_cheatsheet()
     return FileResponse(
         pdf_buffer,
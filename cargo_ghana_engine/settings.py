@@ -55,6 +55,7 @@ INSTALLED_APPS = [
     'referrals',
     'agents',
     'core',
+    # tables only read by `migrate_token_blacklist`; the blacklist is in Redis
     'rest_framework_simplejwt.token_blacklist',
     'bookings.apps.BookingsConfig',
     'notification_templates',
@@ -174,6 +175,22 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'bookings.tasks.check_and_mark_batches',
         'schedule': crontab(minute=10),
     },
+    'flush-referral-clicks-every-minute': {
+        'task': 'referrals.tasks.flush_referral_clicks',
+        'schedule': crontab(minute='*'),
+    },
+    'capacity-forecast-every-hour': {
+        'task': 'bookings.tasks.refresh_capacity_forecasts',
+        'schedule': crontab(minute=15),
+    },
+    'pickup-manifests-daily': {
+        'task': 'bookings.tasks.generate_pickup_manifests',
+        'schedule': crontab(hour=18, minute=0),
+    },
+    'expire-document-uploads-every-hour': {
+        'task': 'agents.tasks.expire_document_uploads',
+        'schedule': crontab(minute=20),
+    },
 }
 
 
@@ -192,6 +209,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.throttling.RateLimitHeadersMiddleware',
 ]
 
 
@@ -200,6 +218,7 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # ─── CORS (dev only) ───────────────────────────────────────
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_EXPOSE_HEADERS = ['X-RateLimit-Limit', 'X-RateLimit-Remaining', 'X-RateLimit-Reset', 'Retry-After']
 # in production, replace with:
 # CORS_ALLOWED_ORIGINS = ['https://app.cargo-ghana.com']
 
@@ -241,6 +260,14 @@ if 'pytest' in sys.modules:
     DATABASES['default']['ATOMIC_REQUESTS'] = False
     CELERY_TASK_ALWAYS_EAGER = True
     CELERY_TASK_EAGER_PROPAGATES = True
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        # A file rather than the in-memory default, so the concurrency tests'
+        # threads really race on one database: writers wait on each other's
+        # locks (timeout) instead of failing with "table is locked", and
+        # BEGIN IMMEDIATE takes the write lock up front, so two read-then-write
+        # transactions can't deadlock into "database is locked".
+        DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_db.sqlite3'}
+        DATABASES['default'].setdefault('OPTIONS', {}).update(transaction_mode='IMMEDIATE', timeout=30)
 
 # Add this near the top of settings.py
 if 'pytest' in sys.argv[0]:
@@ -259,6 +286,29 @@ ADMIN_WHATSAPP = os.getenv("ADMIN_WHATSAPP")                   # e.g. "+233xxxxx
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Password hashing (see accounts/hashers.py). New passwords use Argon2id at
+# the cost below; hashes made by the others still verify and are upgraded
+# on the user's next login.
+PASSWORD_HASHERS = [
+    'accounts.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', '2'))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', '19456'))  # KiB
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', '1'))
+# cap on requests hashing a password at once (login, register), shared
+# through Redis by every worker process, so it holds with gunicorn's default
+# sync workers (one request per process); size it to the cores you'll give
+# to hashing. Unset for no cap. Past it, requests wait up to
+# PASSWORD_HASHING_WAIT seconds and then get a 503; a slot whose worker died
+# is freed after PASSWORD_HASHING_LEASE seconds.
+PASSWORD_HASHING_CONCURRENCY = int(os.getenv('PASSWORD_HASHING_CONCURRENCY', '0')) or None
+PASSWORD_HASHING_WAIT = float(os.getenv('PASSWORD_HASHING_WAIT', '2'))
+PASSWORD_HASHING_LEASE = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -293,10 +343,10 @@ AUTH_USER_MODEL = 'accounts.User'
 REST_FRAMEWORK = {
     # — Authentication backends only —
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        # no session cookie, no query; first so anonymous requests get 403
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
-        # (or JWTAuthentication if you're using Simple JWT)
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # (TokenAuthentication needs rest_framework.authtoken, not installed)
+        'accounts.authentication.CachedJWTAuthentication',
     ],
 
     # — Default permissions —
@@ -305,13 +355,22 @@ REST_FRAMEWORK = {
     ],
 
     # — Throttle classes —
+    # sliding windows in Redis; a view's throttle_scope picks its rate below,
+    # otherwise 'user' / 'anon'
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'core.throttling.SlidingWindowThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/day',
-        'user': '1000/day'
+        'user': '1000/day',
+        # chunked agent document uploads
+        'uploads': '2000/day',
+        # public endpoints, each in its own bucket
+        'quote': '30/min',
+        'tracking': '60/min',
+        'progress': '60/min',
+        'click': '30/min',
+        'booking': '20/hour',
     }
 }
 
@@ -348,7 +407,11 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    # ...
+    # adds is_staff / is_agent claims
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.ClaimsTokenObtainPairSerializer',
+    # revoked refresh tokens live in Redis until they expire (accounts.tokens)
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.RedisTokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'accounts.serializers.RedisTokenBlacklistSerializer',
 }
 
 
@@ -363,9 +426,28 @@ META_PIXEL_ID = os.getenv('META_PIXEL_ID')  # e.g. '123456789'
 GA_MEASUREMENT_ID = os.getenv('GA_MEASUREMENT_ID')  # e.g. 'G-XXXXXXXXXX'
 
 
+REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379/1')
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-        'LOCATION': os.getenv('REDIS_URL', 'redis://redis:6379/1'),
+        'LOCATION': REDIS_URL,
     }
-}
\ No newline at end of file
+}
+# Pickups a driver can take per (date, slot, area) unless overridden in admin
+PICKUP_SLOT_CAPACITY = int(os.getenv('PICKUP_SLOT_CAPACITY', '20'))
+
+# Start point for pickup routes as "lat,lng"; unset = start at the first stop
+PICKUP_DEPOT = (
+    tuple(float(part) for part in os.getenv('PICKUP_DEPOT').split(','))
+    if os.getenv('PICKUP_DEPOT') else None
+)
+
+# Usable interior of the shipping container (length, width, height in cm);
+# 40ft standard dry container
+CONTAINER_INTERIOR_CM = (1203, 235, 239)
+
+# JWT auth: how long each process reuses a user's row before reloading it
+# (deactivations apply immediately via the revoked-users set in Redis)
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '30'))
+AUTH_USER_CACHE_SIZE = 10_000
@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import Blob
 
-# Register your models here.
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'refcount', 'created_at', 'updated_at')
+    list_filter = ('refcount',)
+    search_fields = ('name', 'sha256')
+    readonly_fields = ('name', 'sha256', 'size', 'refcount', 'created_at', 'updated_at')
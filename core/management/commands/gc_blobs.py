@@ -0,0 +1,96 @@
+import os
+from collections import Counter
+from datetime import timedelta
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.utils import timezone
+
+from core.models import Blob
+from core.storage import BLOB_DIR, ContentAddressedStorage, blob_storage
+
+
+def blob_fields():
+    """Every concrete FileField stored in ContentAddressedStorage."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage):
+                yield model, field
+
+
+def count_references():
+    """{blob name: number of FileField values pointing at it}, from the database."""
+    counts = Counter()
+    for model, field in blob_fields():
+        names = (
+            model._base_manager.filter(**{f'{field.name}__startswith': f'{BLOB_DIR}/'})
+            .values_list(field.name, flat=True)
+        )
+        counts.update(names.iterator(chunk_size=5000))
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove content-addressed blobs nothing refers to. Reference counts "
+        "are first reconciled with the FileFields that use the storage; "
+        "blobs, and stray files on disk, are only collected once they've "
+        "been unreferenced for the grace period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='Leave blobs touched more recently than this (default 24).')
+        parser.add_argument('--no-recount', action='store_true',
+                            help='Trust the stored reference counts instead of recounting.')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be removed.')
+
+    def handle(self, *args, **options):
+        storage = blob_storage()
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        dry_run = options['dry_run']
+
+        fixed = 0
+        if not options['no_recount']:
+            counts = count_references()
+            stale = []
+            for blob in Blob.objects.only('name', 'refcount').iterator(chunk_size=5000):
+                actual = counts.get(blob.name, 0)
+                if blob.refcount != actual:
+                    blob.refcount = actual
+                    stale.append(blob)
+            fixed = len(stale)
+            if not dry_run:
+                # updated_at is kept: a recount isn't new activity
+                Blob.objects.bulk_update(stale, ['refcount'], batch_size=1000)
+
+        removed = freed = 0
+        candidates = Blob.objects.filter(refcount=0, updated_at__lt=cutoff).values_list('name', flat=True)
+        for name in list(candidates.iterator(chunk_size=5000)):
+            with transaction.atomic():
+                # a concurrent save blocks on this lock, then recreates the row
+                blob = Blob.objects.select_for_update().filter(name=name, refcount=0, updated_at__lt=cutoff).first()
+                if blob is None:
+                    continue
+                if not dry_run:
+                    storage.delete_file(name)
+                    blob.delete()
+            removed += 1
+            freed += blob.size
+
+        # files with no row: temp files of crashed saves, or saves whose
+        # transaction rolled back; anything recent may still be in flight
+        strays = 0
+        known = set(Blob.objects.values_list('name', flat=True).iterator(chunk_size=5000))
+        for name, mtime in storage.walk_blobs():
+            if name in known or mtime >= cutoff.timestamp():
+                continue
+            if not dry_run:
+                storage.delete_file(name)
+            strays += 1
+
+        prefix = 'Would remove' if dry_run else 'Removed'
+        self.stdout.write(
+            f"{prefix} {removed} unreferenced blobs ({freed / 1_000_000:.1f} MB) and {strays} stray files; "
+            f"{fixed} reference counts corrected."
+        )
@@ -0,0 +1,97 @@
+# core/management/commands/startup_profile.py
+
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Third-party packages that should only be imported on first use.
+HEAVY_MODULES = ('reportlab', 'twilio', 'weasyprint', 'PIL')
+
+# Runs in a fresh interpreter so nothing the current process already
+# imported skews the numbers.
+PROFILE_SCRIPT = """
+import json, resource, sys, django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+for name in {extra!r}:
+    __import__(name)
+print(json.dumps({{
+    'modules': sorted(sys.modules),
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Parse ``python -X importtime`` output into a list of
+    (module, self_us, cumulative_us) tuples.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header row
+        rows.append((parts[2].strip(), self_us, cumulative_us))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile worker startup: import time per module, peak memory and "
+        "which heavy third-party packages get loaded by django.setup() + URLconf."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Number of slowest top-level imports to list.'
+        )
+        parser.add_argument(
+            '--import', dest='extra', action='append', default=[],
+            help='Extra module to import after setup (e.g. bookings.tasks). Repeatable.'
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'cargo_ghana_engine.settings'
+        ))
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             PROFILE_SCRIPT.format(extra=options['extra'])],
+            cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"Profiling interpreter failed:\n{proc.stderr[-2000:]}")
+
+        report = json.loads(proc.stdout.strip().splitlines()[-1])
+        rows = parse_importtime(proc.stderr)
+        total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+
+        self.stdout.write(f"Total import time: {total_ms:.1f} ms")
+        self.stdout.write(f"Peak RSS: {report['max_rss_kb'] / 1024:.1f} MB")
+        self.stdout.write(f"Modules loaded: {len(report['modules'])}")
+
+        self.stdout.write("\nSlowest top-level imports (cumulative):")
+        top_level = [r for r in rows if '.' not in r[0]]
+        for name, _, cumulative_us in sorted(top_level, key=lambda r: -r[2])[:options['limit']]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        self.stdout.write("\nHeavy dependencies at startup:")
+        loaded = set(report['modules'])
+        for name in HEAVY_MODULES:
+            if name in loaded:
+                self.stdout.write(self.style.WARNING(f"  {name}: loaded"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"  {name}: not loaded"))
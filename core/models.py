@@ -1,3 +1,23 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Blob(models.Model):
+    """
+    One file in ContentAddressedStorage and how many FileField values
+    point at it. Rows at zero references are removed, with their file, by
+    ``manage.py gc_blobs``.
+    """
+    name = models.CharField(max_length=255, primary_key=True, help_text='Storage name, blobs/ab/cd/<sha256><ext>')
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # last time the count changed; gc_blobs leaves recently touched blobs alone
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['refcount', 'updated_at'])]
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount} refs)'
@@ -0,0 +1,15 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """
+    Shared raw Redis client for the counters, sorted sets and scripts that
+    Django's cache API can't express. Uses the same server as CACHES.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+# Content-addressed media storage.
+#
+# A file is stored once per distinct content, at
+#     blobs/<2 hex>/<2 hex>/<sha256><ext>
+# (65,536 shard directories, so none grows past a few thousand entries
+# even with hundreds of millions of files). Saving content that is
+# already stored returns the existing name. Each save and reference() adds
+# a reference in core.Blob and delete() drops one; the file itself is
+# only removed by `manage.py gc_blobs`, under a row lock and after a grace
+# period, so a save racing the collector can't lose its blob.
+BLOB_DIR = 'blobs'
+TMP_DIR = f'{BLOB_DIR}/tmp'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def blob_name(self, sha256, ext=''):
+        return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}'
+
+    def is_blob(self, name):
+        return name.startswith(f'{BLOB_DIR}/') and not name.startswith(f'{TMP_DIR}/')
+
+    def get_available_name(self, name, max_length=None):
+        # the name is derived from the content in _save
+        return name
+
+    def _save(self, name, content):
+        tmp_dir = self.path(TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest, size = hashlib.sha256(), 0
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+        ext = os.path.splitext(name)[1].lower()[:10]
+        blob = self.blob_name(digest.hexdigest(), ext)
+        try:
+            # count the reference first: from here on gc_blobs won't collect
+            self._add_reference(blob, digest.hexdigest(), size)
+            path = self.path(blob)
+            if os.path.exists(path):
+                os.unlink(tmp.name)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp.name, self.file_permissions_mode)
+                os.replace(tmp.name, path)
+        except BaseException:
+            if os.path.exists(tmp.name):
+                os.unlink(tmp.name)
+            raise
+        return blob
+
+    def _add_reference(self, name, sha256, size):
+        from .models import Blob
+
+        # the row may be deleted by gc_blobs between the two statements
+        while True:
+            Blob.objects.get_or_create(name=name, defaults={'sha256': sha256, 'size': size})
+            if Blob.objects.filter(name=name).update(refcount=F('refcount') + 1, updated_at=timezone.now()):
+                return
+
+    def reference(self, name):
+        """Count another FileField value pointing at an existing blob."""
+        from .models import Blob
+
+        if self.is_blob(name):
+            Blob.objects.filter(name=name).update(refcount=F('refcount') + 1, updated_at=timezone.now())
+
+    def delete(self, name):
+        from .models import Blob
+
+        if not self.is_blob(name):
+            # files stored before this backend have a single owner
+            return super().delete(name)
+        Blob.objects.filter(name=name).update(
+            refcount=Greatest(F('refcount') - 1, 0), updated_at=timezone.now()
+        )
+
+    def delete_file(self, name):
+        """Remove the file itself; only gc_blobs should call this."""
+        super().delete(name)
+
+    def walk_blobs(self):
+        """(name, mtime) of every file under blobs/, temporary files included."""
+        root = self.path(BLOB_DIR)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    mtime = os.path.getmtime(path)
+                except FileNotFoundError:
+                    continue
+                name = os.path.relpath(path, self.location).replace(os.sep, '/')
+                yield name, mtime
+
+
+_blob_storage = None
+
+
+def blob_storage():
+    """Shared ContentAddressedStorage rooted at MEDIA_ROOT; use as FileField(storage=blob_storage)."""
+    global _blob_storage
+    if _blob_storage is None:
+        _blob_storage = ContentAddressedStorage()
+    return _blob_storage
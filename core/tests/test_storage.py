@@ -0,0 +1,107 @@
+import io
+import os
+import time
+from datetime import timedelta
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from agents.models import AgentApplication
+from core.models import Blob
+from core.storage import ContentAddressedStorage, blob_storage
+
+pytestmark = pytest.mark.django_db
+
+SCAN = b'%PDF-1.4 the same passport scan'
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def storage():
+    return ContentAddressedStorage()
+
+
+def gc(*args):
+    out = io.StringIO()
+    call_command('gc_blobs', *args, stdout=out)
+    return out.getvalue()
+
+
+def test_identical_content_is_stored_once(storage, tmp_path):
+    first = storage.save('agent_documents/id/passport.PDF', ContentFile(SCAN))
+    second = storage.save('agent_documents/id/other-name.pdf', ContentFile(SCAN))
+    assert first == second
+    digest = first.rsplit('/', 1)[1].split('.')[0]
+    assert first == f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.pdf'
+    assert storage.open(first).read() == SCAN
+    assert Blob.objects.get(name=first).refcount == 2
+    # nothing left behind in the temp directory
+    assert os.listdir(tmp_path / 'blobs' / 'tmp') == []
+
+
+def test_delete_drops_a_reference_and_gc_removes_the_file(storage):
+    name = storage.save('a.pdf', ContentFile(SCAN))
+    storage.save('b.pdf', ContentFile(SCAN))
+    storage.delete(name)
+    storage.delete(name)
+    assert storage.exists(name)
+    assert Blob.objects.get(name=name).refcount == 0
+
+    # within the grace period it's left alone
+    assert 'Removed 0 unreferenced' in gc('--no-recount')
+    Blob.objects.filter(name=name).update(updated_at=timezone.now() - timedelta(days=2))
+    assert 'Would remove 1' in gc('--no-recount', '--dry-run')
+    assert storage.exists(name)
+    gc('--no-recount')
+    assert not storage.exists(name) and not Blob.objects.exists()
+
+    # saving it again after collection starts over
+    assert storage.save('c.pdf', ContentFile(SCAN)) == name
+    assert storage.exists(name) and Blob.objects.get(name=name).refcount == 1
+
+
+def test_applications_share_a_reuploaded_scan():
+    applications = [
+        AgentApplication.objects.create(
+            name=f'Agent {i}', email=f'agent{i}@x.com', phone='0551234567',
+            id_document=SimpleUploadedFile(f'scan-{i}.pdf', SCAN),
+            resume=SimpleUploadedFile('cv.pdf', f'%PDF-1.4 cv {i}'.encode()),
+        )
+        for i in range(3)
+    ]
+    assert len({application.id_document.name for application in applications}) == 1
+    assert Blob.objects.get(name=applications[0].id_document.name).refcount == 3
+    assert Blob.objects.count() == 4  # one scan, three CVs
+    assert blob_storage().url(applications[0].id_document.name).startswith('/media/blobs/')
+
+
+def test_gc_recounts_references_from_the_database(storage):
+    application = AgentApplication.objects.create(
+        name='Agent', email='agent@x.com', phone='0551234567',
+        id_document=SimpleUploadedFile('scan.pdf', SCAN),
+    )
+    orphan = storage.save('orphan.pdf', ContentFile(b'%PDF-1.4 nobody uses this'))
+    # e.g. a row deleted without deleting its file
+    Blob.objects.update(refcount=5, updated_at=timezone.now() - timedelta(days=2))
+
+    assert '1 unreferenced blobs' in gc()
+    assert Blob.objects.get(name=application.id_document.name).refcount == 1
+    assert not storage.exists(orphan)
+    assert storage.exists(application.id_document.name)
+
+
+def test_gc_removes_stray_files(storage, tmp_path):
+    storage.save('kept.pdf', ContentFile(SCAN))
+    stray = tmp_path / 'blobs' / 'tmp' / 'tmpcrashed'
+    stray.write_bytes(b'partial')
+    old = time.time() - 3 * 86400
+    os.utime(stray, (old, old))
+    assert '1 stray files' in gc()
+    assert not stray.exists()
+    assert Blob.objects.count() == 1
@@ -0,0 +1,117 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from redis.exceptions import RedisError
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from bookings.models import ContainerBatch
+from core.redis_client import get_redis
+from bookings.views import BookingViewSet, CapacityForecastView
+from core.throttling import SlidingWindowThrottle
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def buckets():
+    def clear():
+        r = get_redis()
+        keys = r.keys('throttle:*')
+        if keys:
+            r.delete(*keys)
+    clear()
+    rates = {**SlidingWindowThrottle.THROTTLE_RATES, 'progress': '3/min', 'user': '5/min'}
+    # DRF reads the rates once, into a class attribute
+    with patch.object(SlidingWindowThrottle, 'THROTTLE_RATES', rates):
+        yield
+    clear()
+
+
+@pytest.fixture(autouse=True)
+def batch():
+    return ContainerBatch.objects.create(status='open', target_volume=Decimal('66.16'))
+
+
+def test_scope_limit_and_headers():
+    client = APIClient()
+    url = reverse('capacity-forecast')
+    remaining = []
+    for _ in range(3):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response['X-RateLimit-Limit'] == '3'
+        remaining.append(int(response['X-RateLimit-Remaining']))
+    assert remaining == [2, 1, 0]
+
+    response = client.get(url)
+    assert response.status_code == 429
+    assert 0 < int(response['Retry-After']) <= 60
+    assert 0 < int(response['X-RateLimit-Reset']) <= 60
+
+    # a different client has its own bucket
+    assert client.get(url, REMOTE_ADDR='10.0.0.2').status_code == 200
+
+
+def test_scopes_are_counted_separately():
+    user = User.objects.create_user('kofi', 'kofi@example.com', 'secret123')
+    client = APIClient()
+    client.force_authenticate(user)
+    for _ in range(3):
+        client.get(reverse('capacity-forecast'))
+    assert client.get(reverse('capacity-forecast')).status_code == 429
+
+    response = client.get(reverse('users-me'))
+    assert response.status_code == 200
+    assert response['X-RateLimit-Limit'] == '5'
+    assert response['X-RateLimit-Remaining'] == '4'
+
+
+def test_sliding_window_counts_part_of_the_previous_window():
+    client = APIClient()
+    url = reverse('capacity-forecast')
+    with patch.object(SlidingWindowThrottle, 'timer', return_value=60 * 1000 + 30):
+        for _ in range(3):
+            client.get(url)
+    # half way through the next minute, half of the last one still counts
+    with patch.object(SlidingWindowThrottle, 'timer', return_value=60 * 1001 + 30):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response['X-RateLimit-Remaining'] == '1'
+        assert client.get(url).status_code == 200
+        assert client.get(url).status_code == 429
+    with patch.object(SlidingWindowThrottle, 'timer', return_value=60 * 1001 + 50):
+        assert client.get(url).status_code == 200
+
+
+def test_fails_open_without_redis():
+    client = APIClient()
+    with patch('core.throttling.sliding_window', side_effect=RedisError):
+        for _ in range(5):
+            response = client.get(reverse('capacity-forecast'))
+            assert response.status_code == 200
+            assert 'X-RateLimit-Limit' not in response
+
+
+def test_unknown_scope_is_a_configuration_error():
+    with patch.object(CapacityForecastView, 'throttle_scope', 'progres'):
+        with pytest.raises(ImproperlyConfigured):
+            APIClient().get(reverse('capacity-forecast'))
+
+
+def test_booking_scope_covers_creating_only():
+    view = BookingViewSet.as_view({'get': 'list', 'post': 'create'})
+    factory = APIRequestFactory()
+    admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret123')
+
+    def call(request):
+        force_authenticate(request, admin)
+        return view(request).status_code
+
+    with patch.dict(SlidingWindowThrottle.THROTTLE_RATES, {'booking': '2/min'}):
+        assert [call(factory.post('/bookings/', {}, format='json')) for _ in range(3)] == [400, 400, 429]
+        # listing and retrieving spend the 'user' budget
+        assert [call(factory.get('/bookings/')) for _ in range(6)] == [200] * 5 + [429]
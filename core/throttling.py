@@ -0,0 +1,120 @@
+import logging
+import math
+import time
+from redis.exceptions import RedisError
+from rest_framework.throttling import SimpleRateThrottle
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Sliding-window rate limiting in Redis.
+#
+# Each client gets a counter per fixed window (e.g. per minute); the rate
+# over the last window is estimated as this window's count plus the
+# previous window's count weighted by how much of it still overlaps:
+#
+#   count = current + previous * (1 - elapsed / window)
+#
+# Two GETs and an INCR in one Lua script, so the check is atomic, O(1) and
+# one round trip, whatever the rate. Views pick their bucket with
+# ``throttle_scope`` (rates in DEFAULT_THROTTLE_RATES); other requests fall
+# under 'user' or 'anon'. RateLimitHeadersMiddleware reports the quota.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local weight = tonumber(ARGV[2])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if current + previous * weight >= limit then
+    return {0, current, previous}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return {1, current, previous}
+"""
+KEY = 'throttle:{scope}:{ident}:{window}'
+
+_script = None
+
+
+def sliding_window():
+    global _script
+    if _script is None:
+        _script = get_redis().register_script(SLIDING_WINDOW_SCRIPT)
+    return _script
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Per-scope sliding-window limits; keyed by user id, or by IP for anonymous clients."""
+
+    def __init__(self):
+        # the scope, and so the rate, depends on the view
+        pass
+
+    def allow_request(self, request, view):
+        user = request.user
+        authenticated = bool(user and user.is_authenticated)
+        self.scope = getattr(view, 'throttle_scope', None) or ('user' if authenticated else 'anon')
+        # ImproperlyConfigured for a scope with no rate, as ScopedRateThrottle
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        ident = f'user:{user.pk}' if authenticated else f'ip:{self.get_ident(request)}'
+
+        now = self.timer()
+        window, offset = divmod(now, self.duration)
+        window = int(window)
+        self.elapsed = offset
+        self.weight = 1 - offset / self.duration
+        keys = [
+            KEY.format(scope=self.scope, ident=ident, window=window),
+            KEY.format(scope=self.scope, ident=ident, window=window - 1),
+        ]
+        try:
+            allowed, self.current, self.previous = sliding_window()(
+                keys=keys, args=[self.num_requests, repr(self.weight), self.duration * 2]
+            )
+        except RedisError:
+            # a rate limiter outage shouldn't take the API down with it
+            logger.warning(f'Throttle check for {self.scope} unavailable; allowing request')
+            return True
+
+        count = self.current + self.previous * self.weight
+        request._request.rate_limit = {
+            'limit': self.num_requests,
+            'remaining': max(math.ceil(self.num_requests - count), 0),
+            'reset': math.ceil(self.duration - self.elapsed),
+        }
+        return bool(allowed)
+
+    def get_cache_key(self, request, view):
+        # keys are built in allow_request
+        return None
+
+    def timer(self):
+        return time.time()
+
+    def wait(self):
+        """Seconds until the estimate falls below the limit again."""
+        if self.current >= self.num_requests or not self.previous:
+            return self.duration - self.elapsed
+        # previous * (1 - (elapsed + t) / duration) + current < limit
+        overlap = (self.num_requests - self.current) / self.previous
+        return max(self.duration * (1 - overlap) - self.elapsed, 0)
+
+
+class RateLimitHeadersMiddleware:
+    """X-RateLimit-Limit / -Remaining / -Reset on throttled API responses."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        rate_limit = getattr(request, 'rate_limit', None)
+        if rate_limit:
+            response['X-RateLimit-Limit'] = rate_limit['limit']
+            response['X-RateLimit-Remaining'] = rate_limit['remaining']
+            response['X-RateLimit-Reset'] = rate_limit['reset']
+        return response
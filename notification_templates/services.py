@@ -1,7 +1,6 @@
 from django.template import Template, Context
 from django.core.mail import send_mail
 from django.conf import settings
-from twilio.rest import Client
 from .models import NotificationTemplate
 import logging
 
@@ -9,17 +8,31 @@ logger = logging.getLogger(__name__)
 
 class NotificationService:
     def __init__(self):
-        self.twilio_client = Client(
-            settings.TWILIO_ACCOUNT_SID,
-            settings.TWILIO_AUTH_TOKEN
-        )
+        self._twilio_client = None
+        # templates looked up by this instance; bulk senders reuse one service
+        self._templates = {}
+
+    @property
+    def twilio_client(self):
+        # Built on first WhatsApp send so email-only workers never import twilio
+        if self._twilio_client is None:
+            from twilio.rest import Client
+
+            self._twilio_client = Client(
+                settings.TWILIO_ACCOUNT_SID,
+                settings.TWILIO_AUTH_TOKEN
+            )
+        return self._twilio_client
 
     def render_template(self, template_name, context):
         try:
-            template = NotificationTemplate.objects.get(
-                name=template_name,
-                is_active=True
-            )
+            template = self._templates.get(template_name)
+            if template is None:
+                template = NotificationTemplate.objects.get(
+                    name=template_name,
+                    is_active=True
+                )
+                self._templates[template_name] = template
             template_context = Context(context or {})
             body = Template(template.body).render(template_context)
             subject = None
@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import patch
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 from django.template import Template, Context
@@ -87,3 +88,29 @@ class NotificationTemplateTests(TestCase):
         service = NotificationService()
         with self.assertRaises(NotificationTemplate.DoesNotExist):
             service.render_template("inactive_template", {})
+
+
+    @patch('twilio.rest.Client')
+    def test_email_send_does_not_build_twilio_client(self, mock_client):
+        NotificationTemplate.objects.create(
+            name="email_only",
+            channel="email",
+            subject="Hi {{name}}",
+            body="Hello {{name}}"
+        )
+        service = NotificationService()
+        service.send_notification("email_only", "john@example.com", {"name": "John"})
+        mock_client.assert_not_called()
+
+    @patch('twilio.rest.Client')
+    def test_twilio_client_built_once_on_first_whatsapp(self, mock_client):
+        NotificationTemplate.objects.create(
+            name="wa_template",
+            channel="whatsapp",
+            body="Hello {{name}}"
+        )
+        service = NotificationService()
+        service.send_notification("wa_template", "+233000000000", {"name": "John"})
+        service.send_notification("wa_template", "+233000000000", {"name": "Ama"})
+        mock_client.assert_called_once()
+        self.assertEqual(mock_client.return_value.messages.create.call_count, 2)
@@ -0,0 +1,127 @@
+import logging
+from datetime import datetime, timezone as dt_timezone
+from django.db.models import Case, F, Value, When
+from django.db.models import DateTimeField, PositiveIntegerField
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from core.redis_client import get_redis
+from .models import Referral
+from .stats import invalidate_statistics
+
+logger = logging.getLogger(__name__)
+
+# Referral click counts are buffered in Redis and folded into the
+# Referral rows by flush_clicks(), so a viral link never turns into a hot
+# row lock contended by every request.
+DIRTY_KEY = 'referral:clicks:dirty'
+FLUSHING_KEY = 'referral:clicks:flushing'
+COUNT_KEY = 'referral:clicks:{}'
+CLICKED_AT_KEY = 'referral:clicked_at:{}'
+
+FLUSH_CHUNK_SIZE = 500
+
+
+def record_click(referral_id):
+    """Count one click for ``referral_id`` without touching the database."""
+    referral_id = str(referral_id)
+    now = timezone.now().timestamp()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.incr(COUNT_KEY.format(referral_id))
+        pipe.set(CLICKED_AT_KEY.format(referral_id), now)
+        pipe.sadd(DIRTY_KEY, referral_id)
+        pipe.execute()
+    except RedisError:
+        logger.exception('Click buffer unavailable; writing click for %s directly', referral_id)
+        Referral.objects.filter(pk=referral_id).update(
+            link_clicks=F('link_clicks') + 1,
+            last_clicked_at=timezone.now(),
+        )
+        invalidate_statistics()
+
+
+def _drain():
+    """
+    Atomically take every buffered (referral_id, clicks, last_clicked_at).
+    Clicks arriving meanwhile land in fresh keys for the next flush.
+    """
+    r = get_redis()
+    if not r.exists(FLUSHING_KEY):  # a crashed flush leaves its ids here
+        try:
+            r.rename(DIRTY_KEY, FLUSHING_KEY)
+        except RedisError:
+            return []  # nothing buffered
+    ids = [m.decode() for m in r.smembers(FLUSHING_KEY)]
+    if not ids:
+        return []
+
+    pipe = r.pipeline(transaction=False)
+    for referral_id in ids:
+        pipe.getdel(COUNT_KEY.format(referral_id))
+        pipe.getdel(CLICKED_AT_KEY.format(referral_id))
+    values = pipe.execute()
+
+    drained = []
+    for i, referral_id in enumerate(ids):
+        count, clicked_at = values[2 * i], values[2 * i + 1]
+        if count and int(count) > 0:
+            drained.append((
+                referral_id,
+                int(count),
+                datetime.fromtimestamp(float(clicked_at), tz=dt_timezone.utc) if clicked_at else timezone.now(),
+            ))
+    return drained
+
+
+def _restore(pending):
+    """Put unwritten counts back into the buffer after a failed database write."""
+    pipe = get_redis().pipeline(transaction=False)
+    for referral_id, count, clicked_at in pending:
+        pipe.incrby(COUNT_KEY.format(referral_id), count)
+        pipe.set(CLICKED_AT_KEY.format(referral_id), clicked_at.timestamp(), nx=True)
+        pipe.sadd(DIRTY_KEY, referral_id)
+    pipe.execute()
+
+
+def flush_clicks():
+    """
+    Fold buffered clicks into Referral.link_clicks/last_clicked_at with one
+    CASE-based UPDATE per chunk of referrals. Returns the number of clicks
+    written; clicks on referrals deleted meanwhile are logged and dropped.
+    """
+    drained = _drain()
+    flushed = 0
+    for start in range(0, len(drained), FLUSH_CHUNK_SIZE):
+        chunk = drained[start:start + FLUSH_CHUNK_SIZE]
+        try:
+            updated = Referral.objects.filter(pk__in=[c[0] for c in chunk]).update(
+                link_clicks=F('link_clicks') + Case(
+                    *[When(pk=referral_id, then=Value(count)) for referral_id, count, _ in chunk],
+                    default=Value(0),
+                    output_field=PositiveIntegerField(),
+                ),
+                last_clicked_at=Case(
+                    *[When(pk=referral_id, then=Value(clicked_at)) for referral_id, _, clicked_at in chunk],
+                    default=F('last_clicked_at'),
+                    output_field=DateTimeField(),
+                ),
+            )
+        except Exception:
+            _restore(drained[start:])
+            get_redis().delete(FLUSHING_KEY)
+            raise
+        if updated < len(chunk):
+            # referrals deleted since they were clicked; their counts go nowhere
+            existing = {
+                str(pk) for pk in Referral.objects.filter(pk__in=[c[0] for c in chunk]).values_list('pk', flat=True)
+            }
+            dropped = [(referral_id, count) for referral_id, count, _ in chunk if referral_id not in existing]
+            logger.warning(f'Dropped buffered clicks for missing referrals: {dropped}')
+            chunk = [c for c in chunk if c[0] in existing]
+        flushed += sum(c[1] for c in chunk)
+
+    get_redis().delete(FLUSHING_KEY)
+    if flushed:
+        invalidate_statistics()
+    return flushed
@@ -0,0 +1,82 @@
+import logging
+from decimal import Decimal
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Referrer leaderboards live in Redis sorted sets (member = referrer user id)
+# so top-N is ZREVRANGE and rank-of-user is ZREVRANK, both O(log n).
+# One set per metric for all time plus one per calendar month; they are
+# derived data and can be rebuilt with `manage.py rebuild_referral_leaderboard`.
+METRICS = ('referrals', 'rewards')
+ALL_TIME = 'all'
+KEY = 'referrals:leaderboard:{metric}:{period}'
+
+
+def current_period():
+    return timezone.localtime().strftime('%Y-%m')
+
+
+def leaderboard_key(metric, period=ALL_TIME):
+    return KEY.format(metric=metric, period=period)
+
+
+def record_successful_referral(referrer_id, reward, when=None):
+    """Credit one successful referral (and its reward) to ``referrer_id``."""
+    if referrer_id is None:
+        return
+    month = timezone.localtime(when).strftime('%Y-%m')
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for period in (ALL_TIME, month):
+            pipe.zincrby(leaderboard_key('referrals', period), 1, referrer_id)
+            pipe.zincrby(leaderboard_key('rewards', period), float(reward), referrer_id)
+        pipe.execute()
+    except RedisError:
+        # derived data; rebuild_referral_leaderboard recovers it
+        logger.exception('Failed to update referral leaderboard for user %s', referrer_id)
+
+
+def top(metric='referrals', period=ALL_TIME, limit=10):
+    """[(rank, user_id, score), ...] for the best ``limit`` referrers."""
+    rows = get_redis().zrevrange(leaderboard_key(metric, period), 0, limit - 1, withscores=True)
+    return [(rank, int(member), score) for rank, (member, score) in enumerate(rows, start=1)]
+
+
+def rank_of(user_id, metric='referrals', period=ALL_TIME):
+    """(rank, score) for ``user_id``, or (None, 0) if they are not ranked."""
+    key = leaderboard_key(metric, period)
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.zrevrank(key, user_id)
+    pipe.zscore(key, user_id)
+    rank, score = pipe.execute()
+    if rank is None:
+        return None, 0
+    return rank + 1, score
+
+
+def replace(metric, period, scores):
+    """
+    Atomically swap the ``metric``/``period`` leaderboard for ``scores``
+    ({user_id: score}); readers never see a half-built set.
+    """
+    r = get_redis()
+    key = leaderboard_key(metric, period)
+    tmp = f'{key}:rebuild'
+    pipe = r.pipeline(transaction=True)
+    pipe.delete(tmp)
+    if scores:
+        pipe.zadd(tmp, {user_id: float(score) for user_id, score in scores.items()})
+        pipe.rename(tmp, key)
+    else:
+        pipe.delete(key)
+    pipe.execute()
+
+
+def format_score(metric, score):
+    if metric == 'rewards':
+        return Decimal(str(score)).quantize(Decimal('0.01'))
+    return int(score)
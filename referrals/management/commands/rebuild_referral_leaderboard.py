@@ -0,0 +1,67 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from bookings.models import Booking
+from referrals import leaderboard
+from referrals.models import Referral
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the Redis referral leaderboards from the database: all-time "
+        "totals from Referral rows, monthly boards from referred bookings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=12,
+            help='How many calendar months (including the current one) to rebuild.'
+        )
+
+    def handle(self, *args, **options):
+        # All time: Referral counters are the source of truth
+        totals = (
+            Referral.objects.filter(referrer__isnull=False)
+            .values('referrer')
+            .annotate(referrals=Sum('successful_referrals'), rewards=Sum('total_reward_earned'))
+        )
+        leaderboard.replace('referrals', leaderboard.ALL_TIME, {
+            row['referrer']: row['referrals'] for row in totals if row['referrals']
+        })
+        leaderboard.replace('rewards', leaderboard.ALL_TIME, {
+            row['referrer']: row['rewards'] for row in totals if row['rewards']
+        })
+        self.stdout.write(f"All-time leaderboard: {len(totals)} referrers")
+
+        # Monthly: one successful referral per referred booking
+        year, month = timezone.localdate().year, timezone.localdate().month
+        months = []
+        for _ in range(max(options['months'], 1)):
+            months.append(f"{year:04d}-{month:02d}")
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        oldest = months[-1]
+        since = timezone.make_aware(datetime(int(oldest[:4]), int(oldest[5:]), 1))
+
+        counts = defaultdict(lambda: defaultdict(int))
+        rewards = defaultdict(lambda: defaultdict(Decimal))
+        bookings = (
+            Booking.objects.filter(referral__referrer__isnull=False, created_at__gte=since)
+            .select_related('referral')
+            .only('cost', 'created_at', 'referral', 'referral__referrer')
+        )
+        for booking in bookings.iterator(chunk_size=2000):
+            period = timezone.localtime(booking.created_at).strftime('%Y-%m')
+            referrer_id = booking.referral.referrer_id
+            counts[period][referrer_id] += 1
+            rewards[period][referrer_id] += booking.referral.calculate_reward(booking)
+
+        for period in months:
+            leaderboard.replace('referrals', period, counts[period])
+            leaderboard.replace('rewards', period, rewards[period])
+            self.stdout.write(f"{period}: {len(counts[period])} referrers")
+
+        self.stdout.write(self.style.SUCCESS('Referral leaderboards rebuilt.'))
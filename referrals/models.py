@@ -1,6 +1,9 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models import F
 from django.conf import settings
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 import uuid
 
@@ -11,6 +14,8 @@ class Referral(models.Model):
         ('paid', 'Paid'),
         ('rejected', 'Rejected')
     ]
+    BASE_REWARD = Decimal('10.00')        # Base reward for each successful referral
+    BOOKING_PERCENTAGE = Decimal('0.05')  # 5% of booking cost
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField()
@@ -65,23 +70,42 @@ class Referral(models.Model):
     def get_shareable_link(self):
         return f"{settings.SITE_URL}{self.get_absolute_url()}"
 
+    # Counters are bumped with a single UPDATE ... SET x = x + n so concurrent
+    # clicks/bookings on the same code never overwrite each other.
     def track_click(self):
-        self.link_clicks += 1
-        self.last_clicked_at = models.functions.Now()
-        self.save(update_fields=['link_clicks', 'last_clicked_at'])
+        Referral.objects.filter(pk=self.pk).update(
+            link_clicks=F('link_clicks') + 1,
+            last_clicked_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['link_clicks', 'last_clicked_at'])
+        self._invalidate_statistics()
 
     def track_successful_referral(self, booking):
-        self.successful_referrals += 1
-        self.total_referrals += 1
         # Calculate reward based on booking amount
         reward = self.calculate_reward(booking)
-        self.reward_amount += reward
-        self.total_reward_earned += reward
-        self.save()
+        Referral.objects.filter(pk=self.pk).update(
+            successful_referrals=F('successful_referrals') + 1,
+            total_referrals=F('total_referrals') + 1,
+            reward_amount=F('reward_amount') + reward,
+            total_reward_earned=F('total_reward_earned') + reward,
+            reward_updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=[
+            'successful_referrals', 'total_referrals', 'reward_amount',
+            'total_reward_earned', 'reward_updated_at',
+        ])
+        self._invalidate_statistics()
 
-    def calculate_reward(self, booking):
+        from .leaderboard import record_successful_referral
+        record_successful_referral(self.referrer_id, reward)
+
+    @staticmethod
+    def _invalidate_statistics():
+        # QuerySet.update() skips post_save, so bump the stats cache ourselves
+        from .stats import invalidate_statistics
+        invalidate_statistics()
+
+    def calculate_reward(self, booking) -> Decimal:
         # Basic reward calculation - can be enhanced based on business rules
-        base_reward = 10.00  # Base reward for each successful referral
-        booking_percentage = 0.05  # 5% of booking cost
-        booking_reward = float(booking.cost) * booking_percentage
-        return base_reward + booking_reward
+        booking_reward = Decimal(booking.cost or 0) * self.BOOKING_PERCENTAGE
+        return (self.BASE_REWARD + booking_reward).quantize(Decimal('0.01'))
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Referral
+from .stats import invalidate_statistics
+
+
+@receiver([post_save, post_delete], sender=Referral)
+def referral_changed(sender, **kwargs):
+    invalidate_statistics()
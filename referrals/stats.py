@@ -0,0 +1,84 @@
+import logging
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from redis.exceptions import RedisError
+
+from .models import Referral
+
+logger = logging.getLogger(__name__)
+
+# Every referral write bumps the version, which orphans all cached variants
+# at once instead of having to enumerate their keys.
+VERSION_KEY = 'referrals:statistics:version'
+CACHE_KEY = 'referrals:statistics:v{version}:{group_by}'
+CACHE_TTL = 60  # seconds
+
+GROUP_BY_FIELDS = ('reward_status', 'month')
+
+
+def invalidate_statistics():
+    try:
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, timeout=None)
+    except RedisError:
+        # called from referral and booking writes, which mustn't fail with
+        # the cache; cached statistics expire within CACHE_TTL regardless
+        logger.exception('Failed to invalidate referral statistics')
+
+
+def _aggregates():
+    return {
+        'total_referrals': Count('id'),
+        'total_successful_referrals': Sum('successful_referrals', default=0),
+        'total_clicks': Sum('link_clicks', default=0),
+        'total_rewards_earned': Sum('total_reward_earned', default=Decimal('0')),
+    }
+
+
+def _with_conversion_rate(row):
+    total = row['total_referrals']
+    row['conversion_rate'] = (
+        round(row['total_successful_referrals'] / total * 100, 2) if total > 0 else 0
+    )
+    return row
+
+
+def compute_statistics(group_by=()):
+    """
+    Referral totals in a single aggregate query, plus an optional breakdown
+    grouped by any of GROUP_BY_FIELDS ('month' buckets on created_at).
+    """
+    qs = Referral.objects.order_by()
+    data = _with_conversion_rate(qs.aggregate(**_aggregates()))
+
+    if group_by:
+        rows = (
+            qs.annotate(month=TruncMonth('created_at'))
+            .values(*group_by)
+            .annotate(**_aggregates())
+            .order_by(*group_by)
+        )
+        breakdown = []
+        for row in rows:
+            if 'month' in row and row['month'] is not None:
+                row['month'] = row['month'].strftime('%Y-%m')
+            breakdown.append(_with_conversion_rate(row))
+        data['breakdown'] = breakdown
+    return data
+
+
+def get_statistics(group_by=()):
+    """Cached compute_statistics(); invalidated by any referral write."""
+    group_by = tuple(f for f in GROUP_BY_FIELDS if f in group_by)
+    version = cache.get(VERSION_KEY, 0)
+    key = CACHE_KEY.format(version=version, group_by=','.join(group_by) or 'none')
+    data = cache.get(key)
+    if data is None:
+        data = compute_statistics(group_by)
+        cache.set(key, data, CACHE_TTL)
+    return data
@@ -0,0 +1,17 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from .clicks import flush_clicks
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+def flush_referral_clicks():
+    """
+    Writes Redis-buffered referral link clicks to the Referral rows.
+    """
+    flushed = flush_clicks()
+    if flushed:
+        logger.info(f"Flushed {flushed} buffered referral clicks")
+    return flushed
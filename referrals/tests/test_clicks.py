@@ -0,0 +1,86 @@
+import pytest
+import uuid
+from unittest.mock import patch
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.redis_client import get_redis
+from referrals import clicks
+from referrals.models import Referral
+from referrals.tasks import flush_referral_clicks
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clean_buffer():
+    def clear():
+        r = get_redis()
+        keys = r.keys('referral:clicks:*') + r.keys('referral:clicked_at:*')
+        if keys:
+            r.delete(*keys)
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def referral():
+    return Referral.objects.create(email='a@b.com', code='CLICKME12345')
+
+
+def test_track_click_endpoint_does_not_touch_database(api_client, referral, django_assert_num_queries):
+    url = reverse('referrals-track-click', kwargs={'pk': referral.pk})
+    with django_assert_num_queries(0):
+        resp = api_client.get(url)
+    assert resp.status_code == 200
+
+    referral.refresh_from_db()
+    assert referral.link_clicks == 0
+    assert int(get_redis().get(clicks.COUNT_KEY.format(referral.pk))) == 1
+
+
+def test_track_click_rejects_malformed_id(api_client):
+    resp = api_client.get('/api/referrals/not-a-uuid/track_click/')
+    assert resp.status_code == 404
+
+
+def test_flush_writes_buffered_clicks(referral, caplog):
+    other = Referral.objects.create(email='c@d.com', code='OTHERCODE123')
+    for _ in range(5):
+        clicks.record_click(referral.pk)
+    clicks.record_click(other.pk)
+    missing = uuid.uuid4()
+    clicks.record_click(missing)  # unknown ids are logged and dropped
+
+    assert flush_referral_clicks() == 6
+    assert str(missing) in caplog.text
+
+    referral.refresh_from_db()
+    other.refresh_from_db()
+    assert referral.link_clicks == 5
+    assert referral.last_clicked_at is not None
+    assert other.link_clicks == 1
+
+    # buffer is empty afterwards; a second flush is a no-op
+    assert flush_referral_clicks() == 0
+    referral.refresh_from_db()
+    assert referral.link_clicks == 5
+
+
+def test_failed_flush_keeps_clicks_buffered(referral):
+    for _ in range(3):
+        clicks.record_click(referral.pk)
+
+    with patch.object(Referral.objects, 'filter', side_effect=RuntimeError('db down')):
+        with pytest.raises(RuntimeError):
+            clicks.flush_clicks()
+
+    assert clicks.flush_clicks() == 3
+    referral.refresh_from_db()
+    assert referral.link_clicks == 3
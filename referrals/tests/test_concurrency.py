@@ -0,0 +1,74 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import connection
+
+from ..models import Referral
+from bookings.models import Booking, BoxType
+
+THREADS = 8
+HITS_PER_THREAD = 25
+
+
+@pytest.fixture
+def concurrent_db(transactional_db):
+    # The test settings put SQLite on a file for this; its shared-cache
+    # in-memory DB fails fast with "table is locked" instead of waiting.
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        pytest.skip('needs a test database that supports concurrent writers')
+
+
+@pytest.fixture
+def referral():
+    return Referral.objects.create(email='hot@example.com', code='HOTCODE12345')
+
+
+@pytest.fixture
+def booking():
+    box_type = BoxType.objects.create(
+        name='Test Box', length_cm=10, width_cm=10, height_cm=10,
+        price_per_kg=Decimal('2.50'), price_per_box=Decimal('10.00')
+    )
+    with patch('bookings.models.send_booking_notifications.delay'):
+        return Booking.objects.create(
+            box_type=box_type, quantity=1,
+            pickup_address='Test Address', pickup_date='2025-01-01',
+            pickup_slot='morning', cost=Decimal('100.00')
+        )
+
+
+def hammer(fn):
+    """Run ``fn`` THREADS × HITS_PER_THREAD times across worker threads."""
+    def worker(_):
+        try:
+            for _ in range(HITS_PER_THREAD):
+                fn()
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(worker, range(THREADS)))
+
+
+def test_concurrent_clicks_are_not_lost(concurrent_db, referral):
+    # every thread works on its own stale instance, as separate requests would
+    hammer(lambda: Referral.objects.get(code=referral.code).track_click())
+
+    referral.refresh_from_db()
+    assert referral.link_clicks == THREADS * HITS_PER_THREAD
+    assert referral.last_clicked_at is not None
+
+
+def test_concurrent_successful_referrals_accrue_every_reward(concurrent_db, referral, booking):
+    hammer(lambda: Referral.objects.get(code=referral.code).track_successful_referral(booking))
+
+    total = THREADS * HITS_PER_THREAD
+    reward = referral.calculate_reward(booking)
+    assert reward == Decimal('15.00')  # 10.00 base + 5% of 100.00
+
+    referral.refresh_from_db()
+    assert referral.successful_referrals == total
+    assert referral.total_referrals == total
+    assert referral.total_reward_earned == reward * total
+    assert referral.reward_amount == reward * total
@@ -0,0 +1,109 @@
+import pytest
+from io import StringIO
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bookings.models import Booking, BoxType
+from core.redis_client import get_redis
+from referrals import leaderboard
+from referrals.models import Referral
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clean_leaderboards():
+    def clear():
+        r = get_redis()
+        keys = r.keys('referrals:leaderboard:*')
+        if keys:
+            r.delete(*keys)
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture
+def users():
+    return [User.objects.create_user(username=f'referrer{i}', password='pass') for i in range(3)]
+
+
+@pytest.fixture
+def box_type():
+    return BoxType.objects.create(
+        name='Test Box', length_cm=10, width_cm=10, height_cm=10,
+        price_per_kg=Decimal('2.50'), price_per_box=Decimal('10.00')
+    )
+
+
+def make_booking(box_type, referral, cost='100.00'):
+    with patch('bookings.models.send_booking_notifications.delay'):
+        return Booking.objects.create(
+            box_type=box_type, quantity=1, referral=referral,
+            pickup_address='Test Address', pickup_date='2025-01-01',
+            pickup_slot='morning', cost=Decimal(cost)
+        )
+
+
+def refer(referral, box_type, times):
+    for _ in range(times):
+        referral.track_successful_referral(make_booking(box_type, referral))
+
+
+def test_successful_referrals_update_leaderboard(users, box_type):
+    for user, times in zip(users, (2, 5, 1)):
+        refer(Referral.objects.create(email=user.username + '@x.com', code=f'CODE{user.id:08d}', referrer=user), box_type, times)
+
+    ranked = leaderboard.top('referrals', limit=2)
+    assert [(rank, user_id, score) for rank, user_id, score in ranked] == [
+        (1, users[1].id, 5.0), (2, users[0].id, 2.0),
+    ]
+    assert leaderboard.rank_of(users[2].id) == (3, 1.0)
+    assert leaderboard.rank_of(users[2].id, period=leaderboard.current_period())[0] == 3
+    # 15.00 reward per 100.00 booking
+    assert leaderboard.format_score('rewards', leaderboard.rank_of(users[1].id, 'rewards')[1]) == Decimal('75.00')
+
+
+def test_referrals_without_referrer_are_not_ranked(box_type):
+    refer(Referral.objects.create(email='anon@x.com', code='ANONCODE1234'), box_type, 1)
+    assert leaderboard.top() == []
+
+
+def test_leaderboard_api(users, box_type):
+    refer(Referral.objects.create(email='r@x.com', code='APICODE12345', referrer=users[0]), box_type, 3)
+    client = APIClient()
+    client.force_authenticate(user=users[0])
+
+    resp = client.get(reverse('referrals-leaderboard'), {'period': 'month', 'metric': 'rewards'})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data['period'] == leaderboard.current_period()
+    assert data['results'][0]['username'] == 'referrer0'
+    assert Decimal(str(data['results'][0]['score'])) == Decimal('45.00')
+
+    resp = client.get(reverse('referrals-leaderboard-rank'))
+    assert resp.json()['rank'] == 1
+    assert resp.json()['score'] == 3
+
+    assert client.get(reverse('referrals-leaderboard'), {'period': 'last-week'}).status_code == 400
+
+
+def test_leaderboard_requires_authentication():
+    assert APIClient().get(reverse('referrals-leaderboard')).status_code in (401, 403)
+
+
+def test_rebuild_command_restores_leaderboards(users, box_type):
+    refer(Referral.objects.create(email='a@x.com', code='REBUILD11111', referrer=users[0]), box_type, 2)
+    refer(Referral.objects.create(email='b@x.com', code='REBUILD22222', referrer=users[1]), box_type, 4)
+    before = leaderboard.top('rewards', leaderboard.current_period())
+
+    get_redis().delete(*get_redis().keys('referrals:leaderboard:*'))
+    call_command('rebuild_referral_leaderboard', months=2, stdout=StringIO())
+
+    assert leaderboard.top('referrals') == [(1, users[1].id, 4.0), (2, users[0].id, 2.0)]
+    assert leaderboard.top('rewards', leaderboard.current_period()) == before
@@ -0,0 +1,96 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
+from django.urls import reverse
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+
+from referrals.models import Referral
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def admin_client():
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_superuser(username='admin', password='pass'))
+    return client
+
+
+@pytest.fixture
+def referrals():
+    return [
+        Referral.objects.create(
+            email='a@b.com', code='AAAA11112222', successful_referrals=2,
+            link_clicks=10, total_reward_earned=Decimal('20.00')
+        ),
+        Referral.objects.create(
+            email='c@d.com', code='BBBB11112222', successful_referrals=0,
+            link_clicks=5, total_reward_earned=Decimal('0.00'), reward_status='paid'
+        ),
+    ]
+
+
+def test_statistics_totals(admin_client, referrals):
+    resp = admin_client.get(reverse('referrals-statistics'))
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data['total_referrals'] == 2
+    assert data['total_successful_referrals'] == 2
+    assert data['total_clicks'] == 15
+    assert Decimal(str(data['total_rewards_earned'])) == Decimal('20.00')
+    assert data['conversion_rate'] == 100.0
+    assert 'breakdown' not in data
+
+
+def test_statistics_served_from_cache(admin_client, referrals, django_assert_num_queries):
+    url = reverse('referrals-statistics')
+    admin_client.get(url)
+    with django_assert_num_queries(0):
+        assert admin_client.get(url).json()['total_referrals'] == 2
+
+
+def test_statistics_invalidated_by_referral_writes(admin_client, referrals):
+    url = reverse('referrals-statistics')
+    assert admin_client.get(url).json()['total_clicks'] == 15
+
+    referrals[0].track_click()
+    assert admin_client.get(url).json()['total_clicks'] == 16
+
+    Referral.objects.create(email='e@f.com', code='CCCC11112222')
+    assert admin_client.get(url).json()['total_referrals'] == 3
+
+
+def test_referral_writes_survive_a_cache_outage(referrals):
+    with patch.object(cache, 'incr', side_effect=RedisConnectionError):
+        referrals[0].track_click()
+        Referral.objects.create(email='e@f.com', code='CCCC11112222')
+    referrals[0].refresh_from_db()
+    assert referrals[0].link_clicks == 11
+    assert Referral.objects.count() == 3
+
+
+def test_statistics_breakdown(admin_client, referrals):
+    resp = admin_client.get(reverse('referrals-statistics'), {'group_by': 'reward_status,month'})
+    assert resp.status_code == 200
+    breakdown = resp.json()['breakdown']
+    by_status = {row['reward_status']: row for row in breakdown}
+    assert set(by_status) == {'paid', 'pending'}
+    assert by_status['pending']['total_clicks'] == 10
+    assert by_status['paid']['total_referrals'] == 1
+    assert all(len(row['month']) == 7 for row in breakdown)  # YYYY-MM
+
+
+def test_statistics_rejects_unknown_group_by(admin_client):
+    resp = admin_client.get(reverse('referrals-statistics'), {'group_by': 'email'})
+    assert resp.status_code == 400
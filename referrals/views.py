@@ -1,38 +1,111 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from django.contrib.auth import get_user_model
+from datetime import datetime
 from django.utils import timezone
+import uuid
+from . import leaderboard
+from .clicks import record_click
 from .models import Referral
 from .serializers import ReferralSerializer
+from .stats import GROUP_BY_FIELDS, get_statistics
 
 class ReferralViewSet(viewsets.ModelViewSet):
     queryset = Referral.objects.all().order_by('-created_at')
     serializer_class = ReferralSerializer
     http_method_names = ['get', 'post', 'patch']
+    throttle_scope = None  # track_click has its own
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve', 'statistics']:
             return [IsAdminUser()]
+        if self.action in ['leaderboard', 'leaderboard_rank']:
+            return [IsAuthenticated()]
         return [AllowAny()]
 
-    @action(detail=True, methods=['get'])
+    def perform_create(self, serializer):
+        user = self.request.user
+        serializer.save(referrer=user if user.is_authenticated else None)
+
+    @action(detail=True, methods=['get'], throttle_scope='click')
     def track_click(self, request, pk=None):
-        referral = self.get_object()
-        referral.track_click()
+        # Buffered in Redis and flushed by referrals.tasks.flush_referral_clicks;
+        # no database round-trip on the hot path.
+        try:
+            referral_id = uuid.UUID(str(pk))
+        except ValueError:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        record_click(referral_id)
         return Response(status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def statistics(self, request):
-        total_referrals = Referral.objects.count()
-        total_successful = sum(r.successful_referrals for r in Referral.objects.all())
-        total_clicks = sum(r.link_clicks for r in Referral.objects.all())
-        total_rewards = sum(r.total_reward_earned for r in Referral.objects.all())
+        # ?group_by=reward_status,month adds a breakdown (month = created_at bucket)
+        group_by = [f.strip() for f in request.query_params.get('group_by', '').split(',') if f.strip()]
+        unknown = set(group_by) - set(GROUP_BY_FIELDS)
+        if unknown:
+            return Response(
+                {'group_by': f"Unsupported field(s): {', '.join(sorted(unknown))}. "
+                             f"Choose from: {', '.join(GROUP_BY_FIELDS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(get_statistics(group_by))
+
+    def _leaderboard_params(self, request):
+        metric = request.query_params.get('metric', 'referrals')
+        period = request.query_params.get('period', leaderboard.ALL_TIME)
+        if period == 'month':
+            period = leaderboard.current_period()
+        errors = {}
+        if metric not in leaderboard.METRICS:
+            errors['metric'] = f"Choose from: {', '.join(leaderboard.METRICS)}."
+        if period != leaderboard.ALL_TIME:
+            try:
+                datetime.strptime(period, '%Y-%m')
+            except ValueError:
+                errors['period'] = "Use 'all', 'month' or YYYY-MM."
+        return metric, period, errors
+
+    @action(detail=False, methods=['get'])
+    def leaderboard(self, request):
+        metric, period, errors = self._leaderboard_params(request)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+        except ValueError:
+            errors['limit'] = 'Must be an integer.'
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = leaderboard.top(metric, period, limit)
+        usernames = dict(
+            get_user_model().objects.filter(id__in=[user_id for _, user_id, _ in rows])
+            .values_list('id', 'username')
+        )
+        return Response({
+            'metric': metric,
+            'period': period,
+            'results': [
+                {
+                    'rank': rank,
+                    'user_id': user_id,
+                    'username': usernames.get(user_id),
+                    'score': leaderboard.format_score(metric, score),
+                }
+                for rank, user_id, score in rows
+            ],
+        })
 
+    @action(detail=False, methods=['get'], url_path='leaderboard/me')
+    def leaderboard_rank(self, request):
+        metric, period, errors = self._leaderboard_params(request)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        rank, score = leaderboard.rank_of(request.user.id, metric, period)
         return Response({
-            'total_referrals': total_referrals,
-            'total_successful_referrals': total_successful,
-            'total_clicks': total_clicks,
-            'total_rewards_earned': total_rewards,
-            'conversion_rate': round((total_successful / total_referrals * 100), 2) if total_referrals > 0 else 0
+            'metric': metric,
+            'period': period,
+            'rank': rank,
+            'score': leaderboard.format_score(metric, score),
         })
@@ -0,0 +1,153 @@
+import csv
+import io
+from collections import defaultdict
+from django.db import transaction
+
+from bookings.cache import invalidate_tracking
+from bookings.models import Booking
+from .models import TrackingRecord
+
+# Bulk ingestion of carrier/port status feeds. A feed is either batch-wide
+# (one status/location applied to many bookings) or a per-booking event list;
+# both are normalized to (reference_code, status, location) rows and applied
+# chunk by chunk: one bulk_create plus one Booking UPDATE per distinct
+# (status, location) in the chunk.
+DEFAULT_CHUNK_SIZE = 2000
+STATUS_MAX_LENGTH = TrackingRecord._meta.get_field('status').max_length
+LOCATION_MAX_LENGTH = TrackingRecord._meta.get_field('location').max_length
+
+
+class IngestError(ValueError):
+    """Raised when a feed cannot be parsed; ``errors`` maps field/row to message."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _clean_row(row, index, errors, default_status='', default_location=''):
+    reference_code = str(row.get('reference_code') or '').strip()
+    status = str(row.get('status') or default_status).strip()
+    location = str(row.get('location') or default_location).strip()
+    problems = []
+    if not reference_code:
+        problems.append('reference_code is required')
+    if not status:
+        problems.append('status is required')
+    elif len(status) > STATUS_MAX_LENGTH:
+        problems.append(f'status is longer than {STATUS_MAX_LENGTH} characters')
+    if not location:
+        problems.append('location is required')
+    elif len(location) > LOCATION_MAX_LENGTH:
+        problems.append(f'location is longer than {LOCATION_MAX_LENGTH} characters')
+    if problems:
+        errors[f'row {index}'] = '; '.join(problems)
+        return None
+    return reference_code, status, location
+
+
+def normalize_payload(payload):
+    """
+    Accepts either
+        {"status": ..., "location": ..., "reference_codes": [...]}      (batch-wide)
+        {"events": [{"reference_code", "status", "location"}, ...]}     (per booking)
+    and returns a list of (reference_code, status, location) tuples.
+    """
+    if not isinstance(payload, dict):
+        raise IngestError({'non_field_errors': 'Expected a JSON object.'})
+    errors = {}
+    rows = []
+    if 'events' in payload:
+        events = payload['events']
+        if not isinstance(events, list):
+            raise IngestError({'events': 'Expected a list.'})
+        for index, event in enumerate(events):
+            if not isinstance(event, dict):
+                errors[f'row {index}'] = 'Expected an object.'
+                continue
+            row = _clean_row(event, index, errors)
+            if row:
+                rows.append(row)
+    elif 'reference_codes' in payload:
+        codes = payload['reference_codes']
+        if not isinstance(codes, list):
+            raise IngestError({'reference_codes': 'Expected a list.'})
+        for index, code in enumerate(codes):
+            row = _clean_row(
+                {'reference_code': code}, index, errors,
+                default_status=payload.get('status', ''),
+                default_location=payload.get('location', ''),
+            )
+            if row:
+                rows.append(row)
+    else:
+        raise IngestError({'non_field_errors': "Provide 'events' or 'reference_codes'."})
+    if errors:
+        raise IngestError(errors)
+    return rows
+
+
+def parse_csv(text, status='', location=''):
+    """
+    CSV with a ``reference_code`` column plus ``status``/``location``
+    columns, or only reference codes when ``status``/``location`` are given.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or 'reference_code' not in reader.fieldnames:
+        raise IngestError({'file': "CSV needs a 'reference_code' header."})
+    errors = {}
+    rows = []
+    for index, record in enumerate(reader):
+        row = _clean_row(record, index, errors, default_status=status, default_location=location)
+        if row:
+            rows.append(row)
+    if errors:
+        raise IngestError(errors)
+    return rows
+
+
+def ingest_events(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write tracking events for ``rows`` and update each booking's current
+    status. Returns {'created': n, 'unknown_reference_codes': [...]}.
+    """
+    created = 0
+    unknown = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        booking_ids = dict(
+            Booking.objects.filter(reference_code__in={code for code, _, _ in chunk})
+            .values_list('reference_code', 'id')
+        )
+        records = []
+        # the last event for a booking within the chunk wins
+        latest = {}
+        for code, status, location in chunk:
+            booking_id = booking_ids.get(code)
+            if booking_id is None:
+                unknown.append(code)
+                continue
+            records.append(TrackingRecord(booking_id=booking_id, status=status, location=location))
+            latest[booking_id] = (status, location)
+
+        by_status = defaultdict(list)
+        for booking_id, status_location in latest.items():
+            by_status[status_location].append(booking_id)
+
+        if not records:
+            continue
+        with transaction.atomic():
+            TrackingRecord.objects.bulk_create(records)
+            # auto_now_add stamped the events; keep Booking in step with them
+            timestamp = records[-1].timestamp
+            for (status, location), ids in by_status.items():
+                Booking.objects.filter(id__in=ids).update(
+                    current_status=status,
+                    current_location=location,
+                    status_updated_at=timestamp,
+                )
+        # bulk_create skips post_save, so drop the cached public timelines here
+        invalidate_tracking(*[code for code in booking_ids if booking_ids[code] in latest])
+        created += len(records)
+
+    return {'created': created, 'unknown_reference_codes': unknown}
@@ -0,0 +1,57 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+
+from tracking.ingest import DEFAULT_CHUNK_SIZE, IngestError, ingest_events, normalize_payload, parse_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-ingest tracking events from a JSON or CSV feed and update each "
+        "booking's current status."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .json or .csv feed.')
+        parser.add_argument(
+            '--status', default='',
+            help='Status applied to every row (batch-wide CSV feeds).'
+        )
+        parser.add_argument(
+            '--location', default='',
+            help='Location applied to every row (batch-wide CSV feeds).'
+        )
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, encoding='utf-8-sig') as fh:
+                text = fh.read()
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+        try:
+            if path.lower().endswith('.json'):
+                try:
+                    payload = json.loads(text)
+                except ValueError as exc:
+                    raise CommandError(f"Invalid JSON: {exc}")
+                if options['status'] and isinstance(payload, list):
+                    # bare list of reference codes
+                    payload = {'reference_codes': payload}
+                if isinstance(payload, dict) and 'reference_codes' in payload:
+                    payload.setdefault('status', options['status'])
+                    payload.setdefault('location', options['location'])
+                rows = normalize_payload(payload)
+            else:
+                rows = parse_csv(text, status=options['status'], location=options['location'])
+        except IngestError as exc:
+            raise CommandError('; '.join(f"{key}: {msg}" for key, msg in exc.errors.items()))
+
+        result = ingest_events(rows, chunk_size=max(options['chunk_size'], 1))
+        unknown = result['unknown_reference_codes']
+        if unknown:
+            self.stdout.write(self.style.WARNING(
+                f"{len(unknown)} unknown reference codes: {', '.join(unknown[:20])}"
+            ))
+        self.stdout.write(self.style.SUCCESS(f"Ingested {result['created']} tracking events."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_containerbatch_volume_history'),
+        ('tracking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trackingrecord',
+            index=models.Index(fields=['booking', 'timestamp'], name='tracking_tr_booking_ed73cf_idx'),
+        ),
+    ]
@@ -8,5 +8,10 @@ class TrackingRecord(models.Model):
     location = models.CharField(max_length=100)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['booking', 'timestamp']),
+        ]
+
     def __str__(self):
         return f'{self.booking.id} - {self.status}'
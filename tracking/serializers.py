@@ -5,3 +5,9 @@ class TrackingRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrackingRecord
         fields = ['id', 'booking', 'status', 'location', 'timestamp']
+
+
+class TrackingEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TrackingRecord
+        fields = ['status', 'location', 'timestamp']
@@ -0,0 +1,55 @@
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bookings.cache import invalidate_tracking
+from bookings.models import Booking
+from .models import TrackingRecord
+
+
+def refresh_current_status(booking_id):
+    """Recompute a booking's denormalized status from its latest event."""
+    latest = (
+        TrackingRecord.objects.filter(booking_id=booking_id)
+        .order_by('-timestamp', '-id')
+        .values('status', 'location', 'timestamp')
+        .first()
+    ) or {'status': '', 'location': '', 'timestamp': None}
+    Booking.objects.filter(pk=booking_id).update(
+        current_status=latest['status'],
+        current_location=latest['location'],
+        status_updated_at=latest['timestamp'],
+    )
+
+
+@receiver(post_save, sender=TrackingRecord)
+def update_current_status(sender, instance, created, **kwargs):
+    if created:
+        # A new event is normally the latest; the timestamp guard keeps an
+        # out-of-order insert from overwriting a newer status.
+        Booking.objects.filter(pk=instance.booking_id).filter(
+            Q(status_updated_at__isnull=True) | Q(status_updated_at__lte=instance.timestamp)
+        ).update(
+            current_status=instance.status,
+            current_location=instance.location,
+            status_updated_at=instance.timestamp,
+        )
+    else:
+        refresh_current_status(instance.booking_id)
+
+
+@receiver(post_delete, sender=TrackingRecord)
+def clear_current_status(sender, instance, **kwargs):
+    refresh_current_status(instance.booking_id)
+
+
+@receiver([post_save, post_delete], sender=TrackingRecord)
+def tracking_record_changed(sender, instance, **kwargs):
+    if TrackingRecord.booking.is_cached(instance):
+        reference_code = instance.booking.reference_code
+    else:
+        reference_code = (
+            Booking.objects.filter(pk=instance.booking_id)
+            .values_list('reference_code', flat=True).first()
+        )
+    invalidate_tracking(reference_code)
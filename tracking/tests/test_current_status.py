@@ -0,0 +1,95 @@
+import importlib
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.apps import apps
+from django.utils import timezone
+
+from bookings.admin import dashboard_callback
+from bookings.models import Booking, BoxType
+from tracking.models import TrackingRecord
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def bookings():
+    box_type = BoxType.objects.create(
+        name='Medium', length_cm=20, width_cm=20, height_cm=20,
+        price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+    )
+    with patch('bookings.models.send_booking_notifications.delay'):
+        return [
+            Booking.objects.create(
+                box_type=box_type, quantity=1, pickup_address='1 Dock Rd',
+                pickup_date='2025-08-01', pickup_slot='morning', cost=Decimal('3.63'),
+            )
+            for _ in range(3)
+        ]
+
+
+def test_new_record_updates_current_status(bookings):
+    booking = bookings[0]
+    TrackingRecord.objects.create(booking=booking, status='Collected', location='London')
+    record = TrackingRecord.objects.create(booking=booking, status='In Transit', location='Felixstowe')
+
+    booking.refresh_from_db()
+    assert (booking.current_status, booking.current_location) == ('In Transit', 'Felixstowe')
+    assert booking.status_updated_at == record.timestamp
+
+
+def test_older_record_does_not_overwrite_newer_status(bookings):
+    booking = bookings[0]
+    TrackingRecord.objects.create(booking=booking, status='Delivered', location='Accra')
+    Booking.objects.filter(pk=booking.pk).update(status_updated_at=timezone.now() + timedelta(hours=1))
+
+    TrackingRecord.objects.create(booking=booking, status='In Transit', location='Tema')
+    booking.refresh_from_db()
+    assert booking.current_status == 'Delivered'
+
+
+def test_delete_falls_back_to_previous_record(bookings):
+    booking = bookings[0]
+    TrackingRecord.objects.create(booking=booking, status='Collected', location='London')
+    latest = TrackingRecord.objects.create(booking=booking, status='Held', location='Customs')
+
+    latest.delete()
+    booking.refresh_from_db()
+    assert booking.current_status == 'Collected'
+
+    TrackingRecord.objects.filter(booking=booking).delete()
+    booking.refresh_from_db()
+    assert (booking.current_status, booking.status_updated_at) == ('', None)
+
+
+def test_status_lookup_uses_booking_only(bookings, django_assert_num_queries):
+    for booking, status in zip(bookings, ('In Transit', 'In Transit', 'Delivered')):
+        TrackingRecord.objects.create(booking=booking, status=status, location='Tema')
+
+    with django_assert_num_queries(1):
+        assert Booking.objects.filter(current_status='In Transit').count() == 2
+
+
+def test_dashboard_status_distribution(bookings):
+    for booking, status in zip(bookings, ('Collected', 'In Transit', 'In Transit')):
+        TrackingRecord.objects.create(booking=booking, status='Collected', location='London')
+        TrackingRecord.objects.create(booking=booking, status=status, location='London')
+
+    context = dashboard_callback(None, {})
+    assert list(context['status_distribution']) == [
+        {'status': 'Collected', 'count': 1},
+        {'status': 'In Transit', 'count': 2},
+    ]
+
+
+def test_backfill_migration(bookings):
+    TrackingRecord.objects.create(booking=bookings[0], status='Collected', location='London')
+    TrackingRecord.objects.create(booking=bookings[0], status='Arrived', location='Tema')
+    Booking.objects.update(current_status='', current_location='', status_updated_at=None)
+
+    migration = importlib.import_module('bookings.migrations.0005_backfill_current_status')
+    migration.backfill_current_status(apps, None)
+
+    assert Booking.objects.get(pk=bookings[0].pk).current_status == 'Arrived'
+    assert Booking.objects.get(pk=bookings[1].pk).current_status == ''
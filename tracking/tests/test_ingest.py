@@ -0,0 +1,113 @@
+import json
+import pytest
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bookings.models import Booking, BoxType
+from tracking.ingest import ingest_events
+from tracking.models import TrackingRecord
+
+User = get_user_model()
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def admin_client():
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_superuser(username='admin', password='pass'))
+    return client
+
+
+@pytest.fixture
+def bookings():
+    box_type = BoxType.objects.create(
+        name='Medium', length_cm=20, width_cm=20, height_cm=20,
+        price_per_kg=Decimal('3.00'), price_per_box=Decimal('25.00'),
+    )
+    # bulk_create skips Booking.save and its notification task
+    return Booking.objects.bulk_create([
+        Booking(
+            reference_code=f'REF{i:09d}', box_type=box_type, quantity=1,
+            pickup_address='1 Dock Rd', pickup_date='2025-08-01',
+            pickup_slot='morning', cost=Decimal('3.63'),
+        )
+        for i in range(30)
+    ])
+
+
+def test_batch_wide_ingest(bookings, django_assert_max_num_queries):
+    codes = [b.reference_code for b in bookings]
+    rows = [(code, 'Arrived', 'Tema Port') for code in codes]
+    # lookup + insert + one UPDATE per chunk, plus savepoints
+    with django_assert_max_num_queries(3 * 5):
+        result = ingest_events(rows, chunk_size=10)
+
+    assert result == {'created': 30, 'unknown_reference_codes': []}
+    assert TrackingRecord.objects.count() == 30
+    assert set(Booking.objects.values_list('current_status', 'current_location')) == {('Arrived', 'Tema Port')}
+    assert not Booking.objects.filter(status_updated_at__isnull=True).exists()
+
+
+def test_per_booking_events_last_one_wins(bookings):
+    first, second = bookings[0].reference_code, bookings[1].reference_code
+    result = ingest_events([
+        (first, 'Loaded', 'Felixstowe'),
+        (first, 'Departed', 'Felixstowe'),
+        (second, 'Held', 'Customs'),
+        ('NOSUCHCODE', 'Loaded', 'Felixstowe'),
+    ])
+    assert result == {'created': 3, 'unknown_reference_codes': ['NOSUCHCODE']}
+    assert Booking.objects.get(reference_code=first).current_status == 'Departed'
+    assert Booking.objects.get(reference_code=second).current_location == 'Customs'
+
+
+def test_ingest_endpoint_json(admin_client, bookings):
+    resp = admin_client.post(reverse('tracking-ingest'), {
+        'status': 'Arrived', 'location': 'Tema Port',
+        'reference_codes': [b.reference_code for b in bookings[:5]],
+    }, format='json')
+    assert resp.status_code == 201
+    assert resp.json()['created'] == 5
+    assert Booking.objects.filter(current_status='Arrived').count() == 5
+
+
+def test_ingest_endpoint_csv(admin_client, bookings):
+    csv_text = 'reference_code,location\n' + '\n'.join(
+        f'{b.reference_code},Tema Port' for b in bookings[:3]
+    )
+    resp = admin_client.post(reverse('tracking-ingest'), {
+        'file': SimpleUploadedFile('feed.csv', csv_text.encode(), content_type='text/csv'),
+        'status': 'Cleared',
+    }, format='multipart')
+    assert resp.status_code == 201
+    assert resp.json()['created'] == 3
+
+
+def test_ingest_endpoint_rejects_invalid_rows(admin_client, bookings):
+    resp = admin_client.post(reverse('tracking-ingest'), {
+        'events': [{'reference_code': bookings[0].reference_code, 'status': 'x' * 51, 'location': 'Tema'}],
+    }, format='json')
+    assert resp.status_code == 400
+    assert 'row 0' in resp.json()
+    assert TrackingRecord.objects.count() == 0
+
+
+def test_ingest_endpoint_requires_admin(bookings):
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username='staff', password='pass'))
+    resp = client.post(reverse('tracking-ingest'), {'reference_codes': []}, format='json')
+    assert resp.status_code == 403
+
+
+def test_ingest_command(tmp_path, bookings):
+    feed = tmp_path / 'feed.json'
+    feed.write_text(json.dumps([b.reference_code for b in bookings[:4]]))
+    out = StringIO()
+    call_command('ingest_tracking_events', str(feed), status='Arrived', location='Tema Port', stdout=out)
+    assert 'Ingested 4 tracking events' in out.getvalue()
+    assert Booking.objects.filter(current_status='Arrived').count() == 4
@@ -1,9 +1,78 @@
-from rest_framework import viewsets
+import uuid
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.response import Response
+from .ingest import IngestError, ingest_events, normalize_payload, parse_csv
 from .models import TrackingRecord
 from .serializers import TrackingRecordSerializer
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+
+
+class TrackingCursorPagination(CursorPagination):
+    # (timestamp, id) is unique, so cursors stay stable while events stream in
+    ordering = ('timestamp', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
 
 class TrackingViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = TrackingRecord.objects.all().order_by('timestamp')
+    """
+    Tracking events, oldest first. Filter with ?booking=<uuid> or
+    ?reference_code=<code>; a per-booking timeline is a range scan on the
+    (booking, timestamp) index.
+    """
     serializer_class = TrackingRecordSerializer
     permission_classes = [AllowAny]
+    pagination_class = TrackingCursorPagination
+    throttle_scope = 'tracking'
+
+    def get_queryset(self):
+        queryset = TrackingRecord.objects.all()
+        booking = self.request.query_params.get('booking')
+        reference_code = self.request.query_params.get('reference_code')
+        if booking:
+            try:
+                queryset = queryset.filter(booking_id=uuid.UUID(booking))
+            except ValueError:
+                raise ValidationError({'booking': 'Must be a valid booking UUID.'})
+        if reference_code:
+            queryset = queryset.filter(booking__reference_code=reference_code)
+        return queryset.order_by('timestamp', 'id')
+
+    @action(
+        detail=False, methods=['post'],
+        permission_classes=[IsAdminUser],
+        parser_classes=[JSONParser, MultiPartParser],
+        throttle_scope=None,  # the admin's own 'user' budget, not the public one
+    )
+    def ingest(self, request):
+        """
+        Bulk-apply a carrier/port status feed. JSON body is either
+        {"status", "location", "reference_codes": [...]} or
+        {"events": [{"reference_code", "status", "location"}, ...]};
+        a multipart ``file`` upload is read as CSV (``status``/``location``
+        form fields fill in missing columns).
+        """
+        try:
+            upload = request.FILES.get('file')
+            if upload is not None:
+                try:
+                    text = upload.read().decode('utf-8-sig')
+                except UnicodeDecodeError:
+                    raise IngestError({'file': 'CSV must be UTF-8 encoded.'})
+                rows = parse_csv(
+                    text,
+                    status=request.data.get('status', ''),
+                    location=request.data.get('location', ''),
+                )
+            else:
+                rows = normalize_payload(request.data)
+        except IngestError as exc:
+            return Response(exc.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        result = ingest_events(rows)
+        return Response(result, status=status.HTTP_201_CREATED)